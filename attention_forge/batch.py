@@ -0,0 +1,245 @@
+import sys
+import os
+import json
+import time
+import uuid
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from attention_forge.api_key_loader import ApiKeyLoader
+from attention_forge.config_loader import load_project_config
+from attention_forge.file_manager import set_run_id
+from attention_forge.role import Role
+from attention_forge.chain import Chain
+from attention_forge.chain_steps.chat import Chat
+from attention_forge.chain_steps.context_loader_step import ContextLoader
+from attention_forge.chain_steps.file_reverter import FileReverter
+from attention_forge.chain_steps.file_updater import FileUpdater
+from attention_forge.chain_steps.user_input_handler import UserInputHandler
+
+
+def read_batch_items(path):
+    """
+    Read the prompts of a batch: one JSON object per line with a "message" and
+    an optional "id", or just a JSON string. Blank lines are skipped. Returns
+    (id, message, error) tuples; a line that cannot be used gets an error.
+    """
+    items = []
+    with open(path, "r", encoding="utf-8") as batch_file:
+        for line_number, line in enumerate(batch_file, 1):
+            if not line.strip():
+                continue
+            item_id = line_number
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError as e:
+                items.append((item_id, None, f"Line {line_number} is not valid JSON: {e}"))
+                continue
+            if isinstance(entry, dict):
+                item_id = entry.get("id", line_number)
+                entry = entry.get("message")
+            if not isinstance(entry, str) or not entry.strip():
+                items.append((item_id, None, f"Line {line_number} has no message."))
+                continue
+            items.append((item_id, entry.strip(), None))
+    return items
+
+
+def sum_usage(chat_outputs):
+    """Total tokens of the chat replies of one item; replies from the response cache cost none."""
+    usage = {"requests": 0, "cached_responses": 0, "prompt_tokens": 0, "completion_tokens": 0}
+    for response_data in chat_outputs:
+        usage["requests"] += 1
+        if response_data.get("cached"):
+            usage["cached_responses"] += 1
+            continue
+        token_usage = response_data.get("usage", {})
+        usage["prompt_tokens"] += token_usage.get("prompt_tokens") or 0
+        usage["completion_tokens"] += token_usage.get("completion_tokens") or 0
+    return usage
+
+
+class BatchRunner:
+    """
+    Runs one chain for each prompt of a batch on a pool of worker threads.
+    The context is loaded once and the chat steps, with their clients and
+    connection pool, are shared by all items.
+    """
+
+    def __init__(self, chain, output_path, concurrency=4):
+        self.chain = chain
+        self.output_path = output_path
+        self.concurrency = max(1, concurrency)
+        self.write_lock = threading.Lock()
+        self.input_steps = []
+        for index, (obj, _) in enumerate(chain.objects_list):
+            if isinstance(obj, FileReverter):
+                raise ValueError("Chains with a revert step cannot run in batch mode.")
+            if isinstance(obj, FileUpdater):
+                # Concurrent items would overwrite the same files, with backups under one run ID
+                raise ValueError("Chains with a file_update step cannot run in batch mode.")
+            if isinstance(obj, ContextLoader) and chain.step_graph.dependencies[index]:
+                # The context is loaded once for all items, so it cannot depend on an item
+                raise ValueError("In batch mode, context_load steps cannot depend on other steps.")
+            if isinstance(obj, UserInputHandler):
+                if chain.step_graph.dependencies[index]:
+                    raise ValueError("In batch mode, user_input steps cannot depend on other steps.")
+                self.input_steps.append(index)
+            if isinstance(obj, Chat):
+                # Streams of concurrent items would interleave on the terminal
+                obj.stream = False
+        if not self.input_steps:
+            raise ValueError(f"Chain '{chain.chain_name}' has no user_input step to take the batch messages.")
+        self.shared_outputs = {}
+
+    def load_shared_outputs(self):
+        """Run the context_load steps once; every item reuses their output."""
+        for index, (obj, _) in enumerate(self.chain.objects_list):
+            if isinstance(obj, ContextLoader):
+                self.chain.run_step(index, {}, self.shared_outputs)
+
+    def run(self, items):
+        """Run all items and write a result line for each as it finishes. Returns the number of failed items."""
+        self.load_shared_outputs()
+        directory = os.path.dirname(self.output_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        failed = 0
+        with open(self.output_path, "w", encoding="utf-8") as output_file:
+            with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="batch") as executor:
+                futures = [executor.submit(self.run_item, position, item) for position, item in enumerate(items)]
+                for finished, future in enumerate(as_completed(futures), 1):
+                    result = future.result()
+                    if result["status"] != "ok":
+                        failed += 1
+                    with self.write_lock:
+                        output_file.write(json.dumps(result, default=str) + "\n")
+                        output_file.flush()
+                    print(f"📦 Batch: {finished}/{len(items)} done ({failed} failed) - item {result['id']}: "
+                          f"{result['status']}")
+        return failed
+
+    def run_item(self, position, item):
+        item_id, message, error = item
+        result = {"id": item_id, "index": position, "message": message, "status": "error", "error": error,
+                  "outputs": {}, "usage": sum_usage([]), "seconds": 0}
+        if error is not None:
+            return result
+
+        preset_outputs = dict(self.shared_outputs)
+        for index in self.input_steps:
+            preset_outputs[index] = message
+        start_time = time.monotonic()
+        try:
+            step_outputs = self.chain.run(preset_outputs)
+        except (Exception, SystemExit) as e:  # SystemExit of steps that give up must not stop the batch
+            result["error"] = str(e) or type(e).__name__
+            result["seconds"] = round(time.monotonic() - start_time, 3)
+            return result
+
+        chat_outputs = []
+        for index, output_data in sorted(step_outputs.items()):
+            obj, step = self.chain.objects_list[index]
+            if isinstance(obj, Chat):
+                chat_outputs.append(output_data)
+            if index not in preset_outputs:
+                key = step.get("output_data_key") or self.chain.get_step_label(index, step)
+                result["outputs"][key] = output_data
+        result.update(status="ok", usage=sum_usage(chat_outputs), seconds=round(time.monotonic() - start_time, 3))
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run a chain once for every message of a JSONL file, several at a time, "
+                    "and write the results and token usage to an output JSONL file."
+    )
+    parser.add_argument("chain_name", help="Name of the chain to execute for each message.")
+    parser.add_argument(
+        "input_path",
+        help='JSONL file with one message per line: {"id": ..., "message": "..."} or a JSON string.'
+    )
+    parser.add_argument(
+        "--output",
+        default=None,
+        help="Where to write the results. Defaults to .attention_forge/batches/<run_id>.jsonl."
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Number of messages processed at the same time. Defaults to 4."
+    )
+    parser.add_argument(
+        "--project-config",
+        default="attention_forge_project.yaml",
+        help="Path to the project config file. Defaults to 'attention_forge_project.yaml'."
+    )
+    cache_group = parser.add_mutually_exclusive_group()
+    cache_group.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write the LLM response cache."
+    )
+    cache_group.add_argument(
+        "--refresh-cache",
+        action="store_true",
+        help="Ignore cached LLM responses, but store the new ones."
+    )
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.project_config):
+        print(f"Error: Project config file '{args.project_config}' not found.")
+        sys.exit(1)
+    if not os.path.isfile(args.input_path):
+        print(f"Error: Batch file '{args.input_path}' not found.")
+        sys.exit(1)
+
+    try:
+        project_config = load_project_config(args.project_config)
+        api_key_loader = ApiKeyLoader(
+            api_keys_dir=project_config.get("api_keys_dir", "api-keys"),
+            additional_api_key_file=project_config.get("api_key_file", None)
+        )
+    except Exception as e:
+        print(f"Configuration error: {e}")
+        sys.exit(1)
+
+    # The items of a batch run concurrently, so a single checkpoint cannot describe them
+    project_config = dict(project_config, checkpoints=False)
+    run_id = str(uuid.uuid4())
+    set_run_id(run_id)
+    print(f"🆔 Run ID: {run_id}")
+
+    items = read_batch_items(args.input_path)
+    output_path = args.output or os.path.join(".attention_forge", "batches", f"{run_id}.jsonl")
+
+    response_cache_mode = "bypass" if args.no_cache else "refresh" if args.refresh_cache else "use"
+    try:
+        chain = Chain(args.chain_name, api_key_loader, Role(), project_config, response_cache_mode,
+                      interactive=False)
+        runner = BatchRunner(chain, output_path, args.concurrency)
+    except ValueError as e:
+        print(f"Chain configuration error: {e}")
+        sys.exit(1)
+
+    failed = 0
+    try:
+        failed = runner.run(items)
+        print(f"✅ Batch finished: {len(items) - failed}/{len(items)} succeeded. Results: {output_path}")
+    except KeyboardInterrupt:
+        print(f"\n🛑 Batch interrupted. Results so far: {output_path}")
+        failed = 1
+    except Exception as e:
+        print("An error occurred while running the batch:", e)
+        failed = 1
+    finally:
+        chain.close()
+        chain.print_usage_summary()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import os
+import json
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from attention_forge.batch import BatchRunner, read_batch_items, sum_usage
+from attention_forge.chain_steps.chat import Chat
+from attention_forge.chain_steps.context_loader_step import ContextLoader
+from attention_forge.chain_steps.file_updater import FileUpdater
+from attention_forge.chain_steps.file_reverter import FileReverter
+from attention_forge.chain_steps.user_input_handler import UserInputHandler
+from attention_forge.step_graph import StepGraph
+
+STEPS = [
+    {"type": "user_input", "output_data_key": "user_message"},
+    {"type": "chat", "role_name": "assistant", "input_data_key": "user_message", "output_data_key": "chat_response"}
+]
+
+def make_chain(steps=STEPS, objects=None):
+    chain = MagicMock()
+    chain.chain_name = "test"
+    chain.objects_list = list(zip(objects or [UserInputHandler(), MagicMock(spec=Chat)], steps))
+    chain.step_graph = StepGraph(steps)
+    chain.get_step_label.side_effect = lambda index, step: f"{index + 1}. {step['type']}"
+    return chain
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+
+    def write_lines(self, lines):
+        path = os.path.join(self.temp_dir.name, "batch.jsonl")
+        with open(path, "w", encoding="utf-8") as batch_file:
+            batch_file.write("\n".join(lines) + "\n")
+        return path
+
+    def test_read_batch_items(self):
+        path = self.write_lines(['{"id": "a", "message": " first "}', '', '"second"', 'not json', '{"id": 7}'])
+        items = read_batch_items(path)
+        self.assertEqual(items[0], ("a", "first", None))
+        self.assertEqual(items[1], (3, "second", None))
+        self.assertEqual(items[2][:2], (4, None))
+        self.assertIn("not valid JSON", items[2][2])
+        self.assertEqual(items[3], (7, None, "Line 5 has no message."))
+
+    def test_sum_usage_skips_cached_replies(self):
+        usage = sum_usage([
+            {"usage": {"prompt_tokens": 10, "completion_tokens": 5}},
+            {"usage": {"prompt_tokens": 20, "completion_tokens": None}},
+            {"usage": {"prompt_tokens": 99, "completion_tokens": 99}, "cached": True}
+        ])
+        self.assertEqual(usage, {"requests": 3, "cached_responses": 1, "prompt_tokens": 30, "completion_tokens": 5})
+
+    def test_chains_without_input_or_with_revert_are_rejected(self):
+        with self.assertRaises(ValueError):
+            BatchRunner(make_chain([{"type": "chat", "output_data_key": "chat_response"}],
+                                   [MagicMock(spec=Chat)]), "out.jsonl")
+        with self.assertRaises(ValueError):
+            BatchRunner(make_chain(STEPS + [{"type": "revert"}],
+                                   [UserInputHandler(), MagicMock(spec=Chat), FileReverter()]), "out.jsonl")
+
+    def test_chains_that_write_files_or_load_context_per_item_are_rejected(self):
+        with self.assertRaisesRegex(ValueError, "file_update"):
+            BatchRunner(make_chain(STEPS + [{"type": "file_update", "input_data_key": "chat_response"}],
+                                   [UserInputHandler(), MagicMock(spec=Chat), FileUpdater()]), "out.jsonl")
+        steps = STEPS + [{"type": "context_load", "input_data_key": "chat_response", "output_data_key": "context"}]
+        with self.assertRaisesRegex(ValueError, "context_load"):
+            BatchRunner(make_chain(steps, [UserInputHandler(), MagicMock(spec=Chat), MagicMock(spec=ContextLoader)]),
+                        "out.jsonl")
+
+    @patch('builtins.print')
+    def test_run_writes_a_result_per_item(self, mock_print):
+        chain = make_chain()
+        reply = {"response": "ok", "usage": {"prompt_tokens": 4, "completion_tokens": 2}}
+
+        def run(preset_outputs):
+            if preset_outputs[0] == "boom":
+                raise RuntimeError("request failed")
+            return {0: preset_outputs[0], 1: reply}
+
+        chain.run.side_effect = run
+        output_path = os.path.join(self.temp_dir.name, "out", "results.jsonl")
+        runner = BatchRunner(chain, output_path, concurrency=2)
+        self.assertFalse(chain.objects_list[1][0].stream)
+
+        failed = runner.run([("a", "hello", None), ("b", "boom", None), ("c", None, "Line 3 has no message.")])
+        self.assertEqual(failed, 2)
+        with open(output_path, "r", encoding="utf-8") as output_file:
+            results = {result["id"]: result for result in map(json.loads, output_file)}
+        self.assertEqual(results["a"]["status"], "ok")
+        self.assertEqual(results["a"]["outputs"], {"chat_response": reply})
+        self.assertEqual(results["a"]["usage"]["prompt_tokens"], 4)
+        self.assertEqual(results["b"]["error"], "request failed")
+        self.assertEqual(results["c"]["error"], "Line 3 has no message.")
+        chain.run.assert_any_call({0: "hello"})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from attention_forge.bench.mock_server import MockServer, add_config_arguments, config_from_args
+from attention_forge.clients.base_client import BaseClient
+from attention_forge.clients.deepseek_client import DeepSeekClient
+from attention_forge.clients.fireworks_client import FireworksClient
+from attention_forge.clients.openai_client import OpenAIClient
+from attention_forge.clients.ollama_client import OllamaClient
+from attention_forge.resilience import get_percentile
+
+CLIENT_CLASSES = {
+    "deepseek": DeepSeekClient,
+    "fireworks": FireworksClient,
+    "openai": OpenAIClient,
+    "ollama": OllamaClient
+}
+ROLE_CONFIG = {"developer_message": "You are a benchmark.", "assistant_message": "Ready."}
+
+
+def get_base_urls(server_url):
+    """Base URLs that make each client talk to the mock server."""
+    return {
+        "deepseek": server_url,
+        "fireworks": f"{server_url}/inference/v1",
+        "openai": f"{server_url}/v1",
+        "ollama": server_url
+    }
+
+
+class BenchmarkResult:
+    def __init__(self, client_name, mode):
+        self.client_name = client_name
+        self.mode = mode
+        self.latencies = []
+        self.first_token_latencies = []
+        self.completion_tokens = 0
+        self.errors = 0
+        self.wall_seconds = 0.0
+        self.lock = threading.Lock()
+
+
+def run_request(client, stream, result):
+    token_times = []
+    on_token = (lambda text: token_times.append(time.monotonic())) if stream else None
+    start_time = time.monotonic()
+    try:
+        _, response_data, _ = client.request_chat(ROLE_CONFIG, "Benchmark request.", on_token=on_token)
+    except Exception:
+        with result.lock:
+            result.errors += 1
+        return
+    end_time = time.monotonic()
+
+    with result.lock:
+        result.latencies.append(end_time - start_time)
+        if token_times:
+            result.first_token_latencies.append(token_times[0] - start_time)
+        result.completion_tokens += response_data["usage"].get("completion_tokens") or 0
+
+
+def run_benchmark(client_name, mode, project_config, requests_count, concurrency):
+    BaseClient.provider_stats.clear()
+    client = CLIENT_CLASSES[client_name]("mock-key", "mock-model", project_config)
+    result = BenchmarkResult(client_name, mode)
+
+    # One warm-up request opens the connection pool, as in a long-lived run
+    run_request(client, mode == "stream", BenchmarkResult(client_name, mode))
+
+    start_time = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(requests_count):
+            executor.submit(run_request, client, mode == "stream", result)
+    result.wall_seconds = time.monotonic() - start_time
+    return result
+
+
+def format_seconds(value):
+    return f"{value * 1000:.0f}ms" if value is not None else "-"
+
+
+def print_report(results, expected_seconds):
+    print(f"\n{'client':<10} {'mode':<8} {'ok':>4} {'err':>4} {'req/s':>7} {'tok/s':>8} "
+          f"{'p50':>8} {'p95':>8} {'p99':>8} {'ttft50':>8} {'overhead':>9}")
+    for result in results:
+        p50 = get_percentile(result.latencies, 0.50)
+        overhead = p50 - expected_seconds if p50 is not None else None
+        requests_per_second = len(result.latencies) / result.wall_seconds if result.wall_seconds else 0
+        tokens_per_second = result.completion_tokens / result.wall_seconds if result.wall_seconds else 0
+        print(f"{result.client_name:<10} {result.mode:<8} {len(result.latencies):>4} {result.errors:>4} "
+              f"{requests_per_second:>7.1f} {tokens_per_second:>8.0f} "
+              f"{format_seconds(p50):>8} {format_seconds(get_percentile(result.latencies, 0.95)):>8} "
+              f"{format_seconds(get_percentile(result.latencies, 0.99)):>8} "
+              f"{format_seconds(get_percentile(result.first_token_latencies, 0.50)):>8} "
+              f"{format_seconds(overhead):>9}")
+    print(f"\noverhead: p50 latency minus the {format_seconds(expected_seconds)} the mock server spends per request.")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the Attention Forge clients against a local mock LLM server."
+    )
+    parser.add_argument("--clients", default=",".join(CLIENT_CLASSES),
+                        help="Comma separated clients to benchmark. Defaults to all.")
+    parser.add_argument("--modes", default="complete,stream", help="Comma separated: complete, stream.")
+    parser.add_argument("--requests", type=int, default=20, help="Requests per client and mode.")
+    parser.add_argument("--concurrency", type=int, default=4, help="Requests in flight at once.")
+    parser.add_argument("--server-url", default=None,
+                        help="Use an already running mock server instead of starting one.")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    config = config_from_args(args)
+    server = None
+    server_url = args.server_url
+    if server_url is None:
+        server = MockServer(config).start()
+        server_url = server.base_url
+
+    project_config = {
+        "api_base_urls": get_base_urls(server_url.rstrip("/")),
+        "http_pool_size": max(args.concurrency, 1),
+        "retry_base_delay": 0.05,
+        "retry_max_delay": 1.0,
+        # Nothing to warm up against the mock server, and no Ollama state to keep in the current directory
+        "ollama_warm_up": False
+    }
+    print(f"🏁 Benchmarking against {server_url}: {args.requests} requests per run, concurrency {args.concurrency}, "
+          f"latency {args.latency}s, {args.reply_tokens} tokens at {args.token_rate} tok/s, "
+          f"error rate {args.error_rate:.0%}")
+
+    results = []
+    try:
+        for client_name in [name.strip() for name in args.clients.split(",") if name.strip()]:
+            if client_name not in CLIENT_CLASSES:
+                print(f"⚠️ Unknown client '{client_name}', skipping.")
+                continue
+            for mode in [mode.strip() for mode in args.modes.split(",") if mode.strip()]:
+                print(f"⏳ {client_name} ({mode})...")
+                results.append(run_benchmark(client_name, mode, project_config, args.requests, args.concurrency))
+    finally:
+        if server is not None:
+            server.stop()
+
+    print_report(results, config.expected_seconds())
+
+
+if __name__ == "__main__":
+    main()
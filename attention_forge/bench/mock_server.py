@@ -0,0 +1,237 @@
+import json
+import time
+import random
+import argparse
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from attention_forge.token_estimator import estimate_tokens
+
+OPENAI_CHAT_PATHS = ("/chat/completions", "/v1/chat/completions", "/inference/v1/chat/completions")
+OLLAMA_CHAT_PATH = "/api/chat"
+OLLAMA_GENERATE_PATH = "/api/generate"  # Only used to load a model, as in OllamaClient.warm_up
+
+
+class MockServerConfig:
+    """Simulated provider behavior: time to first token, decoding speed, reply size and injected errors."""
+
+    def __init__(self, latency=0.2, token_rate=200.0, reply_tokens=200, error_rate=0.0,
+                 error_status=503, retry_after=None, seed=None):
+        self.latency = latency
+        self.token_rate = token_rate
+        self.reply_tokens = reply_tokens
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def should_fail(self):
+        with self.lock:
+            return self.random.random() < self.error_rate
+
+    def expected_seconds(self):
+        """Time the server itself spends on a successful request."""
+        return self.latency + (self.reply_tokens / self.token_rate if self.token_rate else 0)
+
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real APIs
+    disable_nagle_algorithm = True  # Headers and body are separate writes; avoid delayed-ACK stalls
+
+    def log_message(self, format, *args):
+        pass  # Keep benchmark output clean
+
+    @property
+    def config(self):
+        return self.server.mock_config
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        try:
+            request = json.loads(body or b"{}")
+        except json.JSONDecodeError:
+            self.send_json(400, {"error": {"message": "invalid JSON body"}})
+            return
+
+        if self.path == OLLAMA_GENERATE_PATH:
+            self.send_json(200, {"model": request.get("model", "mock"), "response": "", "done": True})
+            return
+        if self.path not in OPENAI_CHAT_PATHS and self.path != OLLAMA_CHAT_PATH:
+            self.send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+            return
+        if self.config.should_fail():
+            self.send_error_response()
+            return
+
+        time.sleep(self.config.latency)
+        prompt_tokens = sum(estimate_tokens(message.get("content") or "") for message in request.get("messages", []))
+        if self.path == OLLAMA_CHAT_PATH:
+            self.handle_ollama_chat(request, prompt_tokens)
+        else:
+            self.handle_openai_chat(request, prompt_tokens)
+
+    def send_error_response(self):
+        headers = {"Retry-After": str(self.config.retry_after)} if self.config.retry_after is not None else {}
+        self.send_json(self.config.error_status, {"error": {"message": "injected error"}}, headers)
+
+    def send_json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def start_stream(self, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def end_stream(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def generate_tokens(self):
+        """Yield the reply one token at a time, paced by the configured token rate."""
+        delay = 1 / self.config.token_rate if self.config.token_rate else 0
+        for index in range(self.config.reply_tokens):
+            if delay:
+                time.sleep(delay)
+            yield f"tok{index % 10} "
+
+    def get_usage(self, prompt_tokens):
+        completion_tokens = self.config.reply_tokens
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+
+    def handle_openai_chat(self, request, prompt_tokens):
+        model = request.get("model", "mock")
+        usage = self.get_usage(prompt_tokens)
+        if not request.get("stream"):
+            content = "".join(self.generate_tokens())
+            self.send_json(200, {
+                "id": "chatcmpl-mock", "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                             "finish_reason": "stop"}],
+                "usage": usage
+            })
+            return
+
+        def event(choices, usage=None):
+            chunk = {"id": "chatcmpl-mock", "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": model, "choices": choices}
+            if usage is not None:
+                chunk["usage"] = usage
+            return f"data: {json.dumps(chunk)}\n\n".encode("utf-8")
+
+        self.start_stream("text/event-stream")
+        self.write_chunk(event([{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}]))
+        for token in self.generate_tokens():
+            self.write_chunk(event([{"index": 0, "delta": {"content": token}, "finish_reason": None}]))
+        self.write_chunk(event([{"index": 0, "delta": {}, "finish_reason": "stop"}]))
+        self.write_chunk(event([], usage))
+        self.write_chunk(b"data: [DONE]\n\n")
+        self.end_stream()
+
+    def handle_ollama_chat(self, request, prompt_tokens):
+        model = request.get("model", "mock")
+
+        def message(content, done):
+            payload = {"model": model, "created_at": datetime.now(timezone.utc).isoformat(),
+                       "message": {"role": "assistant", "content": content}, "done": done}
+            if done:
+                payload.update({"done_reason": "stop", "prompt_eval_count": prompt_tokens,
+                                "eval_count": self.config.reply_tokens})
+            return payload
+
+        # The Ollama API streams unless told otherwise
+        if request.get("stream", True) is False:
+            self.send_json(200, message("".join(self.generate_tokens()), True))
+            return
+
+        self.start_stream("application/x-ndjson")
+        for token in self.generate_tokens():
+            self.write_chunk((json.dumps(message(token, False)) + "\n").encode("utf-8"))
+        self.write_chunk((json.dumps(message("", True)) + "\n").encode("utf-8"))
+        self.end_stream()
+
+
+class MockServer:
+    """Runs the mock provider in a background thread; port 0 picks a free port."""
+
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        self.httpd = ThreadingHTTPServer((host, port), MockRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.mock_config = config or MockServerConfig()
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def add_config_arguments(parser):
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds before the first token.")
+    parser.add_argument("--token-rate", type=float, default=200.0, help="Generated tokens per second (0: no delay).")
+    parser.add_argument("--reply-tokens", type=int, default=200, help="Tokens in each reply.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with an error.")
+    parser.add_argument("--error-status", type=int, default=503, help="HTTP status of injected errors.")
+    parser.add_argument("--retry-after", type=float, default=None, help="Retry-After seconds sent with errors.")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for error injection.")
+
+
+def config_from_args(args):
+    return MockServerConfig(
+        latency=args.latency,
+        token_rate=args.token_rate,
+        reply_tokens=args.reply_tokens,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        retry_after=args.retry_after,
+        seed=args.seed
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve a local stand-in for the OpenAI-compatible chat completions and Ollama chat APIs."
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on.")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on.")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    server = MockServer(config_from_args(args), args.host, args.port)
+    print(f"🧪 Mock LLM server listening on {server.base_url}")
+    print(f"   OpenAI-compatible: {server.base_url}/v1/chat/completions, Ollama: {server.base_url}{OLLAMA_CHAT_PATH}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Mock server stopped.")
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
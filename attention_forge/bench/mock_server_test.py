@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+import requests
+from unittest.mock import patch
+from attention_forge.bench.mock_server import MockServer, MockServerConfig
+from attention_forge.bench.benchmark import get_base_urls
+from attention_forge.clients.base_client import BaseClient
+from attention_forge.clients.deepseek_client import DeepSeekClient
+from attention_forge.clients.ollama_client import OllamaClient
+
+class TestMockServer(unittest.TestCase):
+    def start_server(self, **config):
+        server = MockServer(MockServerConfig(latency=0, token_rate=0, reply_tokens=5, **config)).start()
+        self.addCleanup(server.stop)
+        BaseClient.provider_stats.clear()
+        return {"api_base_urls": get_base_urls(server.base_url), "retry_base_delay": 0}
+
+    def test_openai_compatible_completion_and_stream(self):
+        client = DeepSeekClient("key", "mock-model", self.start_server())
+
+        _, response_data, reply = client.complete_chat({}, "hello")
+        self.assertEqual(reply, "tok0 tok1 tok2 tok3 tok4 ")
+        self.assertEqual(response_data["usage"]["completion_tokens"], 5)
+
+        tokens = []
+        _, response_data, reply = client.stream_chat({}, "hello", tokens.append)
+        self.assertEqual(len(tokens), 5)
+        self.assertEqual("".join(tokens), reply)
+        self.assertEqual(response_data["usage"]["completion_tokens"], 5)
+
+    def test_ollama_stream(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        state_file = os.path.join(temp_dir.name, "ollama_num_ctx.json")
+        patcher = patch('attention_forge.clients.ollama_client.NUM_CTX_STATE_FILE', state_file)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        client = OllamaClient(None, "mock-model", self.start_server())
+        tokens = []
+        _, _, reply = client.stream_chat({}, "hello", tokens.append)
+        self.assertEqual(reply, "tok0 tok1 tok2 tok3 tok4 ")
+
+    @patch('builtins.print')
+    def test_injected_errors(self, mock_print):
+        client = DeepSeekClient("key", "mock-model", self.start_server(error_rate=1.0, error_status=429, retry_after=0))
+        with self.assertRaises(requests.exceptions.HTTPError):
+            client.request_chat({}, "hello")
+        self.assertEqual(BaseClient.get_resilience_stats()["deepseek"]["retries"], 4)
+
+if __name__ == "__main__":
+    unittest.main()
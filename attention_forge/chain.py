@@ -1,16 +1,28 @@
 import os
 import yaml
+import asyncio
+import threading
+from attention_forge.chain_steps.chat import Chat
 from attention_forge.chain_steps.chat_builder import ChatBuilder
 from attention_forge.chain_steps.user_input_handler import UserInputHandler
 from attention_forge.chain_steps.file_updater import FileUpdater
 from attention_forge.chain_steps.dictionary_rewriter import DictionaryRewriter
 from attention_forge.chain_steps.file_reverter import FileReverter
 from attention_forge.chain_steps.context_loader_step import ContextLoader  # Import ContextLoader at the top
+from attention_forge.file_manager import get_run_id
+from attention_forge.checkpoint import Checkpoint
+from attention_forge.step_memo import StepMemo
+from attention_forge.step_graph import StepGraph
+from attention_forge.tracing import span
+from attention_forge.usage_ledger import UsageLedger
 
 class Chain:
-    def __init__(self, chain_name, api_key_loader, role_handler, project_config):
+    def __init__(self, chain_name, api_key_loader, role_handler, project_config, response_cache_mode="use",
+                 resume=False, interactive=True):
         self.chain_name = chain_name
         self.api_key_loader = api_key_loader  # Store ApiKeyLoader instance
+        self.interactive = interactive
+        self.warm_ups_started = False
         self.chain_dir = os.path.join(os.path.dirname(__file__), "chain_configs")
         self.chain_file_path = os.path.join(self.chain_dir, f"{self.chain_name}.yaml")
 
@@ -18,10 +30,14 @@ class Chain:
             raise FileNotFoundError(f"Chain file '{self.chain_file_path}' not found.")
 
         self.steps = self.load_chain_config()
-        self.chat_builder = ChatBuilder(api_key_loader, role_handler, project_config)
+        self.chat_builder = ChatBuilder(api_key_loader, role_handler, project_config, response_cache_mode)
         self.role_handler = role_handler
         self.project_config = project_config
         self.objects_list = self.create_objects_from_steps()
+        # Raises ValueError for missing, duplicate or cyclic data keys
+        self.step_graph = StepGraph([step for _, step in self.objects_list])
+        self.checkpoint, self.checkpoint_outputs = self.setup_checkpoint(resume)
+        self.step_memo = self.setup_step_memo()
 
     def load_chain_config(self):
         with open(self.chain_file_path, 'r') as file:
@@ -46,7 +62,7 @@ class Chain:
                 )
                 objects.append((chat_object, step))
             elif step_type == "context_load":  # Modify to pass the ApiKeyLoader
-                context_loader = ContextLoader(self.api_key_loader)
+                context_loader = ContextLoader(self.api_key_loader, interactive=self.interactive)
                 objects.append((context_loader, step))
             elif step_type == "file_update":
                 file_updater = FileUpdater()
@@ -63,22 +79,214 @@ class Chain:
 
         return objects
 
-    def run(self):
+    def setup_checkpoint(self, resume):
+        """
+        Start a checkpoint for this run, or load the one of the run being resumed.
+        Returns (checkpoint or None, {step index: output} of the resumed run).
+        """
+        enabled = self.project_config.get("checkpoints", True) and get_run_id() is not None
+        if not enabled:
+            if resume:
+                raise ValueError("Resuming a run needs the 'checkpoints' project option.")
+            return None, {}
+
+        checkpoint = Checkpoint(get_run_id())
+        steps = [step for _, step in self.objects_list]
+        if not resume:
+            Checkpoint.prune(keep=self.project_config.get("checkpoint_keep", 20))
+            checkpoint.start(self.chain_name, steps)
+            return checkpoint, {}
+
+        header, outputs = checkpoint.load()
+        if header.get("chain") != self.chain_name or header.get("fingerprint") != Checkpoint.fingerprint(steps):
+            raise ValueError(f"Run '{get_run_id()}' used a different version of chain '{header.get('chain')}'. "
+                             f"It cannot be resumed.")
+        return checkpoint, outputs
+
+    def setup_step_memo(self):
+        """A StepMemo if any step is configured with `memoize: true`; raises ValueError for impure steps."""
+        memoized = False
+        for index, (obj, step) in enumerate(self.objects_list):
+            if not step.get("memoize"):
+                continue
+            if not obj.memoizable:
+                raise ValueError(f"{self.get_step_label(index, step)} depends on more than its inputs "
+                                 f"and cannot be memoized.")
+            memoized = True
+        return StepMemo(self.project_config) if memoized else None
+
+    def lookup_memo(self, index, input_values):
+        """Return (memo key or None, found, output) for a `memoize: true` step."""
+        obj, step = self.objects_list[index]
+        if self.step_memo is None or not step.get("memoize"):
+            return None, False, None
+        label = self.get_step_label(index, step)
+        try:
+            memo_key = StepMemo.make_key(step, input_values, obj.memo_fingerprint())
+        except (TypeError, ValueError) as e:
+            print(f"⚠️ Warning: The inputs of {label} cannot be hashed, so it is not memoized: {e}")
+            return None, False, None
+        found, output_data = self.step_memo.get(label, memo_key)
+        return memo_key, found, output_data
+
+    def restore_outputs(self, known_outputs, step_data, step_outputs):
+        """
+        Use known outputs (from the checkpoint of a resumed run, or preset by the
+        caller) instead of running those steps. A step is reused only if all the
+        steps it depends on are reused too, or are not checkpointed and simply run
+        again, like context_load. Returns the indices of the reused steps.
+        """
+        reused = set()
+        rerun = {index for index, (obj, _) in enumerate(self.objects_list)
+                 if not obj.checkpointable and index not in known_outputs}
+        for index in self.step_graph.order:
+            if index in known_outputs and self.step_graph.dependencies[index] <= reused | rerun:
+                reused.add(index)
+                step_outputs[index] = known_outputs[index]
+                self.store_output(self.objects_list[index][1], step_data, known_outputs[index])
+        resumed = sorted(reused & self.checkpoint_outputs.keys())
+        if resumed:
+            labels = [self.get_step_label(index, self.objects_list[index][1]) for index in resumed]
+            print(f"⏩ Resuming run {get_run_id()}: reusing the outputs of {', '.join(labels)}.")
+        return reused
+
+    def start_warm_ups(self):
+        """
+        Warm up the models of local clients in background threads, so that
+        loading them overlaps with the earlier steps such as context loading.
+        """
+        if self.warm_ups_started:
+            return
+        self.warm_ups_started = True
+        started = set()
+        for obj, _ in self.objects_list:
+            if not isinstance(obj, Chat) or not obj.client.wants_warm_up():
+                continue
+            key = (obj.client.get_name(), obj.client.model)
+            if key in started:
+                continue
+            started.add(key)
+            threading.Thread(target=self.warm_up_client, args=(obj.client,), daemon=True).start()
+
+    @staticmethod
+    def warm_up_client(client):
+        try:
+            client.warm_up()
+        except Exception as e:
+            print(f"⚠️ Warning: Could not warm up {client.get_name()} model '{client.model}': {e}")
+
+    def run(self, preset_outputs=None):
+        """
+        Run the steps in dataflow order. Steps that do not depend on each other,
+        like context_load and user_input, run concurrently unless `parallel_steps`
+        is off. preset_outputs maps step indices to outputs to use instead of
+        running those steps. Returns the outputs of all steps by index.
+        Several runs of one chain may be in progress at once.
+        """
         step_data = {}
+        step_outputs = {}
+        reused = self.restore_outputs({**self.checkpoint_outputs, **(preset_outputs or {})}, step_data, step_outputs)
+        self.start_warm_ups()
 
-        for obj, step in self.objects_list:
-            input_data_key = step.get('input_data_key')
+        if self.project_config.get("parallel_steps", True):
+            self.step_graph.run(lambda index: self.run_step(index, step_data, step_outputs), reused)
+        else:
+            for index in self.step_graph.order:
+                if index not in reused:
+                    self.run_step(index, step_data, step_outputs)
+        return step_outputs
 
-            # If input_data_key is a list, gather all related data
-            input_values = []
-            if isinstance(input_data_key, list):
-                input_values = [step_data.get(key) for key in input_data_key]
+    def run_step(self, index, step_data, step_outputs):
+        obj, step = self.objects_list[index]
+        input_values = self.gather_inputs(step, step_data)
+        memo_key, found, output_data = self.lookup_memo(index, input_values)
+        if not found:
+            with span(self.get_step_label(index, step), "step"):
+                # Run the step with gathered input values
+                output_data = obj.run(*input_values)
+            if memo_key is not None:
+                self.step_memo.set(memo_key, output_data)
+        step_outputs[index] = output_data
+        self.store_output(step, step_data, output_data)
+        if self.checkpoint is not None and obj.checkpointable:
+            self.checkpoint.record(index, step, output_data)
+
+    async def arun(self, preset_outputs=None):
+        """
+        Run the chain on an asyncio event loop. Chat steps await their client
+        directly; the other steps run in a worker thread. Independent steps
+        run concurrently, as in run.
+        """
+        step_data = {}
+        step_outputs = {}
+        reused = self.restore_outputs({**self.checkpoint_outputs, **(preset_outputs or {})}, step_data, step_outputs)
+        self.start_warm_ups()
+
+        try:
+            if self.project_config.get("parallel_steps", True):
+                await self.step_graph.arun(lambda index: self.arun_step(index, step_data, step_outputs), reused)
             else:
-                input_values = [step_data.get(input_data_key)] if input_data_key else []
+                for index in self.step_graph.order:
+                    if index not in reused:
+                        await self.arun_step(index, step_data, step_outputs)
+            return step_outputs
+        finally:
+            # Async HTTP connections belong to this event loop
+            for obj, _ in self.objects_list:
+                if isinstance(obj, Chat):
+                    await obj.client.aclose()
+
+    async def arun_step(self, index, step_data, step_outputs):
+        obj, step = self.objects_list[index]
+        input_values = self.gather_inputs(step, step_data)
+        memo_key, found, output_data = self.lookup_memo(index, input_values)
+        if not found:
+            with span(self.get_step_label(index, step), "step"):
+                output_data = await obj.arun(*input_values)
+            if memo_key is not None:
+                self.step_memo.set(memo_key, output_data)
+        step_outputs[index] = output_data
+        self.store_output(step, step_data, output_data)
+        if self.checkpoint is not None and obj.checkpointable:
+            self.checkpoint.record(index, step, output_data)
+
+    @staticmethod
+    def get_step_label(index, step):
+        """e.g. '3. chat (developer)', for traces."""
+        label = f"{index + 1}. {step.get('type')}"
+        name = step.get("name", step.get("role_name"))
+        return f"{label} ({name})" if name else label
+
+    def close(self):
+        """Save the caches of this chain and release its connection pool."""
+        self.chat_builder.close()
+        if self.step_memo is not None:
+            self.step_memo.save()
+
+    def print_usage_summary(self):
+        """Print the token and time totals this run recorded in the usage ledger."""
+        usage_ledger = self.chat_builder.usage_ledger
+        if usage_ledger is None or get_run_id() is None:
+            return
+        entries = usage_ledger.get_recorded(get_run_id())
+        if not entries:
+            return
+        summary = UsageLedger.summarize(entries)
+        print(f"🧾 Run usage - Requests: {summary['requests']} ({summary['cached_responses']} cached), "
+              f"Prompt: {summary['prompt_tokens']}, Completion: {summary['completion_tokens']}, "
+              f"Time: {summary['total_seconds']:.2f}s. Ledger: {usage_ledger.path}")
+
+    @staticmethod
+    def gather_inputs(step, step_data):
+        input_data_key = step.get('input_data_key')
 
-            # Run the step with gathered input values
-            output_data = obj.run(*input_values)
+        # If input_data_key is a list, gather all related data
+        if isinstance(input_data_key, list):
+            return [step_data.get(key) for key in input_data_key]
+        return [step_data.get(input_data_key)] if input_data_key else []
 
-            output_data_key = step.get('output_data_key')
-            if output_data_key:
-                step_data[output_data_key] = output_data
\ No newline at end of file
+    @staticmethod
+    def store_output(step, step_data, output_data):
+        output_data_key = step.get('output_data_key')
+        if output_data_key:
+            step_data[output_data_key] = output_data
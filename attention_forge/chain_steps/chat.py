@@ -1,17 +1,101 @@
+import time
 from attention_forge.chain_steps.step import Step
 from attention_forge.chain_steps.chat_logger import ChatLogger
+from attention_forge.context_state import DeltaContext
+from attention_forge.file_manager import get_run_id
+from attention_forge.terminal import terminal_lock
+from attention_forge.token_estimator import estimate_tokens, estimate_message_tokens
+
+class PromptTooLargeError(ValueError):
+    """Raised before sending when the estimated prompt exceeds max_prompt_tokens."""
+
+
+class ChatExchange:
+    """State of one request through a Chat step, so that one Chat can serve concurrent chain runs."""
+
+    def __init__(self, user_message, role_config, estimated_prompt_tokens, context_files=None):
+        self.user_message = user_message
+        self.role_config = role_config
+        self.context_files = context_files
+        self.estimated_prompt_tokens = estimated_prompt_tokens
+        self.start_time = None
+        self.first_token_time = None
+        self.request_data = None
+        self.response_data = None
+        self.assistant_reply = None
+
+    def set_result(self, result):
+        self.request_data, self.response_data, self.assistant_reply = result
+
 
 class Chat(Step):
-    def __init__(self, project_config, role_name, role_handler, client, model, chat_logger):
+    def __init__(self, project_config, role_name, role_handler, client, model, chat_logger, stream=True,
+                 response_cache=None, max_prompt_tokens=None, usage_ledger=None, step_name=None):
         self.project_config = project_config
-        self.role_config = None
         self.role_name = role_name
         self.role_handler = role_handler
         self.client = client
         self.model = model
         self.chat_logger = chat_logger
+        self.stream = stream
+        self.response_cache = response_cache
+        self.max_prompt_tokens = max_prompt_tokens
+        self.prompt_token_warning_ratio = project_config.get("prompt_token_warning_ratio", 0.8)
+        self.usage_ledger = usage_ledger
+        self.step_name = step_name or role_name
+        self.last_exchange = None
 
     def run(self, *args):
+        exchange = self.prepare_request(*args)
+
+        # Generate response using the client object with role_config
+        exchange.start_time = time.monotonic()
+        cache_key, cached_result = self.lookup_cache(exchange)
+        if cached_result is not None:
+            exchange.set_result(cached_result)
+        elif self.stream:
+            # Concurrent steps wait with their prompts and streams until this reply is printed
+            with terminal_lock:
+                exchange.set_result(self.client.request_chat(
+                    exchange.role_config, exchange.user_message,
+                    on_token=lambda text: self.print_token(exchange, text)
+                ))
+                if exchange.first_token_time is not None:
+                    print()
+        else:
+            exchange.set_result(self.client.request_chat(exchange.role_config, exchange.user_message))
+
+        if cached_result is None:
+            self.store_in_cache(cache_key, exchange)
+        return self.finish_request(exchange)
+
+    async def arun(self, *args):
+        """
+        Asyncio version of run. The reply is printed once complete rather than
+        streamed, so several chats can be in flight without interleaving output.
+        """
+        exchange = self.prepare_request(*args)
+
+        exchange.start_time = time.monotonic()
+        cache_key, cached_result = self.lookup_cache(exchange)
+        if cached_result is not None:
+            exchange.set_result(cached_result)
+        else:
+            exchange.set_result(await self.client.arequest_chat(exchange.role_config, exchange.user_message))
+            self.store_in_cache(cache_key, exchange)
+
+        return self.finish_request(exchange)
+
+    def memo_fingerprint(self):
+        """The reply also depends on the client, model, sampling parameters and role messages."""
+        return {
+            "client": self.client.get_name(),
+            "model": self.model,
+            "sampling": self.client.get_sampling_params(),
+            "role": self.role_handler.role_configs.get(self.role_name)
+        }
+
+    def prepare_request(self, *args):
         user_message = args[0]
         context_files = args[1] if len(args) > 1 else []
 
@@ -21,32 +105,121 @@ class Chat(Step):
         if context_files is None:
             context_files = []
 
-        self.role_config = self.role_handler.initialize_role(self.role_name, context_files)
+        role_config = self.role_handler.initialize_role(self.role_name, context_files)
+        return ChatExchange(user_message, role_config, self.check_prompt_size(role_config, user_message),
+                            context_files)
 
-        # Generate response using the client object with role_config
-        self.request_data, self.response_data, self.assistant_reply = self.client.complete_chat(
-            self.role_config, user_message
-        )
+    def check_prompt_size(self, role_config, user_message):
+        """Estimate the prompt locally; warn when it nears max_prompt_tokens and refuse to send it above."""
+        messages = self.client.construct_messages(role_config, user_message)
+        estimated_tokens = estimate_message_tokens(messages)
+        if not self.max_prompt_tokens:
+            print(f"🔢 Estimated prompt: ~{estimated_tokens} tokens")
+            return estimated_tokens
+
+        print(f"🔢 Estimated prompt: ~{estimated_tokens}/{self.max_prompt_tokens} tokens")
+        if estimated_tokens > self.max_prompt_tokens:
+            raise PromptTooLargeError(
+                f"The prompt is estimated at ~{estimated_tokens} tokens, above max_prompt_tokens "
+                f"({self.max_prompt_tokens}). Narrow the context or set max_context_tokens."
+            )
+        if estimated_tokens > self.max_prompt_tokens * self.prompt_token_warning_ratio:
+            print(f"⚠️ Warning: The prompt uses {estimated_tokens / self.max_prompt_tokens:.0%} of max_prompt_tokens.")
+        return estimated_tokens
+
+    def lookup_cache(self, exchange):
+        """Return (cache_key, cached result or None); the key is None when caching is off."""
+        if self.response_cache is None:
+            return None, None
+        cache_key = self.client.get_cache_key(exchange.role_config, exchange.user_message)
+        cached_result = self.response_cache.get(cache_key)
+        if cached_result is not None:
+            cached_result[1]["cached"] = True
+            print(f"♻️ Using the cached {self.client.get_name()} response.")
+        return cache_key, cached_result
+
+    def store_in_cache(self, cache_key, exchange):
+        if cache_key is None:
+            return
+        response_data = {key: value for key, value in exchange.response_data.items() if key != "resilience"}
+        self.response_cache.set(cache_key, [exchange.request_data, response_data, exchange.assistant_reply])
 
-        self.chat_logger.log_chat(self.request_data, self.response_data, self.client.get_name(), self.model)
-        self.print_results(self.model)
+    def finish_request(self, exchange):
+        exchange.response_data["timing"] = self.measure_timing(exchange, time.monotonic())
 
-        return self.response_data
+        # A router reports the candidate that actually answered
+        route = exchange.response_data.get("route") or {}
+        client_name = route.get("client", self.client.get_name())
+        model = route.get("model", self.model)
+        self.chat_logger.log_chat(exchange.request_data, exchange.response_data, client_name, model)
+        if self.usage_ledger is not None:
+            self.usage_ledger.record(get_run_id(), self.step_name, client_name, model,
+                                     exchange.estimated_prompt_tokens, exchange.response_data)
+        if isinstance(exchange.context_files, DeltaContext):
+            exchange.context_files.commit()
+        self.last_exchange = exchange
+        self.print_results(exchange)
 
-    def print_results(self, model_name):
+        return exchange.response_data
+
+    def print_token(self, exchange, text):
+        if exchange.first_token_time is None:
+            exchange.first_token_time = time.monotonic()
+            print(f"{self.client.get_name().capitalize()} Assistant: ", end="", flush=True)
+        print(text, end="", flush=True)
+
+    @staticmethod
+    def measure_timing(exchange, end_time):
+        """Time to first token and decoding speed; without streaming the first token is the whole reply."""
+        first_token_time = exchange.first_token_time or end_time
+        completion_tokens = exchange.response_data["usage"].get("completion_tokens")
+        if completion_tokens is None:
+            completion_tokens = estimate_tokens(exchange.assistant_reply or "")
+        generation_seconds = end_time - first_token_time
+        return {
+            "time_to_first_token": round(first_token_time - exchange.start_time, 3),
+            "total_seconds": round(end_time - exchange.start_time, 3),
+            "tokens_per_second": round(completion_tokens / generation_seconds, 1) if generation_seconds > 0 else None
+        }
+
+    def print_results(self, exchange):
         client_name = self.client.get_name()
-        print(f"{client_name.capitalize()} Assistant:", self.get_assistant_reply())
+        if exchange.first_token_time is None:
+            print(f"{client_name.capitalize()} Assistant:", exchange.assistant_reply)
 
-        token_usage = self.get_response_data()["usage"]
-        print(f"📊 Token Usage - Prompt: {token_usage['prompt_tokens']}, "
+        token_usage = exchange.response_data["usage"]
+        cached_tokens = token_usage.get("cached_tokens")
+        estimated_tokens = exchange.estimated_prompt_tokens
+        print(f"📊 Token Usage - Prompt: {token_usage['prompt_tokens']}"
+              f"{f' (cached: {cached_tokens})' if cached_tokens is not None else ''}"
+              f"{f' (estimated: {estimated_tokens})' if estimated_tokens is not None else ''}, "
               f"Completion: {token_usage['completion_tokens']}, "
               f"Total: {token_usage['total_tokens']}")
 
+        timing = exchange.response_data["timing"]
+        tokens_per_second = timing["tokens_per_second"]
+        print(f"⏱️ Time to first token: {timing['time_to_first_token']:.2f}s, "
+              f"Total: {timing['total_seconds']:.2f}s, "
+              f"Speed: {f'{tokens_per_second} tokens/s' if tokens_per_second is not None else 'n/a'}")
+
+        if self.response_cache is not None and self.response_cache.stats() is not None:
+            stats = self.response_cache.stats()
+            print(f"🗃️ Response cache - Hits: {stats['hits']}, Misses: {stats['misses']}, "
+                  f"Evictions: {stats['evictions']}, Entries: {stats['entries']}")
+
+        resilience = exchange.response_data.get("resilience", {})
+        if resilience.get("attempts", 1) > 1 or resilience.get("hedged"):
+            stats = self.client.get_resilience_stats().get(client_name, {})
+            print(f"🛡️ Attempts: {resilience['attempts']}, Hedged: {resilience['hedged']} - "
+                  f"{client_name} totals: {stats.get('retries')} retries, {stats.get('retries_denied')} denied, "
+                  f"{stats.get('hedges')} hedges ({stats.get('hedge_wins')} won)")
+
+    # The getters describe the most recently finished request
     def get_request_data(self):
-        return self.request_data
+        return self.last_exchange.request_data if self.last_exchange else None
 
     def get_response_data(self):
-        return self.response_data
+        return self.last_exchange.response_data if self.last_exchange else None
 
     def get_assistant_reply(self):
-        return self.assistant_reply
\ No newline at end of file
+        return self.last_exchange.assistant_reply if self.last_exchange else None
\ No newline at end of file
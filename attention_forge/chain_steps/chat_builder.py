@@ -1,15 +1,32 @@
+import sys
 import os
 import importlib
 from attention_forge.clients.base_client import BaseClient
+from attention_forge.clients.router import RouterClient, RouteStats, DEFAULT_ROUTER_SAMPLE_TTL_SECONDS
 from attention_forge.chain_steps.chat import Chat
 from attention_forge.chain_steps.chat_logger import ChatLogger
+from attention_forge.http_session import create_http_session
+from attention_forge.resilience import LatencyHistory
+from attention_forge.response_cache import ResponseCache
+from attention_forge.usage_ledger import UsageLedger, DEFAULT_USAGE_LEDGER_MAX_BYTES
 
 class ChatBuilder:
-    def __init__(self, api_key_loader, role_handler, project_config):
+    def __init__(self, api_key_loader, role_handler, project_config, response_cache_mode="use"):
         self.api_key_loader = api_key_loader  # Use ApiKeyLoader
         self.role_handler = role_handler
         self.project_config = project_config
         self.chat_logger = ChatLogger(self.project_config.get("log_file", "chat_log.txt"))
+        # One keep-alive connection pool shared by every chat step built here
+        self.http_session = create_http_session(self.project_config)
+        self.route_stats = None
+        self.response_cache = None
+        if self.project_config.get("response_cache", True):
+            self.response_cache = ResponseCache(self.project_config, response_cache_mode)
+        self.usage_ledger = UsageLedger(
+            max_bytes=self.project_config.get("usage_ledger_max_bytes", DEFAULT_USAGE_LEDGER_MAX_BYTES)
+        ) if self.project_config.get("usage_ledger", True) else None
+        if self.project_config.get("hedge_requests", False) and BaseClient.latency_history is None:
+            BaseClient.latency_history = LatencyHistory()
 
         # Discover and load client classes
         self.client_map = self.load_clients()
@@ -19,7 +36,7 @@ class ChatBuilder:
         client_dir = os.path.dirname(os.path.dirname(__file__)) + "/clients"
 
         for file in os.listdir(client_dir):
-            if file.endswith(".py") and file != "__init__.py":
+            if file.endswith(".py") and file != "__init__.py" and not file.endswith("_test.py"):
                 module_name = f"attention_forge.clients.{file[:-3]}"
                 module = importlib.import_module(module_name)
 
@@ -42,25 +59,56 @@ class ChatBuilder:
         else:
             client_name = client_value
 
-        model_value = step_config.get("model", self.project_config.get("model", ""))
-        model = self.project_config.get("base_model", model_value) if model_value == "base_model" else model_value
+        if client_name == "auto":
+            client = self.build_router(step_config)
+            model = client.model
+        else:
+            model_value = step_config.get("model", self.project_config.get("model", ""))
+            model = self.project_config.get("base_model", model_value) if model_value == "base_model" else model_value
+            client = self.build_client(client_name, model)
+
+        return Chat(
+            self.project_config,
+            role_name,
+            self.role_handler,
+            client,
+            model,
+            self.chat_logger,
+            stream=step_config.get("stream", self.project_config.get("stream", True)),
+            response_cache=self.response_cache if step_config.get("cache", True) else None,
+            max_prompt_tokens=step_config.get("max_prompt_tokens", self.project_config.get("max_prompt_tokens")),
+            usage_ledger=self.usage_ledger,
+            step_name=step_config.get("name", step_config.get("output_data_key"))
+        )
 
+    def build_client(self, client_name, model):
         # Use ApiKeyLoader to get the API key for the client
         api_key = self.api_key_loader.get_api_key(client_name)
 
         # Select the appropriate client class
         client_class = self.client_map.get(client_name)
-        if not client_class:
+        if not client_class or client_class is RouterClient:
             print(f"Error: Client '{client_name}' is not recognized.")
             sys.exit(1)
 
-        client = client_class(api_key, model, self.project_config)  # Pass the API key here
+        return client_class(api_key, model, self.project_config, self.http_session)  # Pass the API key here
 
-        return Chat(
-            self.project_config,
-            role_name,
-            self.role_handler,
-            client,
-            model,
-            self.chat_logger
-        )
\ No newline at end of file
+    def build_router(self, step_config):
+        """Build a RouterClient over the step's `candidates`, or the project's `router_candidates`."""
+        candidates = step_config.get("candidates", self.project_config.get("router_candidates", []))
+        if not candidates:
+            print("Error: 'client: auto' needs a 'router_candidates' list of client/model pairs.")
+            sys.exit(1)
+        if self.route_stats is None:
+            self.route_stats = RouteStats(
+                window=self.project_config.get("router_window", 20),
+                ttl_seconds=self.project_config.get("router_sample_ttl_seconds", DEFAULT_ROUTER_SAMPLE_TTL_SECONDS)
+            )
+        clients = [self.build_client(candidate["client"], candidate.get("model", "")) for candidate in candidates]
+        return RouterClient(clients, self.project_config, self.route_stats)
+
+    def close(self):
+        if self.response_cache is not None:
+            self.response_cache.save()
+        BaseClient.save_latency_history()
+        self.http_session.close()
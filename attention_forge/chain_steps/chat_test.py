@@ -0,0 +1,189 @@
+import os
+import asyncio
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from attention_forge.chain_steps.chat import Chat, PromptTooLargeError
+from attention_forge.clients.base_client import BaseClient
+from attention_forge.context_state import DeltaContext
+from attention_forge.response_cache import ResponseCache
+from attention_forge.usage_ledger import UsageLedger
+
+class FakeClient(BaseClient):
+    @staticmethod
+    def get_name():
+        return "fake"
+
+    def complete_chat(self, role_config, user_message):
+        usage = {"prompt_tokens": 3, "completion_tokens": 4, "total_tokens": 7}
+        return {"messages": []}, {"response": "Hello there", "usage": usage}, "Hello there"
+
+class SlowAsyncClient(FakeClient):
+    in_flight = 0
+    max_in_flight = 0
+
+    async def acomplete_chat(self, role_config, user_message):
+        SlowAsyncClient.in_flight += 1
+        SlowAsyncClient.max_in_flight = max(SlowAsyncClient.max_in_flight, SlowAsyncClient.in_flight)
+        await asyncio.sleep(0.01)
+        SlowAsyncClient.in_flight -= 1
+        return self.complete_chat(role_config, user_message)
+
+class TestChat(unittest.TestCase):
+    def setUp(self):
+        self.role_handler = MagicMock()
+        self.role_handler.initialize_role.return_value = {"developer_message": ""}
+        self.client = FakeClient(None, "fake-model", {})
+
+    def build_chat(self, stream):
+        return Chat({}, "developer", self.role_handler, self.client, "fake-model", MagicMock(), stream=stream)
+
+    @patch('builtins.print')
+    @patch('attention_forge.chain_steps.chat.time')
+    def test_streaming_records_time_to_first_token(self, mock_time, mock_print):
+        mock_time.monotonic.side_effect = [10.0, 10.5, 12.5]
+        response_data = self.build_chat(stream=True).run("hi", {})
+
+        self.assertEqual(response_data["timing"], {
+            "time_to_first_token": 0.5, "total_seconds": 2.5, "tokens_per_second": 2.0
+        })
+        mock_print.assert_any_call("Hello there", end="", flush=True)
+
+    @patch('builtins.print')
+    def test_without_streaming_prints_the_reply_at_the_end(self, mock_print):
+        response_data = self.build_chat(stream=False).run("hi", {})
+
+        self.assertIsNone(response_data["timing"]["tokens_per_second"])
+        mock_print.assert_any_call("Fake Assistant:", "Hello there")
+
+    @patch('builtins.print')
+    def test_refuses_prompts_above_max_prompt_tokens(self, mock_print):
+        chat = Chat({}, "developer", self.role_handler, self.client, "fake-model", MagicMock(),
+                    stream=False, max_prompt_tokens=20)
+        self.client.complete_chat = MagicMock()
+
+        with self.assertRaises(PromptTooLargeError):
+            chat.run("word " * 50, {})
+        self.client.complete_chat.assert_not_called()
+
+    @patch('builtins.print')
+    def test_usage_is_recorded_in_the_ledger(self, mock_print):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            usage_ledger = UsageLedger(os.path.join(temp_dir, "usage_ledger.jsonl"))
+            chat = Chat({}, "developer", self.role_handler, self.client, "fake-model", MagicMock(),
+                        stream=False, usage_ledger=usage_ledger, step_name="answer")
+            chat.run("hi", {})
+            chat.run("hi again", {})
+
+            entries = usage_ledger.load()
+            self.assertEqual([entry["step"] for entry in entries], ["answer", "answer"])
+            self.assertEqual(entries[0]["completion_tokens"], 4)
+            self.assertGreater(entries[0]["estimated_prompt_tokens"], 0)
+            self.assertEqual(UsageLedger.summarize(entries)["prompt_tokens"], 6)
+            self.assertEqual(usage_ledger.get_recorded(entries[0]["run_id"]), entries)
+
+    @patch('builtins.print')
+    def test_usage_ledger_is_rotated_past_max_bytes(self, mock_print):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "usage_ledger.jsonl")
+            usage_ledger = UsageLedger(path, max_bytes=100)
+            for _ in range(3):
+                usage_ledger.record("run", "step", "fake", "fake-model", 3, {"usage": {}})
+
+            self.assertEqual(len(usage_ledger.load()), 1)
+            self.assertEqual(len(UsageLedger(f"{path}.1").load()), 1)
+            self.assertEqual(len(usage_ledger.get_recorded("run")), 3)
+
+    @patch('builtins.print')
+    def test_routed_replies_are_logged_with_the_serving_model(self, mock_print):
+        usage = {"prompt_tokens": 3, "completion_tokens": 4, "total_tokens": 7}
+        route = {"selected": "openai/gpt-4o", "attempted": ["openai/gpt-4o"], "client": "openai", "model": "gpt-4o"}
+        self.client.complete_chat = MagicMock(return_value=({}, {"response": "hi", "usage": usage, "route": route}, "hi"))
+        usage_ledger = MagicMock()
+        chat_logger = MagicMock()
+        chat = Chat({}, "developer", self.role_handler, self.client, "auto", chat_logger,
+                    stream=False, usage_ledger=usage_ledger)
+        chat.run("hi", {})
+
+        self.assertEqual(chat_logger.log_chat.call_args[0][2:], ("openai", "gpt-4o"))
+        self.assertEqual(usage_ledger.record.call_args[0][2:4], ("openai", "gpt-4o"))
+
+    @patch('builtins.print')
+    def test_delta_context_state_is_saved_only_after_a_successful_request(self, mock_print):
+        context_state = MagicMock()
+        context_files = DeltaContext({"a.py": "content"}, context_state, {"a.py": "sig"})
+        chat = self.build_chat(stream=False)
+
+        self.client.complete_chat = MagicMock(side_effect=RuntimeError("provider down"))
+        with self.assertRaises(RuntimeError):
+            chat.run("hi", context_files)
+        context_state.save.assert_not_called()
+
+        del self.client.complete_chat
+        chat.run("hi", context_files)
+        context_state.save.assert_called_once_with({"a.py": "sig"})
+
+class TestChatResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.previous_cwd = os.getcwd()
+        os.chdir(self.temp_dir.name)
+        self.addCleanup(os.chdir, self.previous_cwd)
+        self.role_handler = MagicMock()
+        self.role_handler.initialize_role.return_value = {"developer_message": "You are helpful."}
+
+    def run_chat(self, response_cache, message="hi"):
+        client = FakeClient(None, "fake-model", {})
+        client.complete_chat = MagicMock(wraps=client.complete_chat)
+        chat = Chat({}, "developer", self.role_handler, client, "fake-model", MagicMock(),
+                    stream=False, response_cache=response_cache)
+        response_data = chat.run(message, {})
+        response_cache.save()  # As ChatBuilder.close does at the end of a run
+        return response_data, client.complete_chat.call_count
+
+    @patch('builtins.print')
+    def test_identical_request_is_served_from_the_cache(self, mock_print):
+        _, calls = self.run_chat(ResponseCache({}))
+        self.assertEqual(calls, 1)
+
+        response_data, calls = self.run_chat(ResponseCache({}))
+        self.assertEqual(calls, 0)
+        self.assertTrue(response_data["cached"])
+        self.assertEqual(response_data["response"], "Hello there")
+
+        _, calls = self.run_chat(ResponseCache({}), message="something else")
+        self.assertEqual(calls, 1)
+
+    @patch('builtins.print')
+    def test_refresh_and_bypass_modes(self, mock_print):
+        self.run_chat(ResponseCache({}))
+        self.assertEqual(self.run_chat(ResponseCache({}, mode="refresh"))[1], 1)
+        self.assertEqual(self.run_chat(ResponseCache({}, mode="bypass"))[1], 1)
+        self.assertEqual(self.run_chat(ResponseCache({}))[1], 0)
+
+    @patch('builtins.print')
+    def test_replies_are_saved_at_intervals_not_per_reply(self, mock_print):
+        response_cache = ResponseCache({"response_cache_save_seconds": 3600})
+        with patch.object(response_cache.cache, "save") as save:
+            response_cache.set("key", [{}, {}, "reply"])
+            save.assert_not_called()
+            response_cache.last_save -= 3600
+            response_cache.set("other key", [{}, {}, "reply"])
+            save.assert_called_once()
+
+class TestChatAsync(unittest.IsolatedAsyncioTestCase):
+    @patch('builtins.print')
+    async def test_several_chats_in_flight_on_one_thread(self, mock_print):
+        role_handler = MagicMock()
+        role_handler.initialize_role.return_value = {"developer_message": ""}
+        chats = [Chat({}, "developer", role_handler, SlowAsyncClient(None, "fake-model", {}), "fake-model", MagicMock())
+                 for _ in range(3)]
+
+        results = await asyncio.gather(*[chat.arun("hi", {}) for chat in chats])
+
+        self.assertEqual([result["response"] for result in results], ["Hello there"] * 3)
+        self.assertEqual(SlowAsyncClient.max_in_flight, 3)
+
+if __name__ == "__main__":
+    unittest.main()
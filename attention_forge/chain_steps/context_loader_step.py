@@ -1,11 +1,31 @@
 import os
+import json
+import mmap
 import yaml
 import hashlib
+import subprocess
+from collections import deque
 from pathlib import Path
-import pathspec
+from concurrent.futures import ThreadPoolExecutor
 from attention_forge.chain_steps.step import Step
+from attention_forge.disk_cache import DiskCache
+from attention_forge.directory_index import DirectoryIndex
+from attention_forge.ignore_matcher import IgnoreMatcher
+from attention_forge.context_packer import ContextPacker
+from attention_forge.token_estimator import estimate_tokens
+from attention_forge.context_state import ContextState, DeltaContext
+from attention_forge.git_index import GitIndexReader, GitIndexError
+from attention_forge.context_snapshot import read_fresh_snapshot
+from attention_forge.terminal import prompt_user, buffered_output
+from attention_forge.tracing import span
+
+class SkippedFile(Exception):
+    """Raised when a file is deliberately left out of the context."""
+
 
 class FileSystemHelper:
+    SNIFF_BYTES = 8192
+
     @staticmethod
     def is_dir(path):
         return os.path.isdir(path)
@@ -19,10 +39,52 @@ class FileSystemHelper:
         return os.walk(path)
 
     @staticmethod
-    def read_file(path, encoding='utf-8'):
-        with open(path, 'r', encoding=encoding) as f:
-            return f.read()
+    def read_file(path, encoding='utf-8', max_bytes=None, skip_binary=False):
+        """
+        Read a text file. With skip_binary, only the first block is sniffed and
+        SkippedFile is raised for binary content. Files larger than max_bytes are
+        memory-mapped and only their head and tail are decoded.
+        """
+        if max_bytes is None and not skip_binary:
+            with open(path, 'r', encoding=encoding) as f:
+                return f.read()
+
+        with open(path, 'rb') as f:
+            if skip_binary and FileSystemHelper.looks_binary(f.read(FileSystemHelper.SNIFF_BYTES)):
+                raise SkippedFile("binary content")
+
+            size = os.fstat(f.fileno()).st_size
+            if max_bytes is None or size <= max_bytes:
+                with open(path, 'r', encoding=encoding) as text_file:
+                    return text_file.read()
+
+            head_bytes = max_bytes * 3 // 4
+            tail_bytes = max_bytes - head_bytes
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                head = mapped[:head_bytes].decode(encoding, errors='ignore')
+                tail = mapped[size - tail_bytes:].decode(encoding, errors='ignore')
+
+        return f"{head}\n... [{size - max_bytes} bytes truncated] ...\n{tail}"
+
+    @staticmethod
+    def looks_binary(block):
+        if b"\0" in block:
+            return True
+        try:
+            block.decode('utf-8')
+        except UnicodeDecodeError as e:
+            # A multi-byte character may simply be cut at the end of the block
+            return e.start < len(block) - 3
+        return False
+
+    @staticmethod
+    def get_size(path):
+        return os.path.getsize(path)
     
+    @staticmethod
+    def get_mtime(path):
+        return os.path.getmtime(path)
+
     @staticmethod
     def calculate_signature(path):
         file_stats = os.stat(path)
@@ -31,17 +93,40 @@ class FileSystemHelper:
 
 
 class ContextLoader(Step):
+    memoizable = False
+    checkpointable = False
     CONTEXT_CONFIG_FILE = "attention_forge_context.yaml"
+    CONTEXT_CACHE_FILE = ".attention_forge/context_cache.json"
+    DEFAULT_CONTEXT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+    MANIFEST_KEY = "unchanged_files_manifest"
+    DEFAULT_MAX_FILE_BYTES = 1024 * 1024
+    PROMPT_LAYOUT_STATE_FILE = ".attention_forge/prompt_layout_state.json"
 
-    def __init__(self, api_key_loader, fs_helper=None):
+    def __init__(self, api_key_loader, fs_helper=None, context_cache=None, interactive=True):
         self.api_key_loader = api_key_loader
+        self.fs_helper = fs_helper or FileSystemHelper()
+        self.context_cache = context_cache
+        self.interactive = interactive
+        self.config = {}
+        self.context_fingerprint = None
+        self.reset()
+
+    def reset(self):
+        """Forget everything loaded so far, e.g. before a full reload."""
         self.loaded_files = {}
         self.file_signatures = {}
-        self.fs_helper = fs_helper or FileSystemHelper()
-        self.visited_dirs = set()  # For tracking visited directories during tree generation
+        self.directory_index = DirectoryIndex()  # Shared by include_paths and tree_paths
+        self.tree_entries = set()
+        self.loaded_bytes = 0
+        self.entry_bytes = {}  # Bytes each loaded file counts toward max_total_bytes
+        self.duplicate_targets = {}  # Deduplicated path -> path of the identical entry sent in full
+        self.git_root = None
+        self.git_tree = None  # Directory tree from the git index when file_source is git_index
 
     def run(self, *args, **kwargs):
-        return self.load_context()
+        # Usually runs while the user types their message: print the report once it is complete
+        with buffered_output():
+            return self.load_context()
 
     def load_context_config(self):
         try:
@@ -65,68 +150,120 @@ class ContextLoader(Step):
         return {str(Path(path).resolve()) for path in paths}
 
     def compile_ignore_patterns(self, ignore_patterns):
-        return pathspec.PathSpec.from_lines('gitwildmatch', ignore_patterns)
+        return IgnoreMatcher(ignore_patterns)
 
     def is_path_ignored(self, path, ignore_specs):
         rel_path = os.path.relpath(path)
         return ignore_specs.match_file(rel_path)
 
+    def index_directory(self, directory, ignore_specs):
+        """
+        Walk directory once and record every non-ignored subdirectory and file in
+        the shared directory index. Subtrees that were already walked (for example
+        an include path below a tree path) are reused instead of walked again.
+        """
+        if self.directory_index.covers(directory):
+            return
+        self.walk_into_index(directory, ignore_specs)
+
+    def walk_into_index(self, directory, ignore_specs):
+        for dirpath, dirnames, filenames in self.get_directory_walker(directory)(directory):
+            if dirpath != directory and dirpath in self.directory_index.roots:
+                dirnames[:] = []  # Subtree already indexed by an earlier walk
+                continue
+
+            rel_dirpath = os.path.relpath(dirpath)
+            if ignore_specs.match_directory(rel_dirpath):
+                print(f"⏩ Skipping traversal of ignored directory: {dirpath}")
+                dirnames[:] = []  # Clear subdirectories to skip traversal
+                continue
+
+            if ignore_specs.is_clean(rel_dirpath):
+                kept_files = filenames  # No ignore pattern can apply in this subtree
+            else:
+                kept_files = [filename for filename in filenames
+                              if not ignore_specs.match_in_directory(rel_dirpath, filename)]
+            self.directory_index.add(dirpath, dirnames, kept_files)
+
+        self.directory_index.add_root(directory)
+
+    def get_directory_walker(self, directory):
+        if self.git_tree is not None and (
+                directory == self.git_root or directory.startswith(self.git_root + os.sep)):
+            return self.walk_git_tree
+        return self.fs_helper.list_dir
+
+    def walk_git_tree(self, directory):
+        """Walk the directory tree built from the git index, top-down like os.walk."""
+        stack = [directory]
+        while stack:
+            dirpath = stack.pop()
+            subdirs, files = self.git_tree.get(dirpath, ([], []))
+            dirnames = list(subdirs)
+            yield dirpath, dirnames, list(files)
+            stack.extend(os.path.join(dirpath, dirname) for dirname in reversed(dirnames))
+
+    def setup_file_source(self):
+        """
+        With file_source: git_index, enumerate files from the git index instead of
+        walking the file system. Falls back to the walker outside git checkouts.
+        """
+        if self.config.get("file_source", "walk") != "git_index":
+            return False
+
+        git_index = GitIndexReader.discover(os.getcwd())
+        if git_index is None:
+            print("ℹ️ Not inside a git repository. Falling back to walking the file system.")
+            return False
+
+        try:
+            self.git_tree = git_index.build_tree(self.config.get("include_untracked", False))
+        except (GitIndexError, OSError, subprocess.CalledProcessError) as e:
+            print(f"⚠️ Could not read the git index ({e}). Falling back to walking the file system.")
+            return False
+
+        self.git_root = git_index.worktree_root
+        print(f"🌿 Enumerating files from the git index of {self.git_root}")
+        return True
+
     def get_directories_tree(self, directory, ignore_specs):
-        if directory in self.visited_dirs:
-            print(f"⏩ Already visited: {directory}, skipping to prevent recursion loop.")
-            return ""
+        self.index_directory(directory, ignore_specs)
 
         tree_repr = []
         base_depth = len(Path(directory).parts)
 
-        for dirpath, dirnames, filenames in self.fs_helper.list_dir(directory):
-            self.visited_dirs.add(dirpath)
-            if self.is_path_ignored(dirpath, ignore_specs):
-                print(f"⏩ Skipping tree generation of ignored directory: {dirpath}")
-                dirnames[:] = []  # Clear subdirectories to skip traversal
-                continue
-            
+        for dirpath, _, filenames in self.directory_index.walk(directory):
             # Calculate depth for indentation
             current_depth = len(Path(dirpath).parts) - base_depth
 
             indent = '    ' * current_depth
             tree_repr.append(f'{indent}{os.path.basename(dirpath)}/')
-            
+
             # Increase the level of indentation for files
             file_indent = '    ' * (current_depth + 1)
             for filename in filenames:
-                if not self.is_path_ignored(os.path.join(dirpath, filename), ignore_specs):
-                    tree_repr.append(f'{file_indent}{filename}')
+                tree_repr.append(f'{file_indent}{filename}')
 
         return "\n".join(tree_repr)
 
     def get_files_from_directory(self, directory, ignore_specs):
-        all_files = []
-
-        for root, dirs, files in self.fs_helper.list_dir(directory):
-            if self.is_path_ignored(root, ignore_specs):
-                print(f"⏩ Skipping traversal of ignored directory: {root}")
-                dirs[:] = []  # Clear dirs to skip deeper traversal
-                continue
-
-            for file in files:
-                file_path = os.path.join(root, file)
-                if not self.is_path_ignored(file_path, ignore_specs):
-                    # print(f"✅ Loading file: {file_path}")
-                    all_files.append(file_path)
-                else:
-                    print(f"⏩ Ignoring file: {file_path}")
-        return all_files
+        self.index_directory(directory, ignore_specs)
+        return self.directory_index.list_files(directory)
 
     def load_config_and_ignore_paths(self):
         config = self.load_context_config()
+        self.config = config
 
         # Read the flag from the config, default to True if not present
         use_gitignore_for_ignore_paths = config.get("use_gitignore_for_ignore_paths", True)
 
         include_paths = config.get("include_paths", [])
         tree_paths = config.get("tree_paths", [])
-        ignore_patterns = config.get("ignore_paths", [])
+        ignore_patterns = list(config.get("ignore_paths", []))
+
+        # The git index already honors every .gitignore and .git/info/exclude
+        if self.setup_file_source():
+            use_gitignore_for_ignore_paths = False
 
         if use_gitignore_for_ignore_paths:
             gitignore_patterns = self.load_gitignore_patterns()
@@ -139,6 +276,11 @@ class ContextLoader(Step):
         # Compile ignore patterns using pathspec
         ignore_specs = self.compile_ignore_patterns(ignore_patterns + api_key_files)
 
+        # Identifies the inputs of a context load, e.g. to validate a watcher snapshot
+        self.context_fingerprint = hashlib.md5(json.dumps(
+            [os.getcwd(), config, ignore_patterns + api_key_files], sort_keys=True, default=str
+        ).encode()).hexdigest()
+
         return include_paths, tree_paths, ignore_specs
 
     def load_gitignore_patterns(self):
@@ -156,11 +298,35 @@ class ContextLoader(Step):
             return []
 
     def load_context(self):
-        include_paths, tree_paths, ignore_specs = self.load_config_and_ignore_paths()
-        
+        with span("load context config", "io"):
+            include_paths, tree_paths, ignore_specs = self.load_config_and_ignore_paths()
+
         if not include_paths and not tree_paths:
             self.handle_no_context_case()
 
+        with span("load context files", "io"):
+            loaded_snapshot = self.load_watcher_snapshot()
+            loading_error = not loaded_snapshot and self.load_paths(include_paths, tree_paths, ignore_specs)
+        if loading_error:
+            self.handle_loading_errors()
+
+        with span("finalize context", "context"):
+            return self.finalize_context(include_paths, tree_paths)
+
+    def load_watcher_snapshot(self):
+        """Use the snapshot kept by a running context watcher if it is up-to-date."""
+        snapshot = read_fresh_snapshot(self.context_fingerprint)
+        if snapshot is None:
+            return False
+        self.loaded_files = snapshot["loaded_files"]
+        self.file_signatures = snapshot["file_signatures"]
+        self.tree_entries = set(snapshot["tree_entries"])
+        print(f"👀 Using the context snapshot from the watcher (generation {snapshot['generation']}).")
+        return True
+
+    def load_paths(self, include_paths, tree_paths, ignore_specs):
+        """Load include_paths and tree_paths. Returns True if some files could not be loaded."""
+        self.setup_context_cache()
         loading_error = False
 
         for path in include_paths:
@@ -171,14 +337,183 @@ class ContextLoader(Step):
             if not self.load_tree_structure(dir_path, ignore_specs):
                 loading_error = True
 
-        if loading_error:
-            self.handle_loading_errors()
+        self.save_context_cache()
+        return loading_error
 
+    def finalize_context(self, include_paths, tree_paths):
+        """Apply the delta, deduplication, token budget and prompt layout options to the loaded files."""
+        context_state = None
+        if self.config.get("delta_context", False):
+            context_state = ContextState()
+            self.loaded_files = self.apply_delta_context(context_state)
+
+        if self.config.get("deduplicate_files", True):
+            self.loaded_files = self.deduplicate_loaded_files()
+
+        max_context_tokens = self.config.get("max_context_tokens")
+        if max_context_tokens:
+            self.loaded_files = self.pack_loaded_files(max_context_tokens, include_paths, tree_paths)
+
+        if self.config.get("prompt_layout", "default") == "cache_friendly":
+            self.loaded_files = self.apply_cache_friendly_layout()
+
+        if context_state is not None:
+            # The Chat step saves the signatures once its request succeeded
+            return DeltaContext(self.loaded_files, context_state, dict(self.file_signatures))
         return self.loaded_files
 
+    def apply_cache_friendly_layout(self):
+        """
+        Order entries for provider-side prefix caching: entries whose content is
+        unchanged since the previous run come first, then the changed ones, each
+        sorted by path, so the prompt prefix stays byte-identical between runs.
+        """
+        layout_state = ContextState(self.PROMPT_LAYOUT_STATE_FILE)
+        content_hashes = {
+            path: hashlib.sha1(content.encode("utf-8", errors="surrogateescape")).hexdigest()
+            for path, content in self.loaded_files.items()
+        }
+        stable_paths = sorted(path for path, content_hash in content_hashes.items()
+                              if not layout_state.is_changed(path, content_hash))
+        volatile_paths = sorted(set(content_hashes) - set(stable_paths))
+        layout_state.save(content_hashes)
+
+        print(f"🧱 Cache-friendly layout: {len(stable_paths)} unchanged entries first, "
+              f"{len(volatile_paths)} changed entries last.")
+        return {path: self.loaded_files[path] for path in stable_paths + volatile_paths}
+
+    def apply_delta_context(self, context_state):
+        """
+        Send in full only the files whose signature changed since the previous
+        successful request (plus pinned delta_always_full files and tree
+        structures); list the rest in a compact manifest.
+        """
+        always_full = self.compile_ignore_patterns(self.config.get("delta_always_full", []))
+
+        delta_files = {}
+        unchanged_files = []
+        for path, content in self.loaded_files.items():
+            signature = self.file_signatures.get(path)
+            if (path in self.tree_entries or signature is None
+                    or context_state.is_changed(path, signature)
+                    or self.is_path_ignored(path, always_full)):
+                delta_files[path] = content
+            else:
+                unchanged_files.append(path)
+
+        print(f"🔺 Delta context: {len(delta_files) - len(self.tree_entries)} file(s) sent in full, "
+              f"{len(unchanged_files)} unchanged file(s) listed in the manifest.")
+
+        if unchanged_files:
+            manifest = "\n".join(f"- `{path}`" for path in unchanged_files)
+            delta_files[self.MANIFEST_KEY] = (
+                "### Unchanged files\n"
+                "These files are unchanged since the previous request and their content is not repeated:\n"
+                f"{manifest}"
+            )
+        return delta_files
+
+    @staticmethod
+    def content_body(formatted_content):
+        """The file body of a formatted entry, without its path header and language tag."""
+        parts = formatted_content.split("\n", 2)
+        return parts[2] if len(parts) == 3 else formatted_content
+
+    def deduplicate_loaded_files(self):
+        """Keep the first copy of each distinct file body; later copies reference its path."""
+        first_paths = {}
+        deduplicated = {}
+        self.duplicate_targets = {}
+        duplicates = 0
+        saved_bytes = 0
+        saved_tokens = 0
+        for path, content in self.loaded_files.items():
+            if path == self.MANIFEST_KEY or path in self.tree_entries:
+                deduplicated[path] = content
+                continue
+            body = self.content_body(content)
+            content_hash = hashlib.sha1(body.encode("utf-8", errors="surrogateescape")).hexdigest()
+            if content_hash not in first_paths:
+                first_paths[content_hash] = path
+                deduplicated[path] = content
+                continue
+            reference = f"### `{path}`\nIdentical to `{first_paths[content_hash]}`."
+            self.duplicate_targets[path] = first_paths[content_hash]
+            deduplicated[path] = reference
+            duplicates += 1
+            saved_bytes += len(content) - len(reference)
+            saved_tokens += estimate_tokens(content) - estimate_tokens(reference)
+
+        if duplicates:
+            print(f"🧬 Deduplicated {duplicates} identical file(s): saved {saved_bytes} bytes (~{saved_tokens} tokens).")
+        return deduplicated
+
+    def get_packing_priority(self, path, include_roots, tree_roots):
+        """
+        Files from earlier include_paths entries come first; within an entry,
+        smaller files first, then the most recently modified. Trees come last.
+        """
+        if path == self.MANIFEST_KEY:
+            return (-1, 0, 0)
+        if path in self.tree_entries:
+            rank = len(include_roots) + (tree_roots.index(path) if path in tree_roots else len(tree_roots))
+            return (rank, 0, 0)
+
+        rank = len(include_roots)
+        for index, root in enumerate(include_roots):
+            if path == root or path.startswith(root.rstrip(os.sep) + os.sep):
+                rank = index
+                break
+        try:
+            mtime = self.fs_helper.get_mtime(path)
+        except OSError:
+            mtime = 0
+        return (rank, len(self.loaded_files[path]), -mtime)
+
+    def pack_loaded_files(self, max_context_tokens, include_paths, tree_paths):
+        include_roots = [str(Path(path).resolve()) for path in include_paths]
+        tree_roots = [str(Path(path).resolve()) for path in tree_paths]
+        entries = [(path, content, self.get_packing_priority(path, include_roots, tree_roots))
+                   for path, content in self.loaded_files.items()]
+
+        packed, dropped, truncated, used_tokens = ContextPacker(max_context_tokens).pack(entries)
+
+        print(f"📦 Context budget: ~{used_tokens}/{max_context_tokens} tokens used, "
+              f"{len(truncated)} file(s) truncated, {len(dropped)} dropped.")
+        for path, tokens, kept_tokens in truncated:
+            print(f"✂️ Truncated: {path} (~{tokens} tokens, kept ~{kept_tokens})")
+        for path, tokens in dropped:
+            print(f"🗑️ Dropped: {path} (~{tokens} tokens)")
+
+        # Small "Identical to" references are packed before the large entry they
+        # point to; one whose target was cut would refer to content never sent
+        cut_paths = {path for path, _ in dropped} | {path for path, _, _ in truncated}
+        for path, target in self.duplicate_targets.items():
+            if target in cut_paths and path in packed:
+                del packed[path]
+                print(f"🗑️ Dropped: {path} (identical to {target}, which did not fit)")
+        return packed
+
+    def setup_context_cache(self):
+        """Open the persistent context cache unless disabled in the context config."""
+        if self.context_cache is not None or not self.config.get("use_context_cache", True):
+            return
+        max_bytes = self.config.get("context_cache_max_bytes", self.DEFAULT_CONTEXT_CACHE_MAX_BYTES)
+        self.context_cache = DiskCache(self.CONTEXT_CACHE_FILE, max_bytes=max_bytes)
+
+    def save_context_cache(self):
+        if self.context_cache is None:
+            return
+        self.context_cache.save()
+        stats = self.context_cache.stats()
+        print(f"🗃️ Context cache - Hits: {stats['hits']}, Misses: {stats['misses']}, "
+              f"Evictions: {stats['evictions']}, Entries: {stats['entries']}")
+
     def handle_no_context_case(self):
         print("⚠️ Warning: No context was loaded. The context is empty.")
-        proceed_with_empty = input("Do you want to proceed with an empty context? (yes/no): ")
+        if not self.interactive:
+            return
+        proceed_with_empty = prompt_user("Do you want to proceed with an empty context? (yes/no): ")
         if proceed_with_empty.lower() != 'yes':
             print("Operation aborted by user.")
             exit(0)
@@ -200,7 +535,42 @@ class ContextLoader(Step):
             return True
 
         files = self.get_files_from_directory(directory, ignore_specs)
-        return all(self.process_file(file, ignore_specs) for file in files)
+        load_workers = self.config.get("load_workers", 1)
+        if load_workers > 1 and len(files) > 1:
+            return self.process_files_concurrently(files, ignore_specs, load_workers)
+
+        results = [self.process_file(file, ignore_specs) for file in files]
+        return all(results)
+
+    def process_files_concurrently(self, files, ignore_specs, load_workers):
+        """
+        Read files on a thread pool, then store them in the original order so
+        loaded_files stays deterministic. Every failure is reported, not just the first.
+        """
+        pending_files = []
+        for file_path in files:
+            if self.is_path_ignored(file_path, ignore_specs):
+                print(f"⏩ Ignoring file: {file_path}")
+                continue
+            print(f"✅ Loading file: {file_path}")
+            pending_files.append(file_path)
+
+        # Only a few reads run ahead of the stored entries, so reading stops soon after
+        # max_total_bytes is used up; which files fit still does not depend on timing
+        window = load_workers * 2
+        results = []
+        with ThreadPoolExecutor(max_workers=load_workers) as executor:
+            in_flight = deque()
+            for file_path in pending_files:
+                while len(in_flight) >= window:
+                    stored_path, future = in_flight.popleft()
+                    results.append(self.store_file_entry(stored_path, future.result()))
+                if self.skip_over_budget(file_path):
+                    continue
+                in_flight.append((file_path, executor.submit(self.read_file_entry, file_path)))
+            for stored_path, future in in_flight:
+                results.append(self.store_file_entry(stored_path, future.result()))
+        return all(results)
 
     def process_file(self, file_path, ignore_specs):
         if self.is_path_ignored(file_path, ignore_specs):
@@ -208,25 +578,120 @@ class ContextLoader(Step):
             return True
 
         print(f"✅ Loading file: {file_path}")
+        if self.skip_over_budget(file_path):
+            return True
+        return self.store_file_entry(file_path, self.read_file_entry(file_path))
+
+    def read_file_entry(self, file_path):
+        """
+        Compute the signature of a file and fetch its formatted content, from the
+        context cache when possible. Only touches the (locked) cache, so it is safe
+        to call from worker threads. Returns (file_signature, formatted_content, error);
+        formatted_content is None when the file is already loaded and up-to-date.
+        """
         try:
-            file_signature = self.fs_helper.calculate_signature(file_path)
-            if file_path in self.file_signatures and self.file_signatures[file_path] == file_signature:
-                print(f"🔁 Skipping already loaded file (up-to-date): {file_path}")
-                return True
-            
-            self.load_file_content(file_path)
+            with span("read file", "io", path=file_path):
+                file_signature = self.fs_helper.calculate_signature(file_path)
+                if self.file_signatures.get(file_path) == file_signature:
+                    return file_signature, None, None
+
+                cache_key = self.get_content_cache_key(file_signature)
+                formatted_content = None
+                if self.context_cache is not None:
+                    formatted_content = self.context_cache.get(cache_key)
+                if formatted_content is None:
+                    formatted_content = self.format_file_content(file_path)
+                    if self.context_cache is not None:
+                        self.context_cache.set(cache_key, formatted_content)
+                return file_signature, formatted_content, None
+        except FileNotFoundError as e:
+            if self.git_tree is not None:
+                # Still in the git index but removed from the worktree with a plain rm
+                return None, None, SkippedFile("deleted from the worktree")
+            return None, None, e
         except Exception as e:
-            print(f"🚨 Warning: Could not read {file_path}. Error: {e}")
+            return None, None, e
+
+    def store_file_entry(self, file_path, file_entry):
+        file_signature, formatted_content, error = file_entry
+        if isinstance(error, SkippedFile):
+            print(f"⏩ Skipping file ({error}): {file_path}")
+            self.forget_file(file_path)
+            return True
+        if error is not None:
+            print(f"🚨 Warning: Could not read {file_path}. Error: {error}")
             return False
+        if formatted_content is None:
+            print(f"🔁 Skipping already loaded file (up-to-date): {file_path}")
+            return True
+        try:
+            self.reserve_context_bytes(file_path, formatted_content)
+        except SkippedFile as e:
+            print(f"⏩ Skipping file ({e}): {file_path}")
+            # A re-read file that no longer fits must not keep its stale content
+            self.forget_file(file_path)
+            return True
+
+        self.loaded_files[file_path] = formatted_content
+        self.file_signatures[file_path] = file_signature
+        return True
 
+    def reserve_context_bytes(self, file_path, formatted_content):
+        """
+        Enforce max_total_bytes with the size of the formatted entry. Called on the
+        main thread in include order, so the files that fit do not depend on which
+        worker thread finished first. A re-read file gives back its previous size.
+        """
+        size = len(formatted_content.encode("utf-8", errors="surrogateescape"))
+        loaded_bytes = self.loaded_bytes - self.entry_bytes.get(file_path, 0)
+        max_total_bytes = self.config.get("max_total_bytes")
+        if max_total_bytes and loaded_bytes + size > max_total_bytes:
+            raise SkippedFile(f"total context size limit of {max_total_bytes} bytes reached")
+        self.loaded_bytes = loaded_bytes + size
+        self.entry_bytes[file_path] = size
+
+    def skip_over_budget(self, file_path):
+        """
+        Check max_total_bytes before reading: skip the file if the budget is used
+        up or its size on disk (capped at max_file_bytes) is more than is left.
+        The formatted entry is still checked by reserve_context_bytes.
+        """
+        max_total_bytes = self.config.get("max_total_bytes")
+        if not max_total_bytes:
+            return False
+        remaining = max_total_bytes - (self.loaded_bytes - self.entry_bytes.get(file_path, 0))
+        if remaining > 0:
+            try:
+                size = self.fs_helper.get_size(file_path)
+            except OSError:
+                return False  # read_file_entry reports the error
+            max_file_bytes = self.config.get("max_file_bytes", self.DEFAULT_MAX_FILE_BYTES)
+            if min(size, max_file_bytes or size) <= remaining:
+                return False
+        print(f"⏩ Skipping file (total context size limit of {max_total_bytes} bytes reached): {file_path}")
+        self.forget_file(file_path)
         return True
 
-    def load_file_content(self, file_path):
-        file_content = self.fs_helper.read_file(file_path)
+    def forget_file(self, file_path):
+        """Drop a loaded file, e.g. one that was deleted, and give back its bytes."""
+        self.loaded_files.pop(file_path, None)
+        self.file_signatures.pop(file_path, None)
+        self.loaded_bytes -= self.entry_bytes.pop(file_path, 0)
+
+    def get_content_cache_key(self, file_signature):
+        """The formatted content also depends on the truncation and binary-file options."""
+        max_file_bytes = self.config.get("max_file_bytes", self.DEFAULT_MAX_FILE_BYTES)
+        skip_binary_files = self.config.get("skip_binary_files", True)
+        return f"{file_signature}-{max_file_bytes}-{int(bool(skip_binary_files))}"
+
+    def format_file_content(self, file_path):
+        file_content = self.fs_helper.read_file(
+            file_path,
+            max_bytes=self.config.get("max_file_bytes", self.DEFAULT_MAX_FILE_BYTES),
+            skip_binary=self.config.get("skip_binary_files", True)
+        )
         language = self.detect_language(file_path)
-        formatted_content = f"### `{file_path}`\n```{language}\n{file_content}\n```"
-        self.loaded_files[file_path] = formatted_content
-        self.file_signatures[file_path] = self.fs_helper.calculate_signature(file_path)
+        return f"### `{file_path}`\n```{language}\n{file_content}\n```"
 
     def load_tree_structure(self, dir_path, ignore_specs):
         abs_dir_path = str(Path(dir_path).resolve())
@@ -236,11 +701,15 @@ class ContextLoader(Step):
         
         print(f"📁 Generating tree for directory: {dir_path}")
         tree_structure = self.get_directories_tree(abs_dir_path, ignore_specs)
+        self.tree_entries.add(abs_dir_path)
         self.loaded_files[abs_dir_path] = f"### directory `{abs_dir_path}/` structure: \n```\n{tree_structure}\n```"
         return True
 
     def handle_loading_errors(self):
-        proceed = input("Some files could not be loaded. Do you want to proceed? (yes/no): ")
+        if not self.interactive:
+            print("⚠️ Warning: Some files could not be loaded. Proceeding without them.")
+            return
+        proceed = prompt_user("Some files could not be loaded. Do you want to proceed? (yes/no): ")
         if proceed.lower() != 'yes':
             print("Operation aborted by user.")
             exit(0)
\ No newline at end of file
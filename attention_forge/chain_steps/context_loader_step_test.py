@@ -2,7 +2,9 @@ import unittest
 from unittest.mock import MagicMock, patch
 from pathlib import Path
 import os
-from attention_forge.chain_steps.context_loader_step import ContextLoader, FileSystemHelper
+import hashlib
+import tempfile
+from attention_forge.chain_steps.context_loader_step import ContextLoader, FileSystemHelper, SkippedFile
 
 class TestContextLoader(unittest.TestCase):
     def setUp(self):
@@ -85,8 +87,8 @@ class TestContextLoader(unittest.TestCase):
         
         # Define a directory structure
         dir_structure = [
-            (directory, ("subdir",), ("file1.txt", "file2.py")),
-            (os.path.join(directory, "subdir"), (), ("file3.js",)),
+            (directory, ["subdir"], ["file1.txt", "file2.py"]),
+            (os.path.join(directory, "subdir"), [], ["file3.js"]),
         ]
 
         # Use return_value to simulate different states of the directory structure
@@ -141,7 +143,7 @@ class TestContextLoader(unittest.TestCase):
         
         # Mocking
         self.fs_helper_mock.is_file.return_value = True
-        self.fs_helper_mock.calculate_signature.side_effect = ["fake_signature_old", "fake_signature_new"]
+        self.fs_helper_mock.calculate_signature.return_value = "fake_signature"
         self.fs_helper_mock.read_file.return_value = "File content"
 
         # Ensure the file can be 'found' and 'read' by the mocked FileSystemHelper
@@ -155,11 +157,33 @@ class TestContextLoader(unittest.TestCase):
         # Method Call
         result = self.context_loader.process_file(fake_file, ignore_patterns)
 
-        # Verify that load_file_content has been called
+        # Verify that the file was read and stored
         self.assertTrue(result)
         self.assertIn(fake_file, self.context_loader.loaded_files)
         self.assertEqual(self.context_loader.loaded_files[fake_file], "### `/test_dir/file.txt`\n```plaintext\nFile content\n```")
-        self.assertEqual(self.context_loader.file_signatures[fake_file], "fake_signature_new")
+        self.assertEqual(self.context_loader.file_signatures[fake_file], "fake_signature")
+        # The signature is computed once per file, not again after reading
+        self.fs_helper_mock.calculate_signature.assert_called_once_with(fake_file)
+
+    def test_process_file_served_from_context_cache(self):
+        fake_file = "/test_dir/file.txt"
+        cached_content = "### `/test_dir/file.txt`\n```plaintext\nCached content\n```"
+
+        self.fs_helper_mock.calculate_signature.return_value = "fake_signature"
+        context_cache = MagicMock()
+        context_cache.get.return_value = cached_content
+
+        context_loader = ContextLoader(
+            api_key_loader=self.mock_api_key_loader,
+            fs_helper=self.fs_helper_mock,
+            context_cache=context_cache
+        )
+        result = context_loader.process_file(fake_file, context_loader.compile_ignore_patterns([]))
+
+        self.assertTrue(result)
+        context_cache.get.assert_called_once_with(f"fake_signature-{ContextLoader.DEFAULT_MAX_FILE_BYTES}-1")
+        self.fs_helper_mock.read_file.assert_not_called()
+        self.assertEqual(context_loader.loaded_files[fake_file], cached_content)
 
     def test_process_directory(self):
         fake_directory = "/test_dir"
@@ -174,7 +198,101 @@ class TestContextLoader(unittest.TestCase):
         self.context_loader.get_files_from_directory.assert_called_once_with(fake_directory, ignore_patterns)
         self.context_loader.process_file.assert_called_once_with("/test_dir/file1.txt", ignore_patterns)
 
-    def test_load_file_content(self):
+    def test_process_directory_concurrently_keeps_order_and_gathers_errors(self):
+        files = [f"/test_dir/file{i}.py" for i in range(6)]
+        self.fs_helper_mock.calculate_signature.side_effect = lambda path: f"sig-{path}"
+
+        def read_file(path, **kwargs):
+            if path == files[2] or path == files[4]:
+                raise UnicodeDecodeError("utf-8", b"", 0, 1, "invalid")
+            return f"content of {path}"
+        self.fs_helper_mock.read_file.side_effect = read_file
+
+        context_loader = ContextLoader(api_key_loader=self.mock_api_key_loader, fs_helper=self.fs_helper_mock)
+        context_loader.config = {"load_workers": 4}
+        context_loader.get_files_from_directory = MagicMock(return_value=files)
+
+        result = context_loader.process_directory("/test_dir", context_loader.compile_ignore_patterns([]))
+
+        self.assertFalse(result)
+        expected_files = [files[0], files[1], files[3], files[5]]
+        self.assertEqual(list(context_loader.loaded_files), expected_files)
+
+    def test_apply_delta_context(self):
+        context_loader = ContextLoader(api_key_loader=self.mock_api_key_loader, fs_helper=self.fs_helper_mock)
+        context_loader.config = {"delta_context": True, "delta_always_full": ["pinned.py"]}
+        context_loader.loaded_files = {
+            "changed.py": "changed content",
+            "same.py": "same content",
+            "pinned.py": "pinned content",
+        }
+        context_loader.file_signatures = {"changed.py": "new", "same.py": "s", "pinned.py": "p"}
+
+        with patch('attention_forge.chain_steps.context_loader_step.ContextState') as context_state_class:
+            context_state = context_state_class.return_value
+            previous = {"changed.py": "old", "same.py": "s", "pinned.py": "p"}
+            context_state.is_changed.side_effect = lambda path, signature: previous.get(path) != signature
+
+            delta_files = context_loader.finalize_context([], [])
+            # Saved only once a chat request used the delta
+            context_state.save.assert_not_called()
+            delta_files.commit()
+            context_state.save.assert_called_once_with(context_loader.file_signatures)
+
+        self.assertEqual(delta_files["changed.py"], "changed content")
+        self.assertEqual(delta_files["pinned.py"], "pinned content")
+        self.assertNotIn("same.py", delta_files)
+        self.assertIn("- `same.py`", delta_files[ContextLoader.MANIFEST_KEY])
+
+    def test_deduplicate_loaded_files(self):
+        context_loader = ContextLoader(api_key_loader=self.mock_api_key_loader, fs_helper=self.fs_helper_mock)
+        body = "```python\nVALUE = 1\n```"
+        context_loader.loaded_files = {
+            "a/config.py": f"### `a/config.py`\n{body}",
+            "b/config.py": f"### `b/config.py`\n{body}",
+            "c/other.py": "### `c/other.py`\n```python\nVALUE = 2\n```",
+        }
+
+        deduplicated = context_loader.deduplicate_loaded_files()
+
+        self.assertEqual(list(deduplicated), ["a/config.py", "b/config.py", "c/other.py"])
+        self.assertEqual(deduplicated["a/config.py"], context_loader.loaded_files["a/config.py"])
+        self.assertEqual(deduplicated["b/config.py"], "### `b/config.py`\nIdentical to `a/config.py`.")
+        self.assertEqual(deduplicated["c/other.py"], context_loader.loaded_files["c/other.py"])
+
+    @patch('builtins.print')
+    def test_duplicates_of_a_file_cut_by_the_token_budget_are_dropped(self, mock_print):
+        context_loader = ContextLoader(api_key_loader=self.mock_api_key_loader, fs_helper=self.fs_helper_mock)
+        body = "```python\n" + "VALUE = 1\n" * 400 + "```"
+        context_loader.loaded_files = {
+            "/r/src/a.py": f"### `/r/src/a.py`\n{body}",
+            "/r/vendor/a.py": f"### `/r/vendor/a.py`\n{body}",
+            "/r/src/b.py": "### `/r/src/b.py`\n```python\nB = 2\n```",
+        }
+        context_loader.fs_helper.get_mtime.return_value = 0
+        context_loader.config = {"deduplicate_files": True, "max_context_tokens": 100}
+
+        loaded_files = context_loader.finalize_context(["/r/src", "/r/vendor"], [])
+
+        self.assertEqual(list(loaded_files), ["/r/src/b.py"])
+
+    def test_apply_cache_friendly_layout(self):
+        context_loader = ContextLoader(api_key_loader=self.mock_api_key_loader, fs_helper=self.fs_helper_mock)
+        context_loader.loaded_files = {"b.py": "b", "z.py": "z changed", "a.py": "a", "new.py": "new"}
+        content_hash = lambda content: hashlib.sha1(content.encode()).hexdigest()
+        previous_hashes = {"a.py": content_hash("a"), "b.py": content_hash("b"), "z.py": content_hash("z")}
+
+        with patch('attention_forge.chain_steps.context_loader_step.ContextState') as context_state_class:
+            context_state = context_state_class.return_value
+            context_state.is_changed.side_effect = lambda path, new_hash: previous_hashes.get(path) != new_hash
+
+            ordered_files = context_loader.apply_cache_friendly_layout()
+
+        # Unchanged entries first, then changed and new ones, each sorted by path
+        self.assertEqual(list(ordered_files), ["a.py", "b.py", "new.py", "z.py"])
+        context_state_class.assert_called_once_with(ContextLoader.PROMPT_LAYOUT_STATE_FILE)
+
+    def test_read_and_store_file_entry(self):
         fake_file_path = "file.py"
         fake_content = "print('Hello, world!')"
         
@@ -184,7 +302,8 @@ class TestContextLoader(unittest.TestCase):
         # Make sure that the read_file method will correctly return the mock content
         self.context_loader.fs_helper = self.fs_helper_mock
 
-        self.context_loader.load_file_content(fake_file_path)
+        file_entry = self.context_loader.read_file_entry(fake_file_path)
+        self.assertTrue(self.context_loader.store_file_entry(fake_file_path, file_entry))
 
         expected_content = f"### `{fake_file_path}`\n```python\n{fake_content}\n```"
         self.assertEqual(self.context_loader.loaded_files[fake_file_path], expected_content)
@@ -210,6 +329,24 @@ class TestContextLoader(unittest.TestCase):
         expected_result = "test_dir/\n    file1.txt\n    file2.py\n    subdir/\n        file3.js\n"
         self.assertEqual(result.strip(), expected_result.strip())
 
+    def test_overlapping_tree_and_include_paths_share_one_walk(self):
+        directory = "test_dir"
+        dir_structure = [
+            (directory, ["subdir"], ["file1.txt"]),
+            (os.path.join(directory, "subdir"), [], ["file2.py"])
+        ]
+        self.fs_helper_mock.list_dir.return_value = dir_structure
+
+        context_loader = ContextLoader(api_key_loader=self.mock_api_key_loader, fs_helper=self.fs_helper_mock)
+        ignore_specs = context_loader.compile_ignore_patterns([])
+
+        tree = context_loader.get_directories_tree(directory, ignore_specs)
+        files = context_loader.get_files_from_directory(os.path.join(directory, "subdir"), ignore_specs)
+
+        self.assertEqual(tree, "test_dir/\n    file1.txt\n    subdir/\n        file2.py")
+        self.assertEqual(files, [os.path.join(directory, "subdir", "file2.py")])
+        self.fs_helper_mock.list_dir.assert_called_once_with(directory)
+
     def test_get_directories_tree_with_ignored_paths(self):
         directory = "test_dir"
         
@@ -232,10 +369,121 @@ class TestContextLoader(unittest.TestCase):
         result = context_loader.get_directories_tree(directory, ignore_paths)
         
         # The ignored subdirectory should not appear in the tree
-        expected_result = "test_dir/\n    file1.txt\n    file2.py\n    subdir/"
+        expected_result = "test_dir/\n    file1.txt\n    file2.py"
 
         # Assert
         self.assertEqual(result.strip(), expected_result.strip())
 
+class TestFileSystemHelper(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+
+    def write(self, name, data):
+        path = os.path.join(self.temp_dir.name, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def test_read_file_skips_binary_content(self):
+        path = self.write("blob.bin", b"\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR")
+        with self.assertRaises(SkippedFile):
+            FileSystemHelper.read_file(path, skip_binary=True)
+
+    def test_read_file_keeps_text_with_multibyte_characters(self):
+        path = self.write("text.txt", "héllo wörld".encode("utf-8"))
+        self.assertEqual(FileSystemHelper.read_file(path, skip_binary=True), "héllo wörld")
+
+    def test_read_file_truncates_large_files_to_head_and_tail(self):
+        path = self.write("large.txt", b"H" * 1000 + b"M" * 8000 + b"T" * 1000)
+        content = FileSystemHelper.read_file(path, max_bytes=2000, skip_binary=True)
+        self.assertTrue(content.startswith("H" * 1000 + "M" * 500))
+        self.assertTrue(content.endswith("T" * 500))
+        self.assertIn("[8000 bytes truncated]", content)
+
+    def test_max_total_bytes_counts_formatted_entries_in_include_order(self):
+        fs_helper = MagicMock()
+        fs_helper.calculate_signature.side_effect = lambda path: f"sig-{path}"
+
+        def read_file(path, **kwargs):
+            if path == "blob.bin":
+                raise SkippedFile("binary content")
+            return "x" * 400
+        fs_helper.read_file.side_effect = read_file
+        fs_helper.get_size.return_value = 400
+
+        context_loader = ContextLoader(api_key_loader=MagicMock(), fs_helper=fs_helper)
+        context_loader.config = {"max_total_bytes": 1000, "load_workers": 4}
+        files = ["blob.bin", "a.txt", "b.txt", "c.txt"]
+        context_loader.get_files_from_directory = MagicMock(return_value=files)
+
+        self.assertTrue(context_loader.process_directory("/test_dir", context_loader.compile_ignore_patterns([])))
+        # The skipped binary uses no budget, and the earliest files win regardless of thread timing
+        self.assertEqual(list(context_loader.loaded_files), ["a.txt", "b.txt"])
+        self.assertEqual(context_loader.loaded_bytes, sum(len(content) for content in context_loader.loaded_files.values()))
+
+    @patch('builtins.print')
+    def test_walk_does_not_enter_ignored_directories(self, mock_print):
+        root = os.path.realpath(self.temp_dir.name)
+        for directory in ("src", "venv/lib", ".git/objects"):
+            os.makedirs(os.path.join(root, directory))
+        for name in ("src/a.py", "venv/lib/site.py", ".git/objects/pack"):
+            self.write(name, b"x")
+
+        previous_cwd = os.getcwd()
+        os.chdir(root)
+        self.addCleanup(os.chdir, previous_cwd)
+        walked = []
+
+        def list_dir(path):
+            for entry in os.walk(path):
+                walked.append(os.path.relpath(entry[0]))
+                yield entry
+        fs_helper = MagicMock(list_dir=list_dir)
+
+        context_loader = ContextLoader(api_key_loader=MagicMock(), fs_helper=fs_helper)
+        files = context_loader.get_files_from_directory(
+            root, context_loader.compile_ignore_patterns(["venv/", "./.git/"]))
+        self.assertEqual(files, [os.path.join(root, "src", "a.py")])
+        self.assertEqual(sorted(walked), [".", ".git", "src", "venv"])
+
+    @patch('builtins.print')
+    def test_files_are_not_read_once_max_total_bytes_is_used_up(self, mock_print):
+        fs_helper = MagicMock()
+        fs_helper.calculate_signature.side_effect = lambda path: f"sig-{path}"
+        fs_helper.read_file.return_value = "x" * 300
+        fs_helper.get_size.side_effect = lambda path: 5000 if path == "huge.txt" else 300
+
+        context_loader = ContextLoader(api_key_loader=MagicMock(), fs_helper=fs_helper)
+        context_loader.config = {"max_total_bytes": 1000, "load_workers": 2}
+        files = ["huge.txt"] + [f"{index}.txt" for index in range(40)]
+        context_loader.get_files_from_directory = MagicMock(return_value=files)
+
+        self.assertTrue(context_loader.process_directory("/test_dir", context_loader.compile_ignore_patterns([])))
+        self.assertEqual(list(context_loader.loaded_files), ["0.txt", "1.txt", "2.txt"])
+        read_paths = [call.args[0] for call in fs_helper.read_file.call_args_list]
+        self.assertNotIn("huge.txt", read_paths)
+        # Only the reads already in flight when the budget ran out are wasted
+        self.assertLessEqual(len(read_paths), 3 + 4)
+
+    @patch('builtins.print')
+    def test_tracked_files_deleted_from_the_worktree_are_skipped(self, mock_print):
+        fs_helper = MagicMock()
+        fs_helper.calculate_signature.side_effect = FileNotFoundError("gone.py")
+        context_loader = ContextLoader(api_key_loader=MagicMock(), fs_helper=fs_helper)
+        context_loader.git_tree = {}  # Files come from the git index
+
+        self.assertTrue(context_loader.process_file("gone.py", context_loader.compile_ignore_patterns([])))
+        self.assertNotIn("gone.py", context_loader.loaded_files)
+        mock_print.assert_any_call("⏩ Skipping file (deleted from the worktree): gone.py")
+
+    def test_context_cache_key_depends_on_read_options(self):
+        context_loader = ContextLoader(api_key_loader=MagicMock())
+        key = context_loader.get_content_cache_key("sig")
+        context_loader.config = {"max_file_bytes": 100}
+        self.assertNotEqual(context_loader.get_content_cache_key("sig"), key)
+        context_loader.config = {"skip_binary_files": False}
+        self.assertNotEqual(context_loader.get_content_cache_key("sig"), key)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -1,8 +1,11 @@
 from attention_forge.chain_steps.step import Step
 import shutil
 from attention_forge.file_manager import load_backup_log, get_latest_run_id
+from attention_forge.terminal import prompt_user
 
 class FileReverter(Step):
+    memoizable = False
+
     def run(self, input_data=None):
         backup_log = load_backup_log()
         latest_run_id = get_latest_run_id()
@@ -24,7 +27,7 @@ class FileReverter(Step):
             print(f"{i + 1}. {entry['original_file']} (Backup: {entry['backup_file']})")
 
         # Ask user to select files
-        choice = input("\nEnter the numbers of the files to revert (comma-separated, or 'cancel' to abort): ").strip()
+        choice = prompt_user("\nEnter the numbers of the files to revert (comma-separated, or 'cancel' to abort): ").strip()
 
         if choice.lower() == "cancel":
             print("❌ Reversion cancelled.")
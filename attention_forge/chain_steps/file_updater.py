@@ -3,6 +3,8 @@ from attention_forge.chain_steps.step import Step
 from attention_forge.file_manager import update_file
 
 class FileUpdater(Step):
+    memoizable = False
+
     def run(self, *response_texts):
         """Parses response text and updates extracted files."""
         combined_text = ' '.join(response_texts)
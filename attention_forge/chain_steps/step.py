@@ -1,3 +1,19 @@
+import asyncio
+
 class Step:
+    # False for steps that read the terminal or the disk, or write files,
+    # since their output is not a function of their inputs alone
+    memoizable = True
+    # False for steps whose output would be stale in a resumed run; they run again instead
+    checkpointable = True
+
     def run(self, *input_data):
-        raise NotImplementedError("Subclasses should implement this!")
\ No newline at end of file
+        raise NotImplementedError("Subclasses should implement this!")
+
+    async def arun(self, *input_data):
+        # Blocking steps run in a worker thread so the event loop stays free
+        return await asyncio.to_thread(self.run, *input_data)
+
+    def memo_fingerprint(self):
+        """What determines the output besides the step config and inputs; part of the memo key."""
+        return None
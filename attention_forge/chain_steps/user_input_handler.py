@@ -1,12 +1,20 @@
 from attention_forge.chain_steps.step import Step
 import os
+from attention_forge.terminal import terminal_lock
 
 class UserInputHandler(Step):
+    memoizable = False
+
     def __init__(self, source='stdin', project_config=None):
         self.source = source
         self.user_message_file = project_config.get("user_message_file", "user_message.txt") if project_config else "user_message.txt"
 
     def run(self, *previous_msg):
+        # Hold the terminal for the whole dialog so concurrent steps do not prompt in between
+        with terminal_lock:
+            return self.read_user_message()
+
+    def read_user_message(self):
         user_message = None
         if 'file' in self.source and os.path.isfile(self.user_message_file):
             with open(self.user_message_file, "r", encoding="utf-8") as file:
@@ -0,0 +1,85 @@
+import os
+import json
+import hashlib
+import threading
+
+CHECKPOINT_DIR = ".attention_forge/checkpoints"
+
+
+class Checkpoint:
+    """
+    Append-only record of the outputs of finished chain steps, one compact JSON
+    line per step in .attention_forge/checkpoints/<run_id>.jsonl. A failed run
+    can be resumed from it without repeating the steps that already succeeded.
+    """
+
+    def __init__(self, run_id, directory=CHECKPOINT_DIR):
+        self.run_id = run_id
+        self.directory = directory
+        self.path = os.path.join(directory, f"{run_id}.jsonl")
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(steps):
+        """Identifies the chain configuration, so a checkpoint is not resumed into a changed chain."""
+        return hashlib.sha1(json.dumps(steps, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def start(self, chain_name, steps):
+        """Begin the checkpoint of a new run with a header naming its chain."""
+        self.append({"run_id": self.run_id, "chain": chain_name, "fingerprint": self.fingerprint(steps)})
+
+    def record(self, index, step, output_data):
+        """Append the output of a finished step. Returns False if it cannot be stored as JSON."""
+        try:
+            self.append({"step": index, "type": step.get("type"), "output": output_data})
+        except (TypeError, ValueError) as e:
+            print(f"⚠️ Warning: The output of step {index + 1} ({step.get('type')}) cannot be checkpointed: {e}")
+            return False
+        return True
+
+    def append(self, entry):
+        line = json.dumps(entry, separators=(",", ":"))
+        with self.lock:
+            if not os.path.exists(self.directory):
+                os.makedirs(self.directory)
+            with open(self.path, "a", encoding="utf-8") as checkpoint_file:
+                checkpoint_file.write(line + "\n")
+
+    def read_header(self):
+        return self.load()[0]
+
+    def load(self):
+        """
+        Return (header, {step index: output}). Raises ValueError if there is no
+        checkpoint for the run. A last line cut short by a crash is ignored.
+        """
+        if not os.path.isfile(self.path):
+            raise ValueError(f"No checkpoint found for run '{self.run_id}' in {self.directory}.")
+        header = None
+        outputs = {}
+        with open(self.path, "r", encoding="utf-8") as checkpoint_file:
+            for line in checkpoint_file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if header is None:
+                    header = entry
+                elif "step" in entry:
+                    outputs[entry["step"]] = entry.get("output")
+        if header is None:
+            raise ValueError(f"The checkpoint of run '{self.run_id}' is empty.")
+        return header, outputs
+
+    @staticmethod
+    def prune(directory=CHECKPOINT_DIR, keep=20):
+        """Delete all but the `keep` most recently written checkpoints."""
+        if not os.path.isdir(directory):
+            return
+        paths = [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".jsonl")]
+        paths.sort(key=os.path.getmtime, reverse=True)
+        for path in paths[keep:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from attention_forge.checkpoint import Checkpoint
+
+STEPS = [{"type": "user_input", "output_data_key": "user_message"}]
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.directory = self.temp_dir.name
+
+    def test_outputs_are_appended_and_loaded(self):
+        checkpoint = Checkpoint("run-1", self.directory)
+        checkpoint.start("general_dev", STEPS)
+        checkpoint.record(0, STEPS[0], "hello")
+        checkpoint.record(2, {"type": "chat"}, {"response": "hi", "usage": {}})
+
+        header, outputs = Checkpoint("run-1", self.directory).load()
+        self.assertEqual(header["chain"], "general_dev")
+        self.assertEqual(header["fingerprint"], Checkpoint.fingerprint(STEPS))
+        self.assertEqual(outputs, {0: "hello", 2: {"response": "hi", "usage": {}}})
+        with open(checkpoint.path, "r", encoding="utf-8") as checkpoint_file:
+            self.assertEqual(len(checkpoint_file.readlines()), 3)
+
+    def test_truncated_last_line_is_ignored(self):
+        checkpoint = Checkpoint("run-1", self.directory)
+        checkpoint.start("general_dev", STEPS)
+        checkpoint.record(0, STEPS[0], "hello")
+        with open(checkpoint.path, "a", encoding="utf-8") as checkpoint_file:
+            checkpoint_file.write('{"step":1,"output":"cut sh')
+
+        _, outputs = checkpoint.load()
+        self.assertEqual(outputs, {0: "hello"})
+
+    @patch('builtins.print')
+    def test_unserializable_output_is_skipped(self, mock_print):
+        checkpoint = Checkpoint("run-1", self.directory)
+        checkpoint.start("general_dev", STEPS)
+        self.assertFalse(checkpoint.record(0, STEPS[0], object()))
+        self.assertEqual(checkpoint.load()[1], {})
+
+    def test_missing_checkpoint_raises(self):
+        with self.assertRaisesRegex(ValueError, "No checkpoint found"):
+            Checkpoint("unknown", self.directory).load()
+
+    def test_prune_keeps_the_newest(self):
+        for index in range(3):
+            checkpoint = Checkpoint(f"run-{index}", self.directory)
+            checkpoint.start("chat", STEPS)
+            os.utime(checkpoint.path, (index, index))
+        Checkpoint.prune(self.directory, keep=2)
+        self.assertEqual(sorted(os.listdir(self.directory)), ["run-1.jsonl", "run-2.jsonl"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,11 +1,36 @@
 import abc
+import json
+import time
+import httpx
+import asyncio
+import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from attention_forge.http_session import create_http_session, create_async_http_client, get_http_timeout
+from attention_forge.response_cache import ResponseCache
+from attention_forge.resilience import RetryPolicy, RetryBudget, ProviderStats, classify_error
+from attention_forge.tracing import span
 
 class BaseClient(metaclass=abc.ABCMeta):
+    # Errors without a status code that are worth retrying; clients add their SDK's connection errors
+    RETRYABLE_EXCEPTIONS = (requests.ConnectionError, requests.Timeout, httpx.TransportError)
 
-    def __init__(self, api_key, model, project_config):
+    # Shared by all clients of the same provider, keyed by get_name()
+    provider_stats = {}
+    provider_stats_lock = threading.Lock()
+    # Set by ChatBuilder when hedging is on, so hedge thresholds start from earlier runs
+    latency_history = None
+
+    def __init__(self, api_key, model, project_config, http_session=None):
         self.api_key = api_key
         self.model = model
         self.project_config = project_config
+        # ChatBuilder passes one pooled session shared by all its clients
+        self.http_session = http_session if http_session is not None else create_http_session(project_config)
+        self.http_timeout = get_http_timeout(project_config)
+        self.async_http_client = None
+        self.async_http_loop = None
+        self.retry_policy = RetryPolicy.from_config(project_config)
 
     @staticmethod
     def construct_messages(role_config, user_message, include_assistant=True):
@@ -20,6 +45,280 @@ class BaseClient(metaclass=abc.ABCMeta):
 
         return messages
 
+    def get_base_url(self, default):
+        """The API base URL, overridable per client with `api_base_urls` (e.g. to use a local mock server)."""
+        base_url = self.project_config.get("api_base_urls", {}).get(self.get_name(), default)
+        return base_url.rstrip("/") if base_url else base_url
+
+    def get_sampling_params(self):
+        """Parameters besides the model and messages that change the reply; part of the response cache key."""
+        return {}
+
+    def get_cache_key(self, role_config, user_message):
+        messages = self.construct_messages(role_config, user_message)
+        return ResponseCache.make_key(self.get_name(), self.model, self.get_sampling_params(), messages)
+
+    @staticmethod
+    def usage_from_json(response_json):
+        usage = response_json.get('usage') or {}
+        # Prompt tokens served from the provider's prefix cache: DeepSeek reports
+        # prompt_cache_hit_tokens, OpenAI-compatible APIs prompt_tokens_details.cached_tokens
+        cached_tokens = usage.get('prompt_cache_hit_tokens')
+        if cached_tokens is None:
+            cached_tokens = (usage.get('prompt_tokens_details') or {}).get('cached_tokens')
+        return {
+            "prompt_tokens": usage.get('prompt_tokens', None),
+            "completion_tokens": usage.get('completion_tokens', None),
+            "total_tokens": usage.get('total_tokens', None),
+            "cached_tokens": cached_tokens
+        }
+
+    @staticmethod
+    def iter_sse_data(response):
+        """Yield the JSON payloads of an OpenAI-compatible server-sent event stream."""
+        for line in response.iter_lines():
+            if not line.startswith(b"data:"):
+                continue
+            data = line[len(b"data:"):].strip()
+            if data == b"[DONE]":
+                break
+            yield json.loads(data.decode("utf-8"))
+
+    @classmethod
+    def collect_sse_stream(cls, response, on_token):
+        """Forward each content delta to on_token; return the full reply and the usage, if reported."""
+        reply_parts = []
+        token_usage = cls.usage_from_json({})
+        for chunk in cls.iter_sse_data(response):
+            for choice in chunk.get("choices") or []:
+                content = (choice.get("delta") or {}).get("content")
+                if content:
+                    reply_parts.append(content)
+                    on_token(content)
+            if chunk.get("usage"):
+                token_usage = cls.usage_from_json(chunk)
+        return "".join(reply_parts), token_usage
+
     @abc.abstractmethod
     def complete_chat(self, user_message):
-        pass
\ No newline at end of file
+        pass
+
+    def stream_chat(self, role_config, user_message, on_token):
+        """
+        Like complete_chat, but calls on_token with each piece of the reply as it
+        arrives. Clients without streaming support deliver the reply in one piece.
+        """
+        request_data, response_data, assistant_reply = self.complete_chat(role_config, user_message)
+        on_token(assistant_reply)
+        return request_data, response_data, assistant_reply
+
+    async def acomplete_chat(self, role_config, user_message):
+        """
+        Coroutine version of complete_chat. Clients without a native async
+        implementation run complete_chat in a worker thread.
+        """
+        return await asyncio.to_thread(self.complete_chat, role_config, user_message)
+
+    def wants_warm_up(self):
+        """Whether warm_up should run in the background before the first request."""
+        return False
+
+    def warm_up(self):
+        """Prepare the model ahead of the first request, e.g. load it into memory. Hosted APIs need nothing."""
+
+    def get_async_http_client(self):
+        """An httpx.AsyncClient for the running event loop; connections cannot be shared across loops."""
+        loop = asyncio.get_running_loop()
+        if self.async_http_client is None or self.async_http_loop is not loop:
+            self.async_http_client = create_async_http_client(self.project_config)
+            self.async_http_loop = loop
+        return self.async_http_client
+
+    async def aclose(self):
+        if self.async_http_client is not None:
+            await self.async_http_client.aclose()
+            self.async_http_client = None
+            self.async_http_loop = None
+
+    def get_provider_stats(self):
+        name = self.get_name()
+        with BaseClient.provider_stats_lock:
+            if name not in BaseClient.provider_stats:
+                retry_budget = RetryBudget(
+                    ratio=self.project_config.get("retry_budget_ratio", 0.2),
+                    max_tokens=self.project_config.get("retry_budget_max", 10)
+                )
+                BaseClient.provider_stats[name] = ProviderStats(retry_budget, name, BaseClient.latency_history)
+            return BaseClient.provider_stats[name]
+
+    @staticmethod
+    def save_latency_history():
+        """Write the latencies of this run to the LatencyHistory, if hedging keeps one."""
+        if BaseClient.latency_history is None:
+            return
+        with BaseClient.provider_stats_lock:
+            for stats in BaseClient.provider_stats.values():
+                stats.update_history()
+        BaseClient.latency_history.save()
+
+    @staticmethod
+    def get_resilience_stats():
+        """Retry, hedging and latency counters per provider, for tuning the resilience options."""
+        with BaseClient.provider_stats_lock:
+            return {name: stats.snapshot() for name, stats in BaseClient.provider_stats.items()}
+
+    def request_chat(self, role_config, user_message, on_token=None, retry=True):
+        """
+        complete_chat, or stream_chat when on_token is given, with jittered exponential
+        backoff on transient errors and optional hedging of slow requests. With
+        retry=False the first error is raised, e.g. when another provider can take over.
+        """
+        stats = self.get_provider_stats()
+        stats.increment("requests")
+        stats.retry_budget.deposit()
+
+        if on_token is not None:
+            emitted = []
+
+            def forward_token(text):
+                emitted.append(True)
+                on_token(text)
+
+            call = lambda: self.stream_chat(role_config, user_message, forward_token)
+            # Retrying once tokens were printed would repeat them, and hedging would print twice
+            can_retry = lambda: retry and not emitted
+            hedge = False
+        else:
+            call = lambda: self.complete_chat(role_config, user_message)
+            can_retry = lambda: retry
+            hedge = self.project_config.get("hedge_requests", False)
+
+        attempt = 0
+        while True:
+            start_time = time.monotonic()
+            try:
+                with span(f"{self.get_name()} {self.model}", "http", attempt=attempt + 1, stream=on_token is not None):
+                    result, hedged = self.hedged_call(call, stats) if hedge else (call(), False)
+            except Exception as error:
+                delay = self.get_retry_delay(error, attempt, stats) if can_retry() else None
+                if delay is None:
+                    stats.increment("failures")
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                continue
+            return self.record_success(result, stats, start_time, attempt, hedged)
+
+    async def arequest_chat(self, role_config, user_message, retry=True):
+        """Coroutine version of request_chat, built on acomplete_chat."""
+        stats = self.get_provider_stats()
+        stats.increment("requests")
+        stats.retry_budget.deposit()
+
+        call = lambda: self.acomplete_chat(role_config, user_message)
+        hedge = self.project_config.get("hedge_requests", False)
+
+        attempt = 0
+        while True:
+            start_time = time.monotonic()
+            try:
+                with span(f"{self.get_name()} {self.model}", "http", attempt=attempt + 1):
+                    result, hedged = await self.ahedged_call(call, stats) if hedge else (await call(), False)
+            except Exception as error:
+                delay = self.get_retry_delay(error, attempt, stats) if retry else None
+                if delay is None:
+                    stats.increment("failures")
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            return self.record_success(result, stats, start_time, attempt, hedged)
+
+    def get_retry_delay(self, error, attempt, stats):
+        """Seconds to wait before retrying, or None when the error must be raised."""
+        retryable, retry_after, description = classify_error(error, self.RETRYABLE_EXCEPTIONS)
+        if not retryable or attempt >= self.retry_policy.max_retries:
+            return None
+        delay = self.retry_policy.get_delay(attempt, retry_after)
+        if delay is None:
+            # Retrying before the server's Retry-After would only be refused again; fail over instead
+            print(f"⚠️ {self.get_name()} asked to retry after {retry_after:.0f}s, more than retry_max_delay. "
+                  f"Not retrying after {description}.")
+            return None
+        if not stats.retry_budget.withdraw():
+            stats.increment("retries_denied")
+            print(f"⚠️ Retry budget for {self.get_name()} is exhausted. Not retrying after {description}.")
+            return None
+
+        stats.increment("retries")
+        print(f"🔁 {self.get_name()} returned {description}. Retrying in {delay:.1f}s "
+              f"(attempt {attempt + 2}/{self.retry_policy.max_retries + 1}).")
+        return delay
+
+    def record_success(self, result, stats, start_time, attempt, hedged):
+        stats.record_latency(time.monotonic() - start_time, self.model)
+        stats.increment("successes")
+        request_data, response_data, assistant_reply = result
+        response_data["resilience"] = {"attempts": attempt + 1, "hedged": hedged}
+        return request_data, response_data, assistant_reply
+
+    def get_hedge_threshold(self, stats):
+        """Seconds after which a duplicate request is sent: the recent p95 latency of this provider and model."""
+        p95_latency = stats.get_percentile(0.95, self.project_config.get("hedge_min_samples", 20), self.model)
+        if p95_latency is None:
+            return None
+        return max(p95_latency, self.project_config.get("hedge_min_seconds", 1.0))
+
+    def hedged_call(self, call, stats):
+        """Run call; if it is slower than the hedge threshold, race a duplicate and keep the first success."""
+        threshold = self.get_hedge_threshold(stats)
+        if threshold is None:
+            return call(), False
+
+        executor = ThreadPoolExecutor(max_workers=2)
+        try:
+            primary = executor.submit(call)
+            done, _ = wait([primary], timeout=threshold)
+            if done or not stats.retry_budget.withdraw():
+                return primary.result(), False
+
+            stats.increment("hedges")
+            hedge = executor.submit(call)
+            pending = {primary, hedge}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.exception() is None:
+                        if future is hedge:
+                            stats.increment("hedge_wins")
+                        return future.result(), True
+            return primary.result(), True  # Both failed: raise the original error
+        finally:
+            # The losing request cannot be interrupted; it finishes in the background
+            executor.shutdown(wait=False)
+
+    async def ahedged_call(self, call, stats):
+        threshold = self.get_hedge_threshold(stats)
+        if threshold is None:
+            return await call(), False
+
+        primary = asyncio.ensure_future(call())
+        done, _ = await asyncio.wait({primary}, timeout=threshold)
+        if done or not stats.retry_budget.withdraw():
+            return await primary, False
+
+        stats.increment("hedges")
+        hedge = asyncio.ensure_future(call())
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            stats.increment("hedge_wins")
+                        return task.result(), True
+            return primary.result(), True  # Both failed: raise the original error
+        finally:
+            for task in pending:
+                task.cancel()
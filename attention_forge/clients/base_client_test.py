@@ -0,0 +1,254 @@
+import os
+import time
+import asyncio
+import json
+import httpx
+import requests
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+from attention_forge.clients.base_client import BaseClient
+from attention_forge.clients.deepseek_client import DeepSeekClient
+from attention_forge.clients.ollama_client import OllamaClient, NUM_CTX_STATE_FILE
+from attention_forge.resilience import LatencyHistory
+from ollama import ChatResponse
+
+class FakeStreamResponse:
+    def __init__(self, lines):
+        self.lines = lines
+
+    def iter_lines(self):
+        return iter(self.lines)
+
+class ScriptedClient(BaseClient):
+    """Answers complete_chat from a list of outcomes: exceptions are raised, numbers are delays in seconds."""
+
+    def __init__(self, outcomes, project_config=None):
+        super().__init__(None, "model", project_config or {}, http_session=MagicMock())
+        self.outcomes = list(outcomes)
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    @staticmethod
+    def get_name():
+        return "scripted"
+
+    def complete_chat(self, role_config, user_message):
+        with self.lock:
+            outcome = self.outcomes.pop(0)
+            self.calls += 1
+            call_number = self.calls
+        if isinstance(outcome, Exception):
+            raise outcome
+        time.sleep(outcome)
+        return {}, {"response": f"reply {call_number}", "usage": {}}, f"reply {call_number}"
+
+def http_error(status_code, headers=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    return requests.exceptions.HTTPError(response=response)
+
+class TestBaseClient(unittest.TestCase):
+    def setUp(self):
+        BaseClient.provider_stats.clear()
+
+    def test_collect_sse_stream(self):
+        response = FakeStreamResponse([
+            b'data: {"choices": [{"delta": {"role": "assistant"}}]}',
+            b'',
+            b': keep-alive',
+            b'data: {"choices": [{"delta": {"content": "Hel"}}]}',
+            'data: {"choices": [{"delta": {"content": "lo é"}}]}'.encode("utf-8"),
+            b'data: {"choices": [], "usage": {"prompt_tokens": 5, "completion_tokens": 2, "total_tokens": 7, '
+            b'"prompt_cache_hit_tokens": 4}}',
+            b'data: [DONE]',
+        ])
+        tokens = []
+
+        reply, usage = BaseClient.collect_sse_stream(response, tokens.append)
+
+        self.assertEqual(tokens, ["Hel", "lo é"])
+        self.assertEqual(reply, "Hello é")
+        self.assertEqual(usage, {"prompt_tokens": 5, "completion_tokens": 2, "total_tokens": 7, "cached_tokens": 4})
+
+    def test_collect_sse_stream_without_usage(self):
+        response = FakeStreamResponse([b'data: {"choices": [{"delta": {"content": "Hi"}}]}', b'data: [DONE]'])
+        reply, usage = BaseClient.collect_sse_stream(response, lambda text: None)
+        self.assertEqual(reply, "Hi")
+        self.assertIsNone(usage["completion_tokens"])
+
+    def test_requests_go_through_the_shared_session(self):
+        session = MagicMock()
+        session.post.return_value.content = b"{}"
+        session.post.return_value.json.return_value = {"choices": [{"message": {"content": "Hi"}}]}
+        project_config = {"http_connect_timeout": 3, "http_read_timeout": 60}
+        client = DeepSeekClient("key", "deepseek-chat", project_config, http_session=session)
+
+        _, _, reply = client.complete_chat({}, "hello")
+
+        self.assertEqual(reply, "Hi")
+        self.assertEqual(session.post.call_args.kwargs["timeout"], (3, 60))
+
+    @patch('builtins.print')
+    @patch('attention_forge.clients.base_client.time.sleep')
+    def test_request_chat_retries_transient_errors(self, mock_sleep, mock_print):
+        client = ScriptedClient([http_error(429, {"Retry-After": "2"}), requests.ConnectionError(), 0])
+
+        _, response_data, reply = client.request_chat({}, "hello")
+
+        self.assertEqual(reply, "reply 3")
+        self.assertEqual(response_data["resilience"], {"attempts": 3, "hedged": False})
+        self.assertGreaterEqual(mock_sleep.call_args_list[0].args[0], 2)
+        self.assertEqual(BaseClient.get_resilience_stats()["scripted"]["retries"], 2)
+
+    @patch('builtins.print')
+    def test_request_chat_does_not_retry_client_errors_or_beyond_the_budget(self, mock_print):
+        with self.assertRaises(requests.exceptions.HTTPError):
+            ScriptedClient([http_error(400)]).request_chat({}, "hello")
+
+        BaseClient.provider_stats.clear()
+        client = ScriptedClient([http_error(503), http_error(503)], {"retry_budget_max": 1, "retry_base_delay": 0})
+        with self.assertRaises(requests.exceptions.HTTPError):
+            client.request_chat({}, "hello")
+        stats = BaseClient.get_resilience_stats()["scripted"]
+        self.assertEqual((stats["retries"], stats["retries_denied"], stats["failures"]), (1, 1, 1))
+
+    @patch('builtins.print')
+    def test_streamed_requests_are_not_retried_after_tokens_were_printed(self, mock_print):
+        client = ScriptedClient([])
+
+        def stream_chat(role_config, user_message, on_token):
+            on_token("partial")
+            raise requests.ConnectionError()
+
+        client.stream_chat = stream_chat
+        with self.assertRaises(requests.ConnectionError):
+            client.request_chat({}, "hello", on_token=lambda text: None)
+        self.assertEqual(BaseClient.get_resilience_stats()["scripted"]["retries"], 0)
+
+    @patch('builtins.print')
+    @patch('attention_forge.clients.base_client.time.sleep')
+    def test_retry_after_longer_than_the_max_delay_fails_fast(self, mock_sleep, mock_print):
+        client = ScriptedClient([http_error(429, {"Retry-After": "120"}), 0], {"retry_max_delay": 30})
+        with self.assertRaises(requests.exceptions.HTTPError):
+            client.request_chat({}, "hello")
+        mock_sleep.assert_not_called()
+        self.assertEqual(client.calls, 1)
+
+    def test_hedge_threshold_is_per_model_and_seeded_from_earlier_runs(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        history = LatencyHistory(os.path.join(temp_dir.name, "latency_history.json"))
+        history.set("scripted/model", [2.0] * 20)
+        history.save()
+
+        with patch.object(BaseClient, "latency_history", LatencyHistory(history.cache.path)):
+            fast = ScriptedClient([], {"hedge_requests": True})
+            slow = ScriptedClient([], {"hedge_requests": True})
+            slow.model = "slow-model"
+            stats = fast.get_provider_stats()
+            for _ in range(20):
+                stats.record_latency(30.0, "slow-model")
+
+            self.assertEqual(fast.get_hedge_threshold(stats), 2.0)
+            self.assertEqual(slow.get_hedge_threshold(stats), 30.0)
+
+            BaseClient.save_latency_history()
+        self.assertEqual(LatencyHistory(history.cache.path).get("scripted/slow-model"), [30.0] * 20)
+
+    def test_slow_request_is_hedged(self):
+        client = ScriptedClient([0.5, 0], {"hedge_requests": True, "hedge_min_samples": 1, "hedge_min_seconds": 0.05})
+        client.get_provider_stats().record_latency(0.01, "model")
+
+        _, response_data, reply = client.request_chat({}, "hello")
+
+        self.assertEqual(reply, "reply 2")
+        self.assertTrue(response_data["resilience"]["hedged"])
+        stats = BaseClient.get_resilience_stats()["scripted"]
+        self.assertEqual((stats["hedges"], stats["hedge_wins"]), (1, 1))
+
+class TestAsyncClients(unittest.IsolatedAsyncioTestCase):
+    async def test_deepseek_acomplete_chat(self):
+        requests_seen = []
+
+        def handler(request):
+            requests_seen.append(json.loads(request.content))
+            return httpx.Response(200, json={
+                "choices": [{"message": {"content": "Hi"}}],
+                "usage": {"prompt_tokens": 2, "completion_tokens": 1, "total_tokens": 3}
+            })
+
+        client = DeepSeekClient("key", "deepseek-chat", {}, http_session=MagicMock())
+        client.async_http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        client.async_http_loop = asyncio.get_running_loop()
+
+        replies = await asyncio.gather(*[client.acomplete_chat({}, f"hello {i}") for i in range(3)])
+        await client.aclose()
+
+        self.assertEqual([reply for _, _, reply in replies], ["Hi", "Hi", "Hi"])
+        self.assertEqual(replies[0][1]["usage"]["total_tokens"], 3)
+        self.assertEqual(len(requests_seen), 3)
+        self.assertFalse(requests_seen[0]["stream"])
+
+
+class TestOllamaClient(unittest.TestCase):
+    def test_num_ctx_grows_with_the_prompt_in_powers_of_two(self):
+        client = OllamaClient(None, "llama", {"ollama_reply_tokens": 1000, "ollama_max_num_ctx": 8192})
+        self.assertEqual(client.get_num_ctx([{"content": "short"}]), 2048)
+        self.assertEqual(client.get_num_ctx([{"content": "word " * 2000}]), 4096)
+        with patch('builtins.print'):
+            self.assertEqual(client.get_num_ctx([{"content": "word " * 20000}]), 8192)
+
+    def test_request_carries_keep_alive_and_fixed_num_ctx(self):
+        client = OllamaClient(None, "llama", {"ollama_num_ctx": 16384, "ollama_keep_alive": "1h"})
+        request_data = client.build_request({}, "hello")
+        self.assertEqual(request_data["options"], {"num_ctx": 16384})
+        self.assertEqual(request_data["keep_alive"], "1h")
+
+    def test_warm_up_uses_the_num_ctx_of_the_last_successful_request(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            previous_cwd = os.getcwd()
+            os.chdir(temp_dir)
+            self.addCleanup(os.chdir, previous_cwd)
+
+            client = OllamaClient(None, "llama", {"ollama_reply_tokens": 1000})
+            self.assertEqual(client.get_warm_up_num_ctx(), 2048)
+            # Building a request, e.g. for a cache key, is not a request
+            num_ctx = client.build_request({}, "word " * 6000)["options"]["num_ctx"]
+            self.assertGreater(num_ctx, 2048)
+            self.assertFalse(os.path.exists(NUM_CTX_STATE_FILE))
+
+            client.client = MagicMock()
+            client.client.chat.return_value = ChatResponse(model="llama", done=True, eval_count=1,
+                                                           message={"role": "assistant", "content": "hi"})
+            client.complete_chat({}, "word " * 6000)
+
+            client = OllamaClient(None, "llama", {"ollama_reply_tokens": 1000})
+            client.client = MagicMock()
+            client.warm_up()
+            self.assertEqual(client.client.generate.call_args.kwargs["options"], {"num_ctx": num_ctx})
+            self.assertEqual(OllamaClient(None, "other", {}).get_warm_up_num_ctx(), 2048)
+
+            # Clients that never warm up, like the benchmark's, keep no state
+            os.remove(NUM_CTX_STATE_FILE)
+            client = OllamaClient(None, "llama", {"ollama_warm_up": False})
+            client.client = MagicMock()
+            client.client.chat.return_value = ChatResponse(model="llama", done=True, eval_count=1,
+                                                           message={"role": "assistant", "content": "hi"})
+            client.complete_chat({}, "hello")
+            self.assertFalse(os.path.exists(NUM_CTX_STATE_FILE))
+
+    def test_token_counts_come_from_eval_counts(self):
+        response = ChatResponse(model="llama", message={"role": "assistant", "content": "hi"},
+                                done=True, prompt_eval_count=12, eval_count=5)
+        usage = OllamaClient.extract_usage(response)
+        self.assertEqual((usage["prompt_tokens"], usage["completion_tokens"], usage["total_tokens"]), (12, 5, 17))
+
+    def test_missing_counts_stay_unknown(self):
+        response = ChatResponse(model="llama", message={"role": "assistant", "content": "hi"})
+        self.assertIsNone(OllamaClient.extract_usage(response)["total_tokens"])
+
+if __name__ == "__main__":
+    unittest.main()
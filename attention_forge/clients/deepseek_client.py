@@ -1,18 +1,20 @@
 from attention_forge.clients.base_client import BaseClient
+import httpx
 import requests
 
 class DeepSeekClient(BaseClient):
     
-    def __init__(self, api_key, model, project_config):
-        super().__init__(api_key, model, project_config)
+    def __init__(self, api_key, model, project_config, http_session=None):
+        super().__init__(api_key, model, project_config, http_session)
+        self.api_url = self.get_base_url(self.DEFAULT_BASE_URL) + "/chat/completions"
         
     @staticmethod
     def get_name():
         return "deepseek"
 
-    def complete_chat(self, role_config, user_message):
-        messages = self.construct_messages(role_config, user_message, include_assistant=False)
+    DEFAULT_BASE_URL = "https://api.deepseek.com"
 
+    def build_request(self, messages, stream):
         headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.api_key}"
@@ -21,11 +23,19 @@ class DeepSeekClient(BaseClient):
         payload = {
             "model": self.model,
             "messages": messages,
-            "stream": False
+            "stream": stream
         }
+        if stream:
+            payload["stream_options"] = {"include_usage": True}
+
+        return headers, payload
+
+    def complete_chat(self, role_config, user_message):
+        messages = self.construct_messages(role_config, user_message, include_assistant=False)
+        headers, payload = self.build_request(messages, stream=False)
 
         try:
-            response = requests.post("https://api.deepseek.com/chat/completions", headers=headers, json=payload)
+            response = self.http_session.post(self.api_url, headers=headers, json=payload, timeout=self.http_timeout)
             response.raise_for_status()
 
             if not response.content:
@@ -36,12 +46,35 @@ class DeepSeekClient(BaseClient):
             assistant_reply = response_json["choices"][0]["message"]["content"]
             request_data = {"model": self.model, "messages": messages}
 
-            token_usage = {
-                "prompt_tokens": response_json.get('usage', {}).get('prompt_tokens', None),
-                "completion_tokens": response_json.get('usage', {}).get('completion_tokens', None),
-                "total_tokens": response_json.get('usage', {}).get('total_tokens', None)
-            }
+            token_usage = self.usage_from_json(response_json)
+
+            response_data = {"response": assistant_reply, "usage": token_usage}
+            return request_data, response_data, assistant_reply
+
+        except requests.exceptions.HTTPError as http_err:
+            print(f"HTTP error occurred: {http_err}")
+            raise
+        except ValueError as val_err:
+            print(val_err)
+            raise
+        except Exception as err:
+            print(f"An error occurred: {err}")
+            raise
+
+    def stream_chat(self, role_config, user_message, on_token):
+        messages = self.construct_messages(role_config, user_message, include_assistant=False)
+        headers, payload = self.build_request(messages, stream=True)
+
+        try:
+            with self.http_session.post(self.api_url, headers=headers, json=payload, stream=True,
+                                        timeout=self.http_timeout) as response:
+                response.raise_for_status()
+                assistant_reply, token_usage = self.collect_sse_stream(response, on_token)
 
+            if not assistant_reply:
+                raise ValueError("The server is busy. Please try again later.")
+
+            request_data = {"model": self.model, "messages": messages}
             response_data = {"response": assistant_reply, "usage": token_usage}
             return request_data, response_data, assistant_reply
 
@@ -53,4 +86,34 @@ class DeepSeekClient(BaseClient):
             raise
         except Exception as err:
             print(f"An error occurred: {err}")
-            raise
\ No newline at end of file
+            raise
+
+    async def acomplete_chat(self, role_config, user_message):
+        messages = self.construct_messages(role_config, user_message, include_assistant=False)
+        headers, payload = self.build_request(messages, stream=False)
+
+        try:
+            response = await self.get_async_http_client().post(self.api_url, headers=headers, json=payload)
+            response.raise_for_status()
+
+            if not response.content:
+                raise ValueError("The server is busy. Please try again later.")
+
+            response_json = response.json()
+
+            assistant_reply = response_json["choices"][0]["message"]["content"]
+            request_data = {"model": self.model, "messages": messages}
+            token_usage = self.usage_from_json(response_json)
+
+            response_data = {"response": assistant_reply, "usage": token_usage}
+            return request_data, response_data, assistant_reply
+
+        except httpx.HTTPStatusError as http_err:
+            print(f"HTTP error occurred: {http_err}")
+            raise
+        except ValueError as val_err:
+            print(val_err)
+            raise
+        except Exception as err:
+            print(f"An error occurred: {err}")
+            raise
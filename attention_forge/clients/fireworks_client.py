@@ -1,29 +1,35 @@
-import requests
 from attention_forge.clients.base_client import BaseClient
 import json
 
 class FireworksClient(BaseClient):
     
-    def __init__(self, api_key, model, project_config):
-        super().__init__(api_key, model, project_config)
+    def __init__(self, api_key, model, project_config, http_session=None):
+        super().__init__(api_key, model, project_config, http_session)
         
         # Load max_tokens from the project_config or use the default value
         self.max_tokens = project_config.get('max_tokens', 20480)
+        self.api_url = self.get_base_url(self.DEFAULT_BASE_URL) + "/chat/completions"
 
     @staticmethod
     def get_name():
         return "fireworks"
 
-    def complete_chat(self, role_config, user_message):
-        # Construct messages using the provided utility method
-        messages = self.construct_messages(role_config, user_message)
-        
-        # Define the Fireworks API endpoint
-        url = "https://api.fireworks.ai/inference/v1/chat/completions"
-        
+    DEFAULT_BASE_URL = "https://api.fireworks.ai/inference/v1"
+
+    def get_sampling_params(self):
+        return {
+            "max_tokens": self.max_tokens,  # Use the configured or default max_tokens
+            "top_p": 1,
+            "top_k": 40,
+            "presence_penalty": 0,
+            "frequency_penalty": 0,
+            "temperature": 0.6
+        }
+
+    def build_request(self, messages, stream):
         # Prepare the headers for the request
         headers = {
-            "Accept": "application/json",
+            "Accept": "text/event-stream" if stream else "application/json",
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.api_key}"
         }
@@ -31,17 +37,21 @@ class FireworksClient(BaseClient):
         # Create the payload for the request
         payload = {
             "model": self.model,
-            "max_tokens": self.max_tokens,  # Use the configured or default max_tokens
-            "top_p": 1,
-            "top_k": 40,
-            "presence_penalty": 0,
-            "frequency_penalty": 0,
-            "temperature": 0.6,
+            **self.get_sampling_params(),
             "messages": [{"role": msg["role"], "content": msg["content"]} for msg in messages]
         }
+        if stream:
+            payload["stream"] = True
+
+        return headers, payload
+
+    def complete_chat(self, role_config, user_message):
+        # Construct messages using the provided utility method
+        messages = self.construct_messages(role_config, user_message)
+        headers, payload = self.build_request(messages, stream=False)
         
         # Send the request to the Fireworks API
-        response = requests.post(url, headers=headers, data=json.dumps(payload))
+        response = self.http_session.post(self.api_url, headers=headers, data=json.dumps(payload), timeout=self.http_timeout)
         response.raise_for_status()  # Raise an error for bad responses
         response_json = response.json()
         
@@ -50,11 +60,36 @@ class FireworksClient(BaseClient):
         request_data = {"model": self.model, "messages": messages}
 
         # Extract token usage if available
-        token_usage = {
-            "prompt_tokens": response_json.get('usage', {}).get('prompt_tokens', None),
-            "completion_tokens": response_json.get('usage', {}).get('completion_tokens', None),
-            "total_tokens": response_json.get('usage', {}).get('total_tokens', None)
-        }
+        token_usage = self.usage_from_json(response_json)
+
+        response_data = {"response": assistant_reply, "usage": token_usage}
+        return request_data, response_data, assistant_reply
+
+    def stream_chat(self, role_config, user_message, on_token):
+        messages = self.construct_messages(role_config, user_message)
+        headers, payload = self.build_request(messages, stream=True)
+
+        # The final chunk of the stream carries the token usage
+        with self.http_session.post(self.api_url, headers=headers, data=json.dumps(payload), stream=True,
+                                    timeout=self.http_timeout) as response:
+            response.raise_for_status()
+            assistant_reply, token_usage = self.collect_sse_stream(response, on_token)
+
+        request_data = {"model": self.model, "messages": messages}
+        response_data = {"response": assistant_reply, "usage": token_usage}
+        return request_data, response_data, assistant_reply
+
+    async def acomplete_chat(self, role_config, user_message):
+        messages = self.construct_messages(role_config, user_message)
+        headers, payload = self.build_request(messages, stream=False)
+
+        response = await self.get_async_http_client().post(self.api_url, headers=headers, content=json.dumps(payload))
+        response.raise_for_status()
+        response_json = response.json()
+
+        assistant_reply = response_json["choices"][0]["message"]["content"]
+        request_data = {"model": self.model, "messages": messages}
+        token_usage = self.usage_from_json(response_json)
 
         response_data = {"response": assistant_reply, "usage": token_usage}
-        return request_data, response_data, assistant_reply
\ No newline at end of file
+        return request_data, response_data, assistant_reply
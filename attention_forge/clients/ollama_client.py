@@ -1,29 +1,165 @@
 from attention_forge.clients.base_client import BaseClient
-from ollama import chat, ChatResponse
+from attention_forge.disk_cache import DiskCache
+from attention_forge.token_estimator import estimate_message_tokens
+from ollama import Client, AsyncClient, ChatResponse
+
+MIN_NUM_CTX = 2048  # Ollama's own default context window
+NUM_CTX_STATE_FILE = ".attention_forge/ollama_num_ctx.json"
+
 
 class OllamaClient(BaseClient):
-    def __init__(self, api_key, model, project_config):
-        super().__init__(api_key, model, project_config)
+    def __init__(self, api_key, model, project_config, http_session=None):
+        super().__init__(api_key, model, project_config, http_session)
+        # None falls back to OLLAMA_HOST or the local default
+        self.host = self.get_base_url(None)
+        self.client = Client(host=self.host)
+        self.async_client = None
+        # Keep the model loaded between steps and runs instead of Ollama's 5 minutes
+        self.keep_alive = project_config.get("ollama_keep_alive", "30m")
+        self.num_ctx = project_config.get("ollama_num_ctx")
+        self.max_num_ctx = project_config.get("ollama_max_num_ctx", 32768)
+        self.reply_tokens = project_config.get("ollama_reply_tokens", 2048)
+        self.warm_up_enabled = project_config.get("ollama_warm_up", True)
+        self.num_ctx_state = None  # num_ctx of the last request per model, opened when needed
     
     @staticmethod
     def get_name():
         return "ollama"
 
-    def complete_chat(self, role_config, user_message):
+    def get_num_ctx(self, messages):
+        """
+        Context window for a request: the estimated prompt plus room for the reply,
+        rounded up to a power of two so that similar prompts share one size (Ollama
+        reloads the model when num_ctx changes). `ollama_num_ctx` fixes the size.
+        """
+        if self.num_ctx:
+            return self.num_ctx
+        needed_tokens = estimate_message_tokens(messages) + self.reply_tokens
+        num_ctx = MIN_NUM_CTX
+        while num_ctx < needed_tokens and num_ctx < self.max_num_ctx:
+            num_ctx *= 2
+        num_ctx = min(num_ctx, self.max_num_ctx)
+        if needed_tokens > num_ctx:
+            print(f"⚠️ Warning: The prompt and reply need ~{needed_tokens} tokens, more than ollama_max_num_ctx "
+                  f"({self.max_num_ctx}). Ollama will truncate the prompt.")
+        return num_ctx
+
+    def get_sampling_params(self):
+        """The num_ctx sizing options: a smaller context window truncates the prompt and changes the reply."""
+        return {"num_ctx": self.num_ctx, "max_num_ctx": self.max_num_ctx, "reply_tokens": self.reply_tokens}
+
+    def build_request(self, role_config, user_message):
         messages = self.construct_messages(role_config, user_message)
 
         ollama_messages = [{"role": msg["role"], "content": msg["content"]} for msg in messages]
+        return {
+            "model": self.model,
+            "messages": ollama_messages,
+            "options": {"num_ctx": self.get_num_ctx(ollama_messages)},
+            "keep_alive": self.keep_alive
+        }
+
+    def get_num_ctx_state(self):
+        if self.num_ctx_state is None:
+            self.num_ctx_state = DiskCache(NUM_CTX_STATE_FILE)
+        return self.num_ctx_state
+
+    def remember_num_ctx(self, request_data):
+        """
+        Once a request succeeded, keep its sized window so the next run warms the
+        model up with it. Only when warming up is on, so runs that never warm up,
+        like the benchmark, do not write project state.
+        """
+        if self.num_ctx or not self.warm_up_enabled:
+            return
+        num_ctx = request_data["options"]["num_ctx"]
+        num_ctx_state = self.get_num_ctx_state()
+        if num_ctx_state.get(self.model) != num_ctx:
+            num_ctx_state.set(self.model, num_ctx)
+            num_ctx_state.save()
 
-        response: ChatResponse = chat(model=self.model, messages=ollama_messages)
+    def get_warm_up_num_ctx(self):
+        """
+        The prompt is not known yet when warming up, so use the window the last
+        request for this model was sized to: similar prompts round to the same
+        size, and the model is then not reloaded for the first request.
+        """
+        if self.num_ctx:
+            return self.num_ctx
+        return self.get_num_ctx_state().get(self.model) or MIN_NUM_CTX
+
+    def complete_chat(self, role_config, user_message):
+        request_data = self.build_request(role_config, user_message)
+
+        response: ChatResponse = self.client.chat(**request_data)
+        self.remember_num_ctx(request_data)
 
         assistant_reply = response.message.content
-        request_data = {"model": self.model, "messages": ollama_messages}
 
-        token_usage = {
-            "prompt_tokens": getattr(response, 'usage', {}).get('prompt_tokens', None),
-            "completion_tokens": getattr(response, 'usage', {}).get('completion_tokens', None),
-            "total_tokens": getattr(response, 'usage', {}).get('total_tokens', None)
-        }
+        token_usage = self.extract_usage(response)
 
         response_data = {"response": assistant_reply, "usage": token_usage}
-        return request_data, response_data, assistant_reply
\ No newline at end of file
+        return request_data, response_data, assistant_reply
+
+    async def acomplete_chat(self, role_config, user_message):
+        request_data = self.build_request(role_config, user_message)
+
+        if self.async_client is None:
+            self.async_client = AsyncClient(host=self.host)
+        response: ChatResponse = await self.async_client.chat(**request_data)
+        self.remember_num_ctx(request_data)
+
+        assistant_reply = response.message.content
+
+        token_usage = self.extract_usage(response)
+
+        response_data = {"response": assistant_reply, "usage": token_usage}
+        return request_data, response_data, assistant_reply
+
+    def stream_chat(self, role_config, user_message, on_token):
+        request_data = self.build_request(role_config, user_message)
+
+        reply_parts = []
+        response = None
+        for response in self.client.chat(**request_data, stream=True):
+            if response.message.content:
+                reply_parts.append(response.message.content)
+                on_token(response.message.content)
+
+        assistant_reply = "".join(reply_parts)
+        self.remember_num_ctx(request_data)
+
+        # Only the final chunk of the stream carries the statistics
+        token_usage = self.extract_usage(response)
+
+        response_data = {"response": assistant_reply, "usage": token_usage}
+        return request_data, response_data, assistant_reply
+
+    def wants_warm_up(self):
+        return self.warm_up_enabled
+
+    def warm_up(self):
+        """Load the model into memory with an empty request, so the first chat does not wait for it."""
+        self.client.generate(model=self.model, keep_alive=self.keep_alive,
+                             options={"num_ctx": self.get_warm_up_num_ctx()})
+
+    @staticmethod
+    def extract_usage(response):
+        """Ollama reports token counts on the final response as prompt_eval_count and eval_count."""
+        prompt_tokens = getattr(response, 'prompt_eval_count', None)
+        completion_tokens = getattr(response, 'eval_count', None)
+        total_tokens = None
+        if prompt_tokens is not None or completion_tokens is not None:
+            total_tokens = (prompt_tokens or 0) + (completion_tokens or 0)
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": total_tokens,
+            "cached_tokens": None  # Ollama keeps the prompt cache internally and does not report it
+        }
+
+    async def aclose(self):
+        await super().aclose()
+        if self.async_client is not None:
+            await self.async_client.close()
+            self.async_client = None
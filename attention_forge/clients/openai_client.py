@@ -2,10 +2,14 @@ from attention_forge.clients.base_client import BaseClient
 import openai
 
 class OpenAIClient(BaseClient):
-    
-    def __init__(self, api_key, model, project_config):
-        super().__init__(api_key, model, project_config)
-        self.client = openai.Client(api_key=api_key)
+    RETRYABLE_EXCEPTIONS = BaseClient.RETRYABLE_EXCEPTIONS + (openai.APIConnectionError,)
+
+    def __init__(self, api_key, model, project_config, http_session=None):
+        super().__init__(api_key, model, project_config, http_session)
+        # Retries are handled by BaseClient.request_chat
+        self.base_url = self.get_base_url(None)
+        self.client = openai.Client(api_key=api_key, base_url=self.base_url, max_retries=0)
+        self.async_client = None
 
     @staticmethod
     def get_name():
@@ -22,11 +26,66 @@ class OpenAIClient(BaseClient):
         assistant_reply = response.choices[0].message.content
         request_data = {"model": self.model, "messages": messages}
 
-        token_usage = {
-            "prompt_tokens": response.usage.prompt_tokens,
-            "completion_tokens": response.usage.completion_tokens,
-            "total_tokens": response.usage.total_tokens
-        }
+        token_usage = self.usage_from_sdk(response.usage)
+
+        response_data = {"response": assistant_reply, "usage": token_usage}
+        return request_data, response_data, assistant_reply
+
+    def stream_chat(self, role_config, user_message, on_token):
+        messages = self.construct_messages(role_config, user_message)
+
+        stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
 
+        reply_parts = []
+        token_usage = self.usage_from_json({})
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                reply_parts.append(chunk.choices[0].delta.content)
+                on_token(chunk.choices[0].delta.content)
+            # With include_usage, the last chunk has no choices and carries the usage
+            if chunk.usage:
+                token_usage = self.usage_from_sdk(chunk.usage)
+
+        assistant_reply = "".join(reply_parts)
+        request_data = {"model": self.model, "messages": messages}
         response_data = {"response": assistant_reply, "usage": token_usage}
-        return request_data, response_data, assistant_reply
\ No newline at end of file
+        return request_data, response_data, assistant_reply
+
+    async def acomplete_chat(self, role_config, user_message):
+        messages = self.construct_messages(role_config, user_message)
+
+        if self.async_client is None:
+            self.async_client = openai.AsyncClient(api_key=self.api_key, base_url=self.base_url, max_retries=0)
+        response = await self.async_client.chat.completions.create(
+            model=self.model,
+            messages=messages
+        )
+
+        assistant_reply = response.choices[0].message.content
+        request_data = {"model": self.model, "messages": messages}
+
+        token_usage = self.usage_from_sdk(response.usage)
+
+        response_data = {"response": assistant_reply, "usage": token_usage}
+        return request_data, response_data, assistant_reply
+
+    async def aclose(self):
+        await super().aclose()
+        if self.async_client is not None:
+            await self.async_client.close()
+            self.async_client = None
+
+    @staticmethod
+    def usage_from_sdk(usage):
+        prompt_tokens_details = getattr(usage, "prompt_tokens_details", None)
+        return {
+            "prompt_tokens": usage.prompt_tokens,
+            "completion_tokens": usage.completion_tokens,
+            "total_tokens": usage.total_tokens,
+            "cached_tokens": getattr(prompt_tokens_details, "cached_tokens", None)
+        }
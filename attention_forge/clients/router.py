@@ -0,0 +1,172 @@
+import time
+from attention_forge.disk_cache import DiskCache
+from attention_forge.clients.base_client import BaseClient
+from attention_forge.response_cache import ResponseCache
+
+ROUTER_STATS_FILE = ".attention_forge/router_stats.json"
+DEFAULT_ROUTER_SAMPLE_TTL_SECONDS = 3600
+
+
+class RouteStats:
+    """
+    Rolling latency and error samples per client/model, persisted between runs
+    so the router starts from what previous runs observed. Samples expire after
+    ttl_seconds, so a candidate demoted by a short outage is tried again later
+    instead of staying last for good.
+    """
+
+    def __init__(self, window=20, path=ROUTER_STATS_FILE, ttl_seconds=DEFAULT_ROUTER_SAMPLE_TTL_SECONDS):
+        self.window = window
+        self.ttl_seconds = ttl_seconds
+        self.cache = DiskCache(path)
+
+    def get_samples(self, route):
+        """[latency, ok, time] samples of a route that have not expired; older files lack the time."""
+        oldest = time.time() - self.ttl_seconds
+        return [sample for sample in self.cache.get(route, []) if len(sample) > 2 and sample[2] >= oldest]
+
+    def record(self, route, latency, ok):
+        samples = self.get_samples(route)
+        samples.append([round(latency, 3), ok, round(time.time(), 3)])
+        self.cache.set(route, samples[-self.window:])
+        self.cache.save()
+
+    def summarize(self, route):
+        """Return (median latency of successes or None, error rate, sample count)."""
+        samples = self.get_samples(route)
+        latencies = sorted(latency for latency, ok, _ in samples if ok)
+        error_rate = sum(1 for _, ok, _ in samples if not ok) / len(samples) if samples else 0.0
+        median_latency = latencies[len(latencies) // 2] if latencies else None
+        return median_latency, error_rate, len(samples)
+
+
+class RouterClient(BaseClient):
+    """
+    Sends each chat to the fastest healthy candidate of an ordered list of
+    client/model pairs and fails over to the next one on errors.
+    Built by ChatBuilder for steps configured with `client: auto`.
+    """
+
+    def __init__(self, candidates, project_config, route_stats=None):
+        super().__init__(None, "auto", project_config, http_session=candidates[0].http_session)
+        self.candidates = candidates
+        self.route_stats = route_stats if route_stats is not None else RouteStats(
+            window=project_config.get("router_window", 20),
+            ttl_seconds=project_config.get("router_sample_ttl_seconds", DEFAULT_ROUTER_SAMPLE_TTL_SECONDS)
+        )
+        self.max_error_rate = project_config.get("router_max_error_rate", 0.5)
+        self.min_samples = project_config.get("router_min_samples", 3)
+
+    @staticmethod
+    def get_name():
+        return "auto"
+
+    @staticmethod
+    def get_route(client):
+        return f"{client.get_name()}/{client.model}"
+
+    def get_cache_key(self, role_config, user_message):
+        messages = self.construct_messages(role_config, user_message)
+        routes = [self.get_route(client) for client in self.candidates]
+        return ResponseCache.make_key(self.get_name(), routes, {}, messages)
+
+    def rank_candidates(self):
+        """
+        Healthy candidates first, fastest median latency first. Untried candidates
+        keep their configured position ahead of measured ones, so each gets tried;
+        candidates that have only failed so far come after the measured ones.
+        Unhealthy candidates stay at the end as a last resort.
+        """
+        ranked = []
+        for position, client in enumerate(self.candidates):
+            median_latency, error_rate, samples = self.route_stats.summarize(self.get_route(client))
+            unhealthy = samples >= self.min_samples and error_rate > self.max_error_rate
+            if not samples:
+                tier = 0
+            elif median_latency is not None:
+                tier = 1
+            else:
+                tier = 2
+            sort_key = (unhealthy, tier, median_latency or 0.0, position)
+            ranked.append((sort_key, client, median_latency, error_rate))
+        ranked.sort(key=lambda entry: entry[0])
+        return [(client, median_latency, error_rate) for _, client, median_latency, error_rate in ranked]
+
+    def describe(self, ranked):
+        return ", ".join(
+            f"{self.get_route(client)} ({f'{median_latency:.1f}s' if median_latency is not None else 'untried'}, "
+            f"{error_rate:.0%} errors)"
+            for client, median_latency, error_rate in ranked
+        )
+
+    def request_chat(self, role_config, user_message, on_token=None):
+        ranked = self.rank_candidates()
+        print(f"🧭 Router candidates: {self.describe(ranked)}")
+
+        emitted = []
+
+        def forward_token(text):
+            emitted.append(True)
+            on_token(text)
+
+        attempted = []
+        for client, _, _ in ranked:
+            route = self.get_route(client)
+            attempted.append(route)
+            start_time = time.monotonic()
+            try:
+                # Fail over at once; only the last resort retries
+                result = client.request_chat(role_config, user_message,
+                                             on_token=forward_token if on_token is not None else None,
+                                             retry=len(attempted) == len(ranked))
+            except Exception as error:
+                self.route_stats.record(route, time.monotonic() - start_time, False)
+                # A partially printed reply cannot be replaced by another provider's
+                if emitted or len(attempted) == len(ranked):
+                    raise
+                print(f"\n⚠️ Router: {route} failed ({error}). Failing over.")
+                continue
+            self.route_stats.record(route, time.monotonic() - start_time, True)
+            return self.record_route(result, client, attempted)
+
+    async def arequest_chat(self, role_config, user_message):
+        ranked = self.rank_candidates()
+        print(f"🧭 Router candidates: {self.describe(ranked)}")
+
+        attempted = []
+        for client, _, _ in ranked:
+            route = self.get_route(client)
+            attempted.append(route)
+            start_time = time.monotonic()
+            try:
+                result = await client.arequest_chat(role_config, user_message, retry=len(attempted) == len(ranked))
+            except Exception as error:
+                self.route_stats.record(route, time.monotonic() - start_time, False)
+                if len(attempted) == len(ranked):
+                    raise
+                print(f"⚠️ Router: {route} failed ({error}). Failing over.")
+                continue
+            self.route_stats.record(route, time.monotonic() - start_time, True)
+            return self.record_route(result, client, attempted)
+
+    def record_route(self, result, client, attempted):
+        """Note the candidate that answered; Chat logs its client and model instead of "auto"."""
+        request_data, response_data, assistant_reply = result
+        route = self.get_route(client)
+        response_data["route"] = {"selected": route, "attempted": attempted,
+                                  "client": client.get_name(), "model": client.model}
+        print(f"🧭 Router: answered by {route}.")
+        return request_data, response_data, assistant_reply
+
+    def complete_chat(self, role_config, user_message):
+        return self.request_chat(role_config, user_message)
+
+    def stream_chat(self, role_config, user_message, on_token):
+        return self.request_chat(role_config, user_message, on_token=on_token)
+
+    async def acomplete_chat(self, role_config, user_message):
+        return await self.arequest_chat(role_config, user_message)
+
+    async def aclose(self):
+        for client in self.candidates:
+            await client.aclose()
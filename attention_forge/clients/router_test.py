@@ -0,0 +1,111 @@
+import os
+import requests
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+from attention_forge.clients.base_client import BaseClient
+from attention_forge.clients.router import RouterClient, RouteStats
+
+class FakeProviderClient(BaseClient):
+    def __init__(self, name, error=None):
+        super().__init__(None, f"{name}-model", {}, http_session=MagicMock())
+        self.name = name
+        self.error = error
+        self.calls = 0
+
+    def get_name(self):
+        return self.name
+
+    def complete_chat(self, role_config, user_message):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return {}, {"response": self.name, "usage": {}}, self.name
+
+class TestRouterClient(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.route_stats = RouteStats(path=os.path.join(self.temp_dir.name, "router_stats.json"))
+        BaseClient.provider_stats.clear()
+
+    @patch('builtins.print')
+    def test_fails_over_and_records_the_decision(self, mock_print):
+        failing = FakeProviderClient("deepseek", error=KeyError("boom"))
+        fallback = FakeProviderClient("openai")
+        router = RouterClient([failing, fallback], {}, self.route_stats)
+
+        _, response_data, reply = router.request_chat({}, "hello")
+
+        self.assertEqual(reply, "openai")
+        self.assertEqual(response_data["route"], {
+            "selected": "openai/openai-model", "attempted": ["deepseek/deepseek-model", "openai/openai-model"],
+            "client": "openai", "model": "openai-model"
+        })
+        self.assertEqual(self.route_stats.summarize("deepseek/deepseek-model")[1], 1.0)
+
+    def test_prefers_the_fastest_healthy_candidate(self):
+        slow, fast, broken = FakeProviderClient("slow"), FakeProviderClient("fast"), FakeProviderClient("broken")
+        for _ in range(3):
+            self.route_stats.record("slow/slow-model", 5.0, True)
+            self.route_stats.record("fast/fast-model", 1.0, True)
+            self.route_stats.record("broken/broken-model", 0.1, False)
+        router = RouterClient([broken, slow, fast], {}, self.route_stats)
+
+        ranked = [client.get_name() for client, _, _ in router.rank_candidates()]
+
+        self.assertEqual(ranked, ["fast", "slow", "broken"])
+
+    @patch('builtins.print')
+    def test_untried_candidates_keep_their_position(self, mock_print):
+        self.route_stats.record("measured/measured-model", 1.0, True)
+        untried, measured = FakeProviderClient("untried"), FakeProviderClient("measured")
+        router = RouterClient([untried, measured], {}, self.route_stats)
+
+        router.request_chat({}, "hello")
+
+        self.assertEqual((untried.calls, measured.calls), (1, 0))
+
+    def test_candidates_that_only_failed_rank_after_measured_ones(self):
+        self.route_stats.record("failing/failing-model", 0.1, False)
+        self.route_stats.record("measured/measured-model", 4.0, True)
+        failing, measured, untried = (FakeProviderClient("failing"), FakeProviderClient("measured"),
+                                      FakeProviderClient("untried"))
+        router = RouterClient([failing, measured, untried], {}, self.route_stats)
+
+        ranked = [client.get_name() for client, _, _ in router.rank_candidates()]
+
+        self.assertEqual(ranked, ["untried", "measured", "failing"])
+
+    @patch('builtins.print')
+    @patch('attention_forge.clients.base_client.time.sleep')
+    def test_only_the_last_candidate_retries(self, mock_sleep, mock_print):
+        first = FakeProviderClient("first", error=requests.ConnectionError("refused"))
+        last = FakeProviderClient("last", error=requests.ConnectionError("refused"))
+        router = RouterClient([first, last], {}, self.route_stats)
+
+        with self.assertRaises(requests.ConnectionError):
+            router.request_chat({}, "hello")
+
+        # The last candidate makes its first attempt plus the default 4 retries
+        self.assertEqual((first.calls, last.calls), (1, 5))
+
+    def test_unhealthy_candidate_recovers_once_its_failures_expire(self):
+        for _ in range(3):
+            self.route_stats.record("flaky/flaky-model", 0.1, False)
+            self.route_stats.record("steady/steady-model", 2.0, True)
+        flaky, steady = FakeProviderClient("flaky"), FakeProviderClient("steady")
+        router = RouterClient([flaky, steady], {}, self.route_stats)
+        self.assertEqual([client.get_name() for client, _, _ in router.rank_candidates()], ["steady", "flaky"])
+
+        later = time.time() + self.route_stats.ttl_seconds + 1
+        with patch('attention_forge.clients.router.time.time', return_value=later):
+            self.route_stats.record("steady/steady-model", 2.0, True)
+            ranked = router.rank_candidates()
+        # The outage is forgotten: flaky is untried again and gets its configured position back
+        self.assertEqual([(client.get_name(), error_rate) for client, _, error_rate in ranked],
+                         [("flaky", 0.0), ("steady", 0.0)])
+
+if __name__ == "__main__":
+    unittest.main()
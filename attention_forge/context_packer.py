@@ -0,0 +1,51 @@
+from attention_forge.token_estimator import estimate_tokens
+
+
+class ContextPacker:
+    """
+    Packs context entries into a token budget. Entries are admitted in priority
+    order; an entry that does not fit is truncated if a useful amount of budget
+    is left, otherwise dropped. The packed result keeps the original order.
+    """
+    MIN_TRUNCATED_TOKENS = 256
+
+    def __init__(self, max_tokens):
+        self.max_tokens = max_tokens
+
+    def pack(self, entries):
+        """
+        entries: list of (key, content, priority) where a lower priority is packed first.
+        Returns (packed, dropped, truncated, used_tokens); packed maps key to content.
+        """
+        admitted = {}
+        dropped = []
+        truncated = []
+        used_tokens = 0
+
+        for key, content, _ in sorted(entries, key=lambda entry: entry[2]):
+            tokens = estimate_tokens(content)
+            remaining = self.max_tokens - used_tokens
+            if tokens <= remaining:
+                admitted[key] = content
+                used_tokens += tokens
+            elif remaining >= self.MIN_TRUNCATED_TOKENS:
+                admitted[key] = self.truncate(content, tokens, remaining)
+                used_tokens += estimate_tokens(admitted[key])
+                truncated.append((key, tokens, remaining))
+            else:
+                dropped.append((key, tokens))
+
+        packed = {key: admitted[key] for key, _, _ in entries if key in admitted}
+        return packed, dropped, truncated, used_tokens
+
+    @staticmethod
+    def truncate(content, tokens, budget):
+        # Leave room for the truncation marker and keep the code fence closed
+        closing = "\n```" if content.rstrip().endswith("```") else ""
+        marker = f"\n... [truncated to fit the context budget: {budget} of {tokens} tokens kept]"
+        keep_chars = max(0, int(len(content) * (budget - 32) / tokens))
+        truncated = content[:keep_chars] + marker + closing
+        while keep_chars and estimate_tokens(truncated) > budget:
+            keep_chars = int(keep_chars * 0.9)
+            truncated = content[:keep_chars] + marker + closing
+        return truncated
@@ -0,0 +1,32 @@
+import unittest
+from attention_forge.context_packer import ContextPacker
+from attention_forge.token_estimator import estimate_tokens
+
+class TestContextPacker(unittest.TestCase):
+    def test_everything_fits(self):
+        entries = [("a", "alpha", (0,)), ("b", "beta", (1,))]
+        packed, dropped, truncated, used_tokens = ContextPacker(1000).pack(entries)
+        self.assertEqual(packed, {"a": "alpha", "b": "beta"})
+        self.assertEqual(dropped, [])
+        self.assertEqual(truncated, [])
+        self.assertEqual(used_tokens, estimate_tokens("alpha") + estimate_tokens("beta"))
+
+    def test_priority_decides_what_is_dropped_and_order_is_kept(self):
+        big = "x" * 4000  # ~1000 tokens
+        entries = [("late", big, (1,)), ("early", big, (0,))]
+        packed, dropped, truncated, _ = ContextPacker(1100).pack(entries)
+        self.assertEqual(list(packed), ["early"])
+        self.assertEqual(dropped, [("late", 1000)])
+        self.assertEqual(truncated, [])
+
+    def test_truncates_when_enough_budget_is_left(self):
+        content = "### `a.py`\n```python\n" + "y = 1\n" * 2000 + "```"
+        packed, dropped, truncated, used_tokens = ContextPacker(600).pack([("a.py", content, (0,))])
+        self.assertEqual(dropped, [])
+        self.assertEqual(truncated[0][0], "a.py")
+        self.assertLessEqual(used_tokens, 600)
+        self.assertIn("truncated to fit the context budget", packed["a.py"])
+        self.assertTrue(packed["a.py"].endswith("```"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import json
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows has no flock, and no inotify watcher either
+    fcntl = None
+
+SNAPSHOT_FILE = ".attention_forge/context_snapshot.json"
+WATCHER_STATE_FILE = ".attention_forge/context_watcher.json"
+WATCHER_LOCK_FILE = ".attention_forge/context_watcher.lock"
+
+
+def write_json_atomic(path, data):
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def read_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def hold_watcher_lock():
+    """
+    Take the lock that marks a running watcher. The kernel releases it when the
+    process ends, even when it is killed, so a state file left behind is never
+    mistaken for a live watcher. Returns the open lock file to keep, or None if
+    another watcher holds the lock.
+    """
+    directory = os.path.dirname(WATCHER_LOCK_FILE)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory)
+    lock_file = open(WATCHER_LOCK_FILE, "a")
+    try:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+def is_watcher_running():
+    """True while a watcher process holds the watcher lock."""
+    if fcntl is None:
+        return False
+    try:
+        lock_file = open(WATCHER_LOCK_FILE, "r")
+    except FileNotFoundError:
+        return False
+    with lock_file:
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_SH | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+    return False
+
+
+def write_watcher_state(received_generation, snapshot_generation, fingerprint):
+    """
+    received_generation is bumped as soon as the watcher sees file changes;
+    snapshot_generation once they are reflected in the snapshot.
+    """
+    write_json_atomic(WATCHER_STATE_FILE, {
+        "pid": os.getpid(),
+        "fingerprint": fingerprint,
+        "received_generation": received_generation,
+        "snapshot_generation": snapshot_generation
+    })
+
+
+def write_snapshot(generation, fingerprint, loaded_files, file_signatures, tree_entries):
+    write_json_atomic(SNAPSHOT_FILE, {
+        "generation": generation,
+        "fingerprint": fingerprint,
+        "loaded_files": loaded_files,
+        "file_signatures": file_signatures,
+        "tree_entries": sorted(tree_entries)
+    })
+
+
+def remove_watcher_state():
+    if os.path.exists(WATCHER_STATE_FILE):
+        os.remove(WATCHER_STATE_FILE)
+
+
+def read_fresh_snapshot(fingerprint, wait_seconds=2.0):
+    """
+    Return the watcher snapshot if a live watcher built it from the same context
+    inputs and has applied every change it received, otherwise None. Freshness is
+    decided from the generation counters alone, without walking the tree.
+    """
+    state = read_json(WATCHER_STATE_FILE)
+    if not state or state.get("fingerprint") != fingerprint or not is_watcher_running():
+        return None
+
+    deadline = time.monotonic() + wait_seconds
+    while True:
+        if state and state["received_generation"] == state["snapshot_generation"]:
+            snapshot = read_json(SNAPSHOT_FILE)
+            if (snapshot and snapshot.get("fingerprint") == fingerprint
+                    and snapshot.get("generation") == state["snapshot_generation"]):
+                return snapshot
+        if time.monotonic() > deadline:
+            print("⚠️ The context watcher is still catching up. Loading the context directly.")
+            return None
+        time.sleep(0.05)
+        state = read_json(WATCHER_STATE_FILE)
@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+from attention_forge import context_snapshot
+from attention_forge.context_snapshot import (
+    read_fresh_snapshot, write_snapshot, write_watcher_state, hold_watcher_lock, is_watcher_running
+)
+
+class TestContextSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.previous_cwd = os.getcwd()
+        os.chdir(self.temp_dir.name)
+        self.addCleanup(os.chdir, self.previous_cwd)
+
+    def hold_lock(self):
+        lock_file = hold_watcher_lock()
+        self.addCleanup(lock_file.close)
+        return lock_file
+
+    def test_fresh_snapshot(self):
+        self.hold_lock()
+        write_snapshot(2, "fp", {"a.py": "content"}, {"a.py": "sig"}, set())
+        write_watcher_state(2, 2, "fp")
+        snapshot = read_fresh_snapshot("fp")
+        self.assertEqual(snapshot["loaded_files"], {"a.py": "content"})
+
+    def test_fingerprint_mismatch(self):
+        self.hold_lock()
+        write_snapshot(1, "fp", {}, {}, set())
+        write_watcher_state(1, 1, "fp")
+        self.assertIsNone(read_fresh_snapshot("other"))
+
+    def test_pending_changes_time_out(self):
+        self.hold_lock()
+        write_snapshot(1, "fp", {}, {}, set())
+        write_watcher_state(2, 1, "fp")
+        self.assertIsNone(read_fresh_snapshot("fp", wait_seconds=0.1))
+
+    def test_no_watcher(self):
+        self.assertFalse(os.path.exists(context_snapshot.WATCHER_STATE_FILE))
+        self.assertIsNone(read_fresh_snapshot("fp"))
+
+    def test_state_left_by_a_killed_watcher_is_ignored(self):
+        lock_file = self.hold_lock()
+        write_snapshot(1, "fp", {}, {}, set())
+        write_watcher_state(1, 1, "fp")
+        self.assertTrue(is_watcher_running())
+        self.assertIsNone(hold_watcher_lock())  # A second watcher is refused
+
+        lock_file.close()  # What the kernel does when the watcher is killed
+        self.assertFalse(is_watcher_running())
+        self.assertIsNone(read_fresh_snapshot("fp"))
+
+if __name__ == "__main__":
+    unittest.main()
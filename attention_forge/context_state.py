@@ -0,0 +1,47 @@
+import os
+import json
+
+CONTEXT_STATE_FILE = ".attention_forge/context_state.json"
+
+
+class ContextState:
+    """File signatures of the context sent by the previous run, persisted between runs."""
+
+    def __init__(self, state_file=CONTEXT_STATE_FILE):
+        self.state_file = state_file
+        self.previous_signatures = self.load()
+
+    def load(self):
+        if not os.path.isfile(self.state_file):
+            return {}
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as state:
+                return json.load(state).get("signatures", {})
+        except (json.JSONDecodeError, OSError):
+            return {}
+
+    def is_changed(self, path, signature):
+        return self.previous_signatures.get(path) != signature
+
+    def save(self, signatures):
+        directory = os.path.dirname(self.state_file)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with open(self.state_file, "w", encoding="utf-8") as state:
+            json.dump({"signatures": signatures}, state, separators=(",", ":"))
+
+
+class DeltaContext(dict):
+    """
+    Context entries of a delta load. The signatures are saved only once a chat
+    request carrying them succeeds, so a failed or aborted run does not make the
+    next one assume the model saw files it never received.
+    """
+
+    def __init__(self, entries, context_state, signatures):
+        super().__init__(entries)
+        self.context_state = context_state
+        self.signatures = signatures
+
+    def commit(self):
+        self.context_state.save(self.signatures)
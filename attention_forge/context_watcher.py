@@ -0,0 +1,311 @@
+import os
+import sys
+import select
+import struct
+import ctypes
+import ctypes.util
+import argparse
+from pathlib import Path
+
+from attention_forge.api_key_loader import ApiKeyLoader
+from attention_forge.config_loader import load_project_config
+from attention_forge.chain_steps.context_loader_step import ContextLoader
+from attention_forge.context_snapshot import (
+    write_snapshot, write_watcher_state, remove_watcher_state, hold_watcher_lock
+)
+
+BUILD_DIR = ".attention_forge"
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = (IN_CLOSE_WRITE | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+              | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+STRUCTURE_EVENTS = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO
+EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, name length
+
+
+class Inotify:
+    """Minimal ctypes binding to the Linux inotify API."""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.libc = libc
+        self.fd = libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+
+    def add_watch(self, path, mask=WATCH_MASK):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), path)
+        return wd
+
+    def read_events(self, timeout=None):
+        """Return a list of (wd, mask, name) events; empty if none arrived within timeout."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        data = os.read(self.fd, 64 * 1024)
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, name_length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + name_length].rstrip(b"\0")
+            offset += name_length
+            events.append((wd, mask, os.fsdecode(name)))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class ContextWatcher:
+    """
+    Keeps a formatted context snapshot in .attention_forge/ up-to-date by
+    watching the indexed directories with inotify. Changed files are re-read
+    and changed directories re-listed one level deep; nothing is re-walked
+    unless the context config, .gitignore or the git index layout changes.
+    """
+
+    def __init__(self, context_loader, debounce_seconds=0.2):
+        self.loader = context_loader
+        self.debounce_seconds = debounce_seconds
+        self.inotify = Inotify()
+        self.watches = {}  # wd -> directory
+        self.watched_dirs = set()
+        self.received_generation = 0
+        self.snapshot_generation = 0
+        self.build_dir = str(Path(BUILD_DIR).resolve())
+        self.reload_triggers = {
+            str(Path(ContextLoader.CONTEXT_CONFIG_FILE).resolve()),
+            str(Path(".gitignore").resolve())
+        }
+
+    def run(self):
+        self.full_reload()
+        self.publish_snapshot()
+        print(f"👀 Watching {len(self.watched_dirs)} directories. Press Ctrl+C to stop.")
+
+        while True:
+            events = self.inotify.read_events()
+            if not events:
+                continue
+
+            # Announce pending changes first so readers do not use a stale snapshot
+            self.received_generation += 1
+            write_watcher_state(self.received_generation, self.snapshot_generation, self.loader.context_fingerprint)
+
+            while True:
+                more_events = self.inotify.read_events(self.debounce_seconds)
+                if not more_events:
+                    break
+                events.extend(more_events)
+
+            self.apply_events(events)
+            self.publish_snapshot()
+
+    def full_reload(self):
+        self.loader.reset()
+        self.include_paths, self.tree_paths, self.ignore_specs = self.loader.load_config_and_ignore_paths()
+        self.include_roots = [str(Path(path).resolve()) for path in self.include_paths]
+        self.loader.load_paths(self.include_paths, self.tree_paths, self.ignore_specs)
+        self.watch_indexed_directories()
+        print(f"🔄 Context reloaded: {len(self.loader.loaded_files)} entries.")
+
+    def watch_indexed_directories(self):
+        directories = set(self.loader.directory_index.entries)
+        directories.add(os.getcwd())
+        directories.update(os.path.dirname(root) for root in self.include_roots if os.path.isfile(root))
+        for directory in directories - self.watched_dirs:
+            if self.is_in_build_dir(directory):
+                continue
+            try:
+                self.watches[self.inotify.add_watch(directory)] = directory
+                self.watched_dirs.add(directory)
+            except OSError as e:
+                print(f"⚠️ Warning: Could not watch {directory}: {e}")
+
+    def is_in_build_dir(self, path):
+        return path == self.build_dir or path.startswith(self.build_dir + os.sep)
+
+    def apply_events(self, events):
+        changed_dirs = set()
+        changed_files = set()
+        needs_reload = False
+
+        for wd, mask, name in events:
+            if mask & IN_Q_OVERFLOW:
+                needs_reload = True
+                continue
+            directory = self.watches.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                del self.watches[wd]
+                self.watched_dirs.discard(directory)
+                continue
+            if not name:
+                continue  # Events on the watched directory itself are seen by its parent
+
+            path = os.path.join(directory, name)
+            if self.is_in_build_dir(path):
+                continue
+            if path in self.reload_triggers:
+                needs_reload = True
+            if mask & STRUCTURE_EVENTS:
+                changed_dirs.add(directory)
+            if not mask & IN_ISDIR:
+                changed_files.add(path)
+
+        # The git index decides which files exist, so structure changes need a rebuild
+        if needs_reload or (changed_dirs and self.loader.git_tree is not None):
+            self.full_reload()
+            return
+
+        for directory in changed_dirs:
+            self.relist_directory(directory)
+        for path in changed_files:
+            self.refresh_file(path)
+
+        self.watch_indexed_directories()
+        for dir_path in self.tree_paths:
+            self.loader.load_tree_structure(dir_path, self.ignore_specs)
+        self.loader.loaded_files = self.ordered_loaded_files()
+
+    def relist_directory(self, directory):
+        """Refresh one directory level of the index; walk only newly created subdirectories."""
+        index = self.loader.directory_index
+        if directory not in index.entries:
+            return
+        old_dirnames, _ = index.entries[directory]
+        _, dirnames, filenames = next(os.walk(directory), (directory, [], []))
+
+        rel_directory = os.path.relpath(directory)
+        if not self.ignore_specs.is_clean(rel_directory):
+            filenames = [filename for filename in filenames
+                         if not self.ignore_specs.match_in_directory(rel_directory, filename)]
+        index.add(directory, dirnames, filenames)
+
+        for dirname in set(old_dirnames) - set(dirnames):
+            self.forget_subtree(os.path.join(directory, dirname))
+        for dirname in set(dirnames) - set(old_dirnames):
+            self.loader.walk_into_index(os.path.join(directory, dirname), self.ignore_specs)
+            for file_path in index.list_files(os.path.join(directory, dirname)):
+                self.refresh_file(file_path)
+
+    def forget_subtree(self, directory):
+        prefix = directory + os.sep
+        index = self.loader.directory_index
+        for dirpath in [dirpath for dirpath in index.entries if dirpath == directory or dirpath.startswith(prefix)]:
+            del index.entries[dirpath]
+        for path in [path for path in self.loader.loaded_files if path.startswith(prefix)]:
+            self.loader.forget_file(path)
+
+    def is_included(self, path):
+        if path in self.include_roots:
+            return True
+        directory, filename = os.path.split(path)
+        entry = self.loader.directory_index.entries.get(directory)
+        if entry is None or filename not in entry[1]:
+            return False
+        return any(path.startswith(root.rstrip(os.sep) + os.sep) for root in self.include_roots)
+
+    def refresh_file(self, path):
+        if path in self.loader.tree_entries:
+            return
+        if not os.path.isfile(path) or not self.is_included(path):
+            self.loader.forget_file(path)
+            return
+        self.loader.process_file(path, self.ignore_specs)
+
+    def ordered_loaded_files(self):
+        """Order entries exactly like a fresh load: include_paths order, then trees."""
+        loaded_files = self.loader.loaded_files
+        ordered = {}
+        for root in self.include_roots:
+            paths = [root] if root in loaded_files else self.loader.directory_index.list_files(root)
+            for path in paths:
+                if path in loaded_files:
+                    ordered[path] = loaded_files[path]
+        for path, content in loaded_files.items():
+            if path not in ordered:
+                ordered[path] = content
+        return ordered
+
+    def publish_snapshot(self):
+        self.snapshot_generation = self.received_generation
+        write_snapshot(self.snapshot_generation, self.loader.context_fingerprint, self.loader.loaded_files,
+                       self.loader.file_signatures, self.loader.tree_entries)
+        write_watcher_state(self.received_generation, self.snapshot_generation, self.loader.context_fingerprint)
+        if self.loader.context_cache is not None:
+            self.loader.context_cache.save()
+
+    def close(self):
+        remove_watcher_state()
+        self.inotify.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Keep the Attention Forge context warm between runs by watching include_paths and tree_paths."
+    )
+    parser.add_argument(
+        "project_config_path",
+        nargs="?",
+        default="attention_forge_project.yaml",
+        help="Path to the project config file. Defaults to 'attention_forge_project.yaml'."
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=0.2,
+        help="Seconds to wait for more file events before refreshing the snapshot."
+    )
+    args = parser.parse_args()
+
+    if not sys.platform.startswith("linux"):
+        print("❌ The context watcher relies on inotify and is only available on Linux.")
+        sys.exit(1)
+
+    try:
+        project_config = load_project_config(args.project_config_path)
+        api_key_loader = ApiKeyLoader(
+            api_keys_dir=project_config.get("api_keys_dir", "api-keys"),
+            additional_api_key_file=project_config.get("api_key_file", None)
+        )
+    except Exception as e:
+        print(f"Configuration error: {e}")
+        sys.exit(1)
+
+    lock_file = hold_watcher_lock()
+    if lock_file is None:
+        print("❌ Another context watcher is already running for this project.")
+        sys.exit(1)
+
+    watcher = ContextWatcher(ContextLoader(api_key_loader, interactive=False), args.debounce)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        print("\n👋 Context watcher stopped.")
+    finally:
+        watcher.close()
+        lock_file.close()
+
+
+if __name__ == "__main__":
+    main()
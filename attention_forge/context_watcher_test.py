@@ -0,0 +1,124 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from attention_forge.chain_steps.context_loader_step import ContextLoader
+from attention_forge.context_watcher import (
+    ContextWatcher, IN_CLOSE_WRITE, IN_CREATE, IN_DELETE, IN_ISDIR, IN_MOVED_FROM, IN_MOVED_TO, IN_Q_OVERFLOW
+)
+
+class TestContextWatcher(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.root = os.path.realpath(self.temp_dir.name)
+        self.previous_cwd = os.getcwd()
+        os.chdir(self.root)
+        self.addCleanup(os.chdir, self.previous_cwd)
+        patch('builtins.print').start()
+        self.addCleanup(patch.stopall)
+
+        self.src = os.path.join(self.root, "src")
+        os.makedirs(self.src)
+        self.write("src/a.py", "a = 1\n")
+        self.write("src/b.py", "b = 2\n")
+        self.write_context_config()
+
+    def write(self, name, content):
+        path = os.path.join(self.root, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+    def write_context_config(self, **options):
+        options = {"use_context_cache": False, **options}
+        lines = ["include_paths:", "  - src"] + [f"{key}: {value}" for key, value in options.items()]
+        self.write(ContextLoader.CONTEXT_CONFIG_FILE, "\n".join(lines) + "\n")
+
+    def start_watcher(self):
+        api_key_loader = MagicMock()
+        api_key_loader.get_loaded_files.return_value = []
+        with patch('attention_forge.context_watcher.Inotify') as inotify_class:
+            inotify_class.return_value.add_watch.side_effect = range(1, 1000)
+            watcher = ContextWatcher(ContextLoader(api_key_loader, interactive=False))
+        watcher.full_reload()
+        return watcher
+
+    @staticmethod
+    def wd(watcher, directory):
+        return next(wd for wd, watched in watcher.watches.items() if watched == directory)
+
+    def fresh_load(self):
+        """The entries a full load of the current tree produces, in order."""
+        return self.start_watcher().loader.loaded_files
+
+    def test_created_file_is_loaded_in_include_order(self):
+        watcher = self.start_watcher()
+        self.write("src/0_first.py", "first = 0\n")
+        watcher.apply_events([(self.wd(watcher, self.src), IN_CREATE, "0_first.py"),
+                              (self.wd(watcher, self.src), IN_CLOSE_WRITE, "0_first.py")])
+
+        self.assertIn("first = 0", watcher.loader.loaded_files[os.path.join(self.src, "0_first.py")])
+        self.assertEqual(list(watcher.loader.loaded_files), list(self.fresh_load()))
+
+    def test_deleted_file_is_forgotten_with_its_bytes(self):
+        watcher = self.start_watcher()
+        os.remove(os.path.join(self.src, "a.py"))
+        watcher.apply_events([(self.wd(watcher, self.src), IN_DELETE, "a.py")])
+
+        self.assertEqual(list(watcher.loader.loaded_files), [os.path.join(self.src, "b.py")])
+        self.assertEqual(watcher.loader.loaded_bytes, len(watcher.loader.loaded_files[os.path.join(self.src, "b.py")]))
+
+    def test_renamed_file_moves(self):
+        watcher = self.start_watcher()
+        os.rename(os.path.join(self.src, "a.py"), os.path.join(self.src, "c.py"))
+        watcher.apply_events([(self.wd(watcher, self.src), IN_MOVED_FROM, "a.py"),
+                              (self.wd(watcher, self.src), IN_MOVED_TO, "c.py")])
+
+        self.assertEqual(watcher.loader.loaded_files, self.fresh_load())
+        self.assertNotIn(os.path.join(self.src, "a.py"), watcher.loader.file_signatures)
+
+    def test_created_and_removed_subdirectory(self):
+        watcher = self.start_watcher()
+        os.makedirs(os.path.join(self.src, "pkg"))
+        self.write("src/pkg/mod.py", "mod = 3\n")
+        watcher.apply_events([(self.wd(watcher, self.src), IN_CREATE | IN_ISDIR, "pkg")])
+        self.assertIn(os.path.join(self.src, "pkg", "mod.py"), watcher.loader.loaded_files)
+        self.assertIn(os.path.join(self.src, "pkg"), watcher.watched_dirs)
+
+        shutil.rmtree(os.path.join(self.src, "pkg"))
+        watcher.apply_events([(self.wd(watcher, self.src), IN_DELETE | IN_ISDIR, "pkg")])
+        self.assertEqual(watcher.loader.loaded_files, self.fresh_load())
+
+    def test_queue_overflow_reloads_everything(self):
+        watcher = self.start_watcher()
+        self.write("src/unseen.py", "unseen = 4\n")  # No event for it: the queue overflowed
+        watcher.apply_events([(-1, IN_Q_OVERFLOW, "")])
+        self.assertIn(os.path.join(self.src, "unseen.py"), watcher.loader.loaded_files)
+
+    def test_gitignore_change_reloads_everything(self):
+        watcher = self.start_watcher()
+        self.write(".gitignore", "src/b.py\n")
+        watcher.apply_events([(self.wd(watcher, self.root), IN_CLOSE_WRITE, ".gitignore")])
+        self.assertEqual(list(watcher.loader.loaded_files), [os.path.join(self.src, "a.py")])
+
+    def test_repeated_saves_do_not_use_up_max_total_bytes(self):
+        self.write_context_config(max_total_bytes=400)
+        watcher = self.start_watcher()
+        path = os.path.join(self.src, "a.py")
+        for version in range(20):
+            self.write("src/a.py", f"a = {version}\n" + "#" * version)
+            watcher.apply_events([(self.wd(watcher, self.src), IN_CLOSE_WRITE, "a.py")])
+            self.assertIn(f"a = {version}\n", watcher.loader.loaded_files[path])
+        self.assertEqual(watcher.loader.loaded_bytes,
+                         sum(len(content) for content in watcher.loader.loaded_files.values()))
+
+        # A file that grows past the budget is dropped, not kept with stale content
+        self.write("src/a.py", "a = 'big'\n" + "#" * 400)
+        watcher.apply_events([(self.wd(watcher, self.src), IN_CLOSE_WRITE, "a.py")])
+        self.assertNotIn(path, watcher.loader.loaded_files)
+        self.assertEqual(watcher.loader.loaded_bytes, len(watcher.loader.loaded_files[os.path.join(self.src, "b.py")]))
+
+if __name__ == "__main__":
+    unittest.main()
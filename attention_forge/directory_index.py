@@ -0,0 +1,39 @@
+import os
+
+
+class DirectoryIndex:
+    """
+    Shared index of walked directories. Each entry keeps the subdirectories and
+    files that survived ignore filtering, so one walk can feed both the file list
+    for include_paths and the structure for tree_paths.
+    """
+
+    def __init__(self):
+        self.entries = {}  # dirpath -> (dirnames, filenames)
+        self.roots = set()  # directories whose whole subtree has been walked
+
+    def add(self, dirpath, dirnames, filenames):
+        self.entries[dirpath] = (list(dirnames), list(filenames))
+
+    def add_root(self, directory):
+        self.roots.add(directory)
+
+    def covers(self, directory):
+        """Return True if the subtree of directory was already walked."""
+        if directory in self.roots:
+            return True
+        return any(directory.startswith(root.rstrip(os.sep) + os.sep) for root in self.roots)
+
+    def walk(self, directory):
+        """Yield (dirpath, dirnames, filenames) top-down, in the order os.walk would."""
+        if directory not in self.entries:
+            return
+        dirnames, filenames = self.entries[directory]
+        yield directory, dirnames, filenames
+        for dirname in dirnames:
+            yield from self.walk(os.path.join(directory, dirname))
+
+    def list_files(self, directory):
+        return [os.path.join(dirpath, filename)
+                for dirpath, _, filenames in self.walk(directory)
+                for filename in filenames]
@@ -0,0 +1,123 @@
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+
+
+class DiskCache:
+    """
+    A small JSON-backed key/value store with LRU eviction.
+    Entries are kept in least-recently-used order and evicted once the
+    configured byte or entry cap is exceeded. Optional TTL expiry.
+    """
+
+    def __init__(self, path, max_bytes=None, max_entries=None, ttl_seconds=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.dirty = False
+        self.lock = threading.Lock()
+        self.load()
+
+    @staticmethod
+    def entry_size(value):
+        if isinstance(value, str):
+            return len(value)
+        return len(json.dumps(value))
+
+    def is_expired(self, entry, now=None):
+        if not self.ttl_seconds:
+            return False
+        now = now if now is not None else time.time()
+        return now - entry.get("created", 0) > self.ttl_seconds
+
+    def load(self):
+        """Load entries from disk. A missing or malformed file yields an empty cache."""
+        if not os.path.isfile(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as cache_file:
+                stored_entries = json.load(cache_file)
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"⚠️ Warning: Ignoring unreadable cache file {self.path}: {e}")
+            return
+
+        now = time.time()
+        for key, entry in stored_entries:
+            if self.is_expired(entry, now):
+                self.dirty = True
+                continue
+            self.entries[key] = entry
+            self.total_bytes += entry.get("size", 0)
+        self.evict()
+
+    def get(self, key, default=None):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            if self.is_expired(entry):
+                self.remove_entry(key)
+                self.misses += 1
+                return default
+            # A hit only reorders the entries; that alone is not worth rewriting the
+            # whole file, so the new order is saved with the next real change
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry["value"]
+
+    def set(self, key, value):
+        with self.lock:
+            if key in self.entries:
+                self.remove_entry(key)
+            size = self.entry_size(value)
+            self.entries[key] = {"value": value, "size": size, "created": time.time()}
+            self.total_bytes += size
+            self.dirty = True
+            self.evict()
+
+    def remove_entry(self, key):
+        entry = self.entries.pop(key)
+        self.total_bytes -= entry.get("size", 0)
+        self.dirty = True
+
+    def evict(self):
+        """Drop least-recently-used entries until the cache fits its caps."""
+        while self.entries and (
+            (self.max_bytes is not None and self.total_bytes > self.max_bytes)
+            or (self.max_entries is not None and len(self.entries) > self.max_entries)
+        ):
+            key = next(iter(self.entries))
+            self.remove_entry(key)
+            self.evictions += 1
+
+    def save(self):
+        """Write the cache atomically. Does nothing if nothing changed."""
+        with self.lock:
+            if not self.dirty:
+                return
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as cache_file:
+                json.dump(list(self.entries.items()), cache_file, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self.entries),
+            "bytes": self.total_bytes
+        }
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from attention_forge.disk_cache import DiskCache
+
+class TestDiskCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.cache_path = os.path.join(self.temp_dir.name, "cache", "cache.json")
+
+    def test_get_and_set(self):
+        cache = DiskCache(self.cache_path)
+        self.assertIsNone(cache.get("missing"))
+        cache.set("key", "value")
+        self.assertEqual(cache.get("key"), "value")
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_lru_eviction_by_entries(self):
+        cache = DiskCache(self.cache_path, max_entries=2)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")  # "b" becomes least recently used
+        cache.set("c", "3")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "1")
+        self.assertEqual(cache.get("c"), "3")
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_lru_eviction_by_bytes(self):
+        cache = DiskCache(self.cache_path, max_bytes=10)
+        cache.set("a", "x" * 6)
+        cache.set("b", "y" * 6)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["bytes"], 6)
+
+    def test_persists_across_instances(self):
+        cache = DiskCache(self.cache_path)
+        cache.set("a", {"nested": [1, 2]})
+        cache.save()
+
+        reloaded = DiskCache(self.cache_path)
+        self.assertEqual(reloaded.get("a"), {"nested": [1, 2]})
+
+    def test_reads_alone_do_not_rewrite_the_file(self):
+        cache = DiskCache(self.cache_path)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.save()
+        modified = os.stat(self.cache_path).st_mtime_ns
+
+        reloaded = DiskCache(self.cache_path, max_entries=2)
+        self.assertEqual(reloaded.get("a"), "1")
+        with patch("attention_forge.disk_cache.json.dump") as mock_dump:
+            reloaded.save()
+        mock_dump.assert_not_called()
+        self.assertEqual(os.stat(self.cache_path).st_mtime_ns, modified)
+
+        # The order of the hits is still saved with the next change
+        reloaded.set("c", "3")
+        reloaded.save()
+        self.assertIsNone(DiskCache(self.cache_path).get("b"))
+        self.assertEqual(DiskCache(self.cache_path).get("a"), "1")
+
+    def test_ttl_expiry(self):
+        with patch("attention_forge.disk_cache.time.time", return_value=100.0):
+            cache = DiskCache(self.cache_path, ttl_seconds=10)
+            cache.set("a", "1")
+        with patch("attention_forge.disk_cache.time.time", return_value=111.0):
+            self.assertIsNone(cache.get("a"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,6 +2,7 @@ import os
 import shutil
 import datetime
 import json
+from attention_forge.tracing import span
 
 BUILD_DIR = ".attention_forge/"
 BACKUP_DIR = os.path.join(BUILD_DIR, "backup/")
@@ -15,6 +16,10 @@ def set_run_id(new_run_id):
     global run_id
     run_id = new_run_id
 
+def get_run_id():
+    """Return the run ID of the current execution, or None."""
+    return run_id
+
 def ensure_directories():
     """Ensure required directories and backup log file exist."""
     if not os.path.exists(BACKUP_DIR):
@@ -54,7 +59,8 @@ def backup_file(file_path):
         timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
         backup_filename = f"{os.path.basename(file_path)}_{timestamp}.bak"
         backup_path = os.path.join(BACKUP_DIR, backup_filename)
-        shutil.copy(file_path, backup_path)
+        with span("back up file", "io", path=file_path):
+            shutil.copy(file_path, backup_path)
 
         # Log the backup operation with run ID
         log_entry = {
@@ -80,7 +86,7 @@ def update_file(file_path, new_content):
 
     backup_file(file_path)
     try:
-        with open(file_path, "w", encoding="utf-8") as file:
+        with span("write file", "io", path=file_path), open(file_path, "w", encoding="utf-8") as file:
             file.write(new_content)
         print(f"✅ Updated file: {file_path}")
     except Exception as e:
@@ -0,0 +1,162 @@
+import os
+import struct
+import subprocess
+
+INDEX_SIGNATURE = b"DIRC"
+ENTRY_FIXED_SIZE = 62  # ctime, mtime, dev, ino, mode, uid, gid, size, sha1, flags
+EXTENDED_FLAG = 0x4000
+SKIP_WORKTREE_FLAG = 0x4000  # In the extended flags word
+GITLINK_MODE = 0o160000
+UNSUPPORTED_EXTENSIONS = {b"link": "split index", b"sdir": "sparse index"}
+
+
+class GitIndexError(Exception):
+    pass
+
+
+def find_repository(start_path):
+    """
+    Return (worktree_root, git_dir) for the repository containing start_path,
+    or None when start_path is not inside a git checkout.
+    """
+    current = os.path.realpath(start_path)
+    while True:
+        dot_git = os.path.join(current, ".git")
+        if os.path.isdir(dot_git):
+            return current, dot_git
+        if os.path.isfile(dot_git):
+            # Worktrees and submodules use a ".git" file pointing at the real git dir
+            with open(dot_git, "r", encoding="utf-8") as f:
+                content = f.read().strip()
+            if content.startswith("gitdir:"):
+                git_dir = content[len("gitdir:"):].strip()
+                return current, os.path.normpath(os.path.join(current, git_dir))
+        parent = os.path.dirname(current)
+        if parent == current:
+            return None
+        current = parent
+
+
+class GitIndexReader:
+    """Lists the files of a git checkout by parsing .git/index directly (versions 2-4)."""
+
+    def __init__(self, worktree_root, git_dir):
+        self.worktree_root = worktree_root
+        self.git_dir = git_dir
+
+    @classmethod
+    def discover(cls, start_path):
+        repository = find_repository(start_path)
+        if repository is None:
+            return None
+        return cls(*repository)
+
+    def read_tracked_paths(self):
+        """Return the repository-relative (posix) paths of tracked files, without submodules or sparse entries."""
+        index_path = os.path.join(self.git_dir, "index")
+        try:
+            with open(index_path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return []  # Fresh repository with nothing staged yet
+        return self.parse_index(data)
+
+    @staticmethod
+    def read_varint(data, offset):
+        """Decode the offset-encoded varint used for path prefixes in index v4."""
+        byte = data[offset]
+        offset += 1
+        value = byte & 0x7f
+        while byte & 0x80:
+            byte = data[offset]
+            offset += 1
+            value = ((value + 1) << 7) | (byte & 0x7f)
+        return value, offset
+
+    @classmethod
+    def parse_index(cls, data):
+        if len(data) < 12 or data[:4] != INDEX_SIGNATURE:
+            raise GitIndexError("not a git index file")
+        version, entry_count = struct.unpack(">II", data[4:12])
+        if version not in (2, 3, 4):
+            raise GitIndexError(f"unsupported index version {version}")
+
+        paths = []
+        offset = 12
+        previous_path = b""
+        for _ in range(entry_count):
+            entry_start = offset
+            mode = struct.unpack(">I", data[offset + 24:offset + 28])[0]
+            flags = struct.unpack(">H", data[offset + 60:offset + 62])[0]
+            offset += ENTRY_FIXED_SIZE
+
+            extended_flags = 0
+            if version >= 3 and flags & EXTENDED_FLAG:
+                extended_flags = struct.unpack(">H", data[offset:offset + 2])[0]
+                offset += 2
+
+            if version == 4:
+                strip_length, offset = cls.read_varint(data, offset)
+                end = data.index(b"\0", offset)
+                path = previous_path[:len(previous_path) - strip_length] + data[offset:end]
+                offset = end + 1
+            else:
+                end = data.index(b"\0", offset)
+                path = data[offset:end]
+                # Entries are NUL padded to a multiple of eight bytes
+                entry_length = end - entry_start + 1
+                offset = entry_start + ((entry_length + 7) // 8) * 8
+            previous_path = path
+
+            stage = (flags >> 12) & 0x3
+            if (mode & 0o170000) == 0o040000:
+                raise GitIndexError("sparse directory entries are not supported")
+            if mode == GITLINK_MODE or extended_flags & SKIP_WORKTREE_FLAG:
+                continue  # Submodules and sparse-checkout entries
+            decoded_path = path.decode("utf-8", errors="surrogateescape")
+            if stage and paths and paths[-1] == decoded_path:
+                continue  # A conflicted path is listed once, whichever stages it has (add/add has no stage 1)
+            paths.append(decoded_path)
+
+        cls.check_extensions(data, offset)
+        return paths
+
+    @staticmethod
+    def check_extensions(data, offset):
+        end = len(data) - 20  # Trailing SHA-1 checksum
+        while offset + 8 <= end:
+            signature = data[offset:offset + 4]
+            size = struct.unpack(">I", data[offset + 4:offset + 8])[0]
+            if signature in UNSUPPORTED_EXTENSIONS:
+                raise GitIndexError(f"{UNSUPPORTED_EXTENSIONS[signature]} is not supported")
+            offset += 8 + size
+
+    def list_untracked_paths(self):
+        """Untracked files not excluded by any .gitignore or info/exclude, from a single git call."""
+        result = subprocess.run(
+            ["git", "ls-files", "--others", "--exclude-standard", "-z"],
+            cwd=self.worktree_root, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+        return [path for path in result.stdout.decode("utf-8", errors="surrogateescape").split("\0") if path]
+
+    def build_tree(self, include_untracked=False):
+        """
+        Map each absolute directory of the worktree to (subdirectory names, file names),
+        so it can be walked like os.walk without touching the file system.
+        """
+        paths = self.read_tracked_paths()
+        if include_untracked:
+            paths = paths + self.list_untracked_paths()
+
+        tree = {self.worktree_root: (set(), [])}
+        for path in paths:
+            parts = path.split("/")
+            directory = self.worktree_root
+            for part in parts[:-1]:
+                tree[directory][0].add(part)
+                directory = os.path.join(directory, part)
+                if directory not in tree:
+                    tree[directory] = (set(), [])
+            tree[directory][1].append(parts[-1])
+
+        return {directory: (sorted(subdirs), sorted(files)) for directory, (subdirs, files) in tree.items()}
@@ -0,0 +1,88 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from attention_forge.git_index import GitIndexReader, GitIndexError, find_repository
+
+@unittest.skipUnless(shutil.which("git"), "git is not installed")
+class TestGitIndexReader(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.repo = os.path.realpath(self.temp_dir.name)
+        self.git("init", "-q")
+        for path in ["top.txt", "src/a.py", "src/pkg/b.py", "src/pkg/long_file_name_for_prefix_compression.py"]:
+            self.write(path, "content")
+        self.write(".gitignore", "*.log\n")
+        self.write("src/debug.log", "ignored")
+        self.git("add", "-A")
+        self.write("src/new.py", "untracked")
+
+    def git(self, *args):
+        return subprocess.run(["git", *args], cwd=self.repo, check=True, stdout=subprocess.PIPE).stdout.decode()
+
+    def write(self, path, content):
+        full_path = os.path.join(self.repo, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "w") as f:
+            f.write(content)
+
+    def assert_matches_git_ls_files(self):
+        reader = GitIndexReader.discover(os.path.join(self.repo, "src"))
+        self.assertEqual(reader.worktree_root, self.repo)
+        self.assertEqual(reader.read_tracked_paths(), self.git("ls-files").split())
+
+    def test_reads_index_version_2(self):
+        self.git("update-index", "--index-version", "2")
+        self.assert_matches_git_ls_files()
+
+    def test_reads_index_version_4(self):
+        self.git("update-index", "--index-version", "4")
+        self.assert_matches_git_ls_files()
+
+    def test_build_tree_with_untracked_files(self):
+        tree = GitIndexReader.discover(self.repo).build_tree(include_untracked=True)
+        self.assertEqual(tree[self.repo], (["src"], [".gitignore", "top.txt"]))
+        self.assertEqual(tree[os.path.join(self.repo, "src")], (["pkg"], ["a.py", "new.py"]))
+
+    def test_rejects_invalid_index(self):
+        with self.assertRaises(GitIndexError):
+            GitIndexReader.parse_index(b"not an index")
+
+    def test_conflicted_paths_are_listed_once(self):
+        identity = ["-c", "user.name=test", "-c", "user.email=test@example.com"]
+        commit = identity + ["commit", "-q", "-m"]
+        self.git(*commit, "base")
+        base_branch = self.git("rev-parse", "--abbrev-ref", "HEAD").strip()
+        self.git("checkout", "-q", "-b", "other")
+        self.write("both_added.txt", "other")
+        self.write("src/a.py", "other")
+        self.git("add", "-A")
+        self.git(*commit, "other")
+        self.git("checkout", "-q", base_branch)
+        self.write("both_added.txt", "base")
+        self.write("src/a.py", "base")
+        self.git("add", "-A")
+        self.git(*commit, "base changes")
+        subprocess.run(["git", *identity, "merge", "-q", "other"], cwd=self.repo, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+        # An add/add conflict has only stages 2 and 3; a modify/modify conflict has 1 to 3
+        stages = self.git("ls-files", "--stage", "both_added.txt", "src/a.py").split("\n")
+        self.assertEqual(sorted(line.split()[2] for line in stages if line), ["1", "2", "2", "3", "3"])
+        paths = GitIndexReader.discover(self.repo).read_tracked_paths()
+        self.assertEqual(paths.count("both_added.txt"), 1)
+        self.assertEqual(paths.count("src/a.py"), 1)
+        self.assertEqual(paths, sorted(set(self.git("ls-files").split())))
+
+    def test_outside_repository(self):
+        with tempfile.TemporaryDirectory() as outside:
+            result = subprocess.run(["git", "rev-parse", "--show-toplevel"], cwd=outside,
+                                    stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            # The temporary directory may itself lie inside a checkout; agree with git either way
+            expected = os.path.realpath(result.stdout.decode().strip()) if result.returncode == 0 else None
+            reader = GitIndexReader.discover(outside)
+            self.assertEqual(reader.worktree_root if reader else None, expected)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_READ_TIMEOUT = 300
+DEFAULT_POOL_SIZE = 10
+
+
+def create_http_session(project_config):
+    """A keep-alive session with a connection pool sized from the project config."""
+    pool_size = project_config.get("http_pool_size", DEFAULT_POOL_SIZE)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_http_timeout(project_config):
+    """(connect, read) timeout in seconds; the read timeout applies between received bytes."""
+    return (
+        project_config.get("http_connect_timeout", DEFAULT_CONNECT_TIMEOUT),
+        project_config.get("http_read_timeout", DEFAULT_READ_TIMEOUT)
+    )
+
+
+def create_async_http_client(project_config):
+    """The asyncio counterpart of create_http_session, with the same pool size and timeouts."""
+    pool_size = project_config.get("http_pool_size", DEFAULT_POOL_SIZE)
+    connect_timeout, read_timeout = get_http_timeout(project_config)
+    return httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        timeout=httpx.Timeout(read_timeout, connect=connect_timeout)
+    )
@@ -0,0 +1,127 @@
+import posixpath
+from pathspec.util import lookup_pattern, normalize_file
+
+GLOB_CHARS = set("*?[\\")
+
+
+class IgnoreMatcher:
+    """
+    Drop-in replacement for a gitwildmatch PathSpec (same match_file results)
+    tuned for walking large trees:
+    - anchored patterns are indexed by their literal leading directories, so each
+      directory only evaluates the patterns that can match something below it;
+    - the applicable pattern set and the ignore decision are cached per directory;
+    - directories with no applicable pattern are reported as clean, letting the
+      caller skip per-file matching for the whole subtree.
+    Unlike PathSpec, a leading "./" in a pattern is read as "/", so the
+    "./.git/" of the default config anchors at the root instead of matching nothing.
+    """
+
+    def __init__(self, lines):
+        pattern_factory = lookup_pattern('gitwildmatch')
+        self.rules = []
+        for line in lines:
+            if not line:
+                continue
+            line = self.anchor_dot_slash(line)
+            pattern = pattern_factory(line)
+            if pattern.include is None:
+                continue  # Blank line or comment
+            self.rules.append((pattern, self.literal_prefix(line)))
+        self.directory_rules = {}
+        self.directory_decisions = {}
+        self.normalized_directories = {}
+
+    @staticmethod
+    def anchor_dot_slash(line):
+        negation = "!" if line.startswith("!") else ""
+        pattern = line[len(negation):]
+        if pattern.startswith("./"):
+            return negation + "/" + pattern[2:].lstrip("/")
+        return line
+
+    @staticmethod
+    def literal_prefix(line):
+        """
+        Return the literal leading path components of an anchored pattern, or
+        None if the pattern may match at any depth (or is too unusual to index).
+        """
+        pattern = line.strip()
+        if pattern.startswith("!"):
+            pattern = pattern[1:]
+        if pattern.startswith("\\") or pattern.startswith("**"):
+            return None
+
+        if pattern.startswith("/"):
+            pattern = pattern[1:]
+        elif "/" not in pattern.rstrip("/"):
+            return None  # Unanchored, e.g. "*.pyc" or "__pycache__/"
+
+        prefix = []
+        for part in pattern.rstrip("/").split("/"):
+            if not part or part in (".", "..") or GLOB_CHARS.intersection(part):
+                break
+            prefix.append(part)
+        return tuple(prefix) or None
+
+    @staticmethod
+    def split_directory(rel_dir):
+        if rel_dir in ("", "."):
+            return ()
+        return tuple(rel_dir.split("/"))
+
+    def rules_for_directory(self, rel_dir):
+        """Patterns that can match an entry directly or indirectly below rel_dir."""
+        rules = self.directory_rules.get(rel_dir)
+        if rules is None:
+            parts = self.split_directory(rel_dir)
+            rules = tuple(pattern for pattern, prefix in self.rules
+                          if prefix is None or prefix[:len(parts)] == parts[:len(prefix)])
+            self.directory_rules[rel_dir] = rules
+        return rules
+
+    @staticmethod
+    def evaluate(rules, norm_path):
+        # Like PathSpec, the last matching pattern decides (negations re-include)
+        ignored = False
+        for pattern in rules:
+            if pattern.regex.match(norm_path):
+                ignored = pattern.include
+        return ignored
+
+    def normalize_directory(self, rel_dir):
+        norm_dir = self.normalized_directories.get(rel_dir)
+        if norm_dir is None:
+            norm_dir = normalize_file(rel_dir)
+            self.normalized_directories[rel_dir] = norm_dir
+        return norm_dir
+
+    def is_clean(self, rel_dir):
+        """True if no pattern can match anything inside rel_dir."""
+        return not self.rules_for_directory(self.normalize_directory(rel_dir))
+
+    def match_file(self, path):
+        norm_path = normalize_file(path)
+        rules = self.rules_for_directory(posixpath.dirname(norm_path))
+        if not rules:
+            return False
+        return self.evaluate(rules, norm_path)
+
+    def match_directory(self, rel_dir):
+        """Cached ignore decision for a directory path."""
+        decision = self.directory_decisions.get(rel_dir)
+        if decision is None:
+            norm_dir = self.normalize_directory(rel_dir)
+            # The trailing slash lets directory-only patterns such as "venv/" match
+            decision = norm_dir not in ("", ".") and self.match_file(norm_dir + "/")
+            self.directory_decisions[rel_dir] = decision
+        return decision
+
+    def match_in_directory(self, rel_dir, filename):
+        """Match a file directly inside rel_dir, reusing the directory's cached state."""
+        norm_dir = self.normalize_directory(rel_dir)
+        rules = self.rules_for_directory(norm_dir)
+        if not rules:
+            return False
+        norm_path = filename if norm_dir in ("", ".") else f"{norm_dir}/{filename}"
+        return self.evaluate(rules, norm_path)
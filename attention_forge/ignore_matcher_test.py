@@ -0,0 +1,62 @@
+import unittest
+import pathspec
+from attention_forge.ignore_matcher import IgnoreMatcher
+
+class TestIgnoreMatcher(unittest.TestCase):
+    PATTERNS = [
+        "*.pyc", "__pycache__/", "/build/", "src/gen/", "src/*.tmp", "!src/keep.tmp",
+        "docs/**/draft", "venv/", "**/node_modules", "/*.log", "!important.log", "# comment", ""
+    ]
+    PATHS = [
+        "main.py", "m.pyc", "src/m.pyc", "src/__pycache__/a.py", "build/out.js", "src/build/out.js",
+        "src/gen/a.py", "gen/a.py", "src/a.tmp", "src/keep.tmp", "src/sub/a.tmp", "docs/x/y/draft",
+        "docs/draft", "a/venv/lib.py", "a/node_modules/x.js", "t.log", "sub/t.log", "important.log",
+        "./build/out.js", "src"
+    ]
+
+    def test_matches_pathspec(self):
+        spec = pathspec.PathSpec.from_lines('gitwildmatch', self.PATTERNS)
+        matcher = IgnoreMatcher(self.PATTERNS)
+        for path in self.PATHS:
+            with self.subTest(path=path):
+                self.assertEqual(matcher.match_file(path), spec.match_file(path))
+
+    def test_match_in_directory_matches_match_file(self):
+        matcher = IgnoreMatcher(self.PATTERNS)
+        for path in self.PATHS:
+            if "/" not in path:
+                continue
+            directory, filename = path.rsplit("/", 1)
+            with self.subTest(path=path):
+                self.assertEqual(matcher.match_in_directory(directory, filename), matcher.match_file(path))
+
+    def test_literal_prefix(self):
+        self.assertEqual(IgnoreMatcher.literal_prefix("/build/"), ("build",))
+        self.assertEqual(IgnoreMatcher.literal_prefix("src/gen/*.py"), ("src", "gen"))
+        self.assertEqual(IgnoreMatcher.literal_prefix("!docs/**/draft"), ("docs",))
+        self.assertIsNone(IgnoreMatcher.literal_prefix("*.pyc"))
+        self.assertIsNone(IgnoreMatcher.literal_prefix("__pycache__/"))
+        self.assertIsNone(IgnoreMatcher.literal_prefix("**/node_modules"))
+
+    def test_is_clean_for_subtrees_without_applicable_patterns(self):
+        matcher = IgnoreMatcher(["/build/", "src/gen/"])
+        self.assertTrue(matcher.is_clean("docs"))
+        self.assertTrue(matcher.is_clean("docs/api"))
+        self.assertFalse(matcher.is_clean("src"))
+        self.assertFalse(matcher.is_clean("."))
+        self.assertFalse(IgnoreMatcher(["*.pyc"]).is_clean("docs"))
+
+    def test_match_directory_honours_directory_only_patterns(self):
+        matcher = IgnoreMatcher(["venv/", "./.git/", "__pycache__/", "/build/"])
+        self.assertTrue(matcher.match_directory("venv"))
+        self.assertTrue(matcher.match_directory("./venv"))
+        self.assertTrue(matcher.match_directory(".git"))
+        self.assertTrue(matcher.match_directory("src/__pycache__"))
+        self.assertTrue(matcher.match_directory("build"))
+        self.assertFalse(matcher.match_directory("src/build"))
+        self.assertFalse(matcher.match_directory("src/.git"))
+        self.assertFalse(matcher.match_directory("."))
+        self.assertTrue(matcher.match_file(".git/config"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -8,7 +8,9 @@ from attention_forge.config_loader import load_project_config
 from attention_forge.file_manager import set_run_id
 from attention_forge.role import Role
 from attention_forge.chain import Chain
+from attention_forge.checkpoint import Checkpoint
 from attention_forge.file_checker import FileChecker
+from attention_forge.tracing import start_tracing, finish_tracing
 
 def main():
     parser = argparse.ArgumentParser(
@@ -29,6 +31,28 @@ https://github.com/admin-2026/attention_forge/"""
         help=("Path to the project config file. Defaults to 'attention_forge_project.yaml'. "
               "Refer to the README for more details.")
     )
+    cache_group = parser.add_mutually_exclusive_group()
+    cache_group.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write the LLM response cache."
+    )
+    cache_group.add_argument(
+        "--refresh-cache",
+        action="store_true",
+        help="Ignore cached LLM responses, but store the new ones."
+    )
+    parser.add_argument(
+        "--resume",
+        metavar="RUN_ID",
+        default=None,
+        help="Resume a failed run from its checkpoint, reusing the outputs of the steps that completed."
+    )
+    parser.add_argument(
+        "--trace",
+        action="store_true",
+        help="Record the time spent per step, LLM request and file operation, and save it as a Chrome trace."
+    )
     parser.add_argument(
         "--version",
         action="store_true",
@@ -46,7 +70,17 @@ https://github.com/admin-2026/attention_forge/"""
         print(f"Attention Forge version {version}")
         sys.exit(0)
 
-    run_id = str(uuid.uuid4())
+    chain_name = args.chain_name
+    if args.resume:
+        # A resumed run keeps its run ID, so its backups can still be reverted together
+        run_id = args.resume
+        try:
+            chain_name = Checkpoint(run_id).read_header().get("chain", chain_name)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+    else:
+        run_id = str(uuid.uuid4())
     set_run_id(run_id)
 
     # Instantiate and run the file checker
@@ -77,15 +111,31 @@ https://github.com/admin-2026/attention_forge/"""
 
     print(f"🆔 Run ID: {run_id}")
 
+    if args.trace:
+        start_tracing()
+
     role_handler = Role()
 
     # Pass the api_key_loader instead of api_key
-    chain = Chain(args.chain_name, api_key_loader, role_handler, project_config)
+    response_cache_mode = "bypass" if args.no_cache else "refresh" if args.refresh_cache else "use"
+    try:
+        chain = Chain(chain_name, api_key_loader, role_handler, project_config, response_cache_mode,
+                      resume=bool(args.resume))
+    except ValueError as e:
+        print(f"Chain configuration error: {e}")
+        sys.exit(1)
 
     try:
         chain.run()
     except Exception as e:
         print("An error occurred while executing the chain:", e)
+        if chain.checkpoint is not None:
+            print(f"💾 Finished steps are checkpointed. Continue with: afg --resume {run_id}")
+    finally:
+        chain.close()
+        chain.print_usage_summary()
+        if args.trace:
+            finish_tracing(run_id)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,191 @@
+import random
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from attention_forge.disk_cache import DiskCache
+
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504, 529}
+LATENCY_WINDOW = 200
+LATENCY_HISTORY_FILE = ".attention_forge/latency_history.json"
+
+
+def get_percentile(values, fraction):
+    """The value below which `fraction` of values fall (nearest rank), or None without values."""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date), or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def get_status_code(error):
+    response = getattr(error, "response", None)
+    status_code = getattr(response, "status_code", None)
+    if status_code is None:
+        status_code = getattr(error, "status_code", None)
+    return status_code if isinstance(status_code, int) else None
+
+
+def classify_error(error, retryable_exceptions):
+    """Return (retryable, retry_after_seconds, description) for an error raised by a client."""
+    status_code = get_status_code(error)
+    if status_code is not None:
+        headers = getattr(getattr(error, "response", None), "headers", None) or {}
+        retry_after = parse_retry_after(headers.get("Retry-After") or headers.get("retry-after"))
+        return status_code in RETRYABLE_STATUS_CODES, retry_after, f"HTTP {status_code}"
+    if isinstance(error, retryable_exceptions):
+        return True, None, type(error).__name__
+    return False, None, type(error).__name__
+
+
+class RetryPolicy:
+    def __init__(self, max_retries=4, base_delay=0.5, max_delay=30.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    @classmethod
+    def from_config(cls, project_config):
+        return cls(
+            max_retries=project_config.get("max_retries", 4),
+            base_delay=project_config.get("retry_base_delay", 0.5),
+            max_delay=project_config.get("retry_max_delay", 30.0)
+        )
+
+    def get_delay(self, attempt, retry_after=None):
+        """
+        Full-jitter exponential backoff; a Retry-After from the server is a lower
+        bound. Returns None when the server asks to wait longer than max_delay,
+        since retrying earlier would only be refused again.
+        """
+        if retry_after is not None and retry_after > self.max_delay:
+            return None
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+
+class RetryBudget:
+    """
+    Token bucket limiting retries to a fraction of requests, so an outage does
+    not multiply the load on a provider. Each request deposits `ratio` tokens,
+    each retry or hedge withdraws one.
+    """
+
+    def __init__(self, ratio=0.2, max_tokens=10):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self.lock = threading.Lock()
+
+    def deposit(self):
+        with self.lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self):
+        with self.lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class LatencyHistory:
+    """
+    Recent latencies per provider/model, kept between runs so that hedging has
+    a threshold from the first request of a run instead of after many requests.
+    """
+
+    def __init__(self, path=LATENCY_HISTORY_FILE):
+        self.cache = DiskCache(path)
+
+    def get(self, key):
+        return self.cache.get(key, [])
+
+    def set(self, key, latencies):
+        self.cache.set(key, [round(seconds, 3) for seconds in latencies])
+
+    def save(self):
+        self.cache.save()
+
+
+class ProviderStats:
+    """
+    Counters and recent latencies of one provider, shared by all its clients.
+    Latencies are also kept per model, seeded from the LatencyHistory if any,
+    so a slow model does not set the hedge threshold of a fast one.
+    """
+
+    COUNTERS = ("requests", "successes", "failures", "retries", "retries_denied", "hedges", "hedge_wins")
+
+    def __init__(self, retry_budget, name=None, history=None):
+        self.retry_budget = retry_budget
+        self.name = name
+        self.history = history
+        self.counters = dict.fromkeys(self.COUNTERS, 0)
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.model_latencies = {}
+        self.updated_models = set()
+        self.lock = threading.Lock()
+
+    def increment(self, counter):
+        with self.lock:
+            self.counters[counter] += 1
+
+    def get_model_latencies(self, model):
+        # Called with the lock held
+        latencies = self.model_latencies.get(model)
+        if latencies is None:
+            seed = self.history.get(f"{self.name}/{model}") if self.history is not None else []
+            latencies = self.model_latencies[model] = deque(seed, maxlen=LATENCY_WINDOW)
+        return latencies
+
+    def record_latency(self, seconds, model=None):
+        with self.lock:
+            self.latencies.append(seconds)
+            if model is not None:
+                self.get_model_latencies(model).append(seconds)
+                self.updated_models.add(model)
+
+    def get_percentile(self, percentile, min_samples=1, model=None):
+        """Percentile of the provider's latencies, or of one model's when given."""
+        with self.lock:
+            latencies = self.latencies if model is None else self.get_model_latencies(model)
+            if len(latencies) < min_samples:
+                return None
+            samples = list(latencies)
+        return get_percentile(samples, percentile)
+
+    def update_history(self):
+        """Copy the latencies of the models used in this run into the LatencyHistory."""
+        if self.history is None:
+            return
+        with self.lock:
+            for model in self.updated_models:
+                self.history.set(f"{self.name}/{model}", self.model_latencies[model])
+            self.updated_models.clear()
+
+    def snapshot(self):
+        snapshot = dict(self.counters)
+        snapshot["p95_latency"] = self.get_percentile(0.95)
+        snapshot["retry_budget"] = round(self.retry_budget.tokens, 2)
+        return snapshot
+
@@ -0,0 +1,59 @@
+import unittest
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+from attention_forge.resilience import parse_retry_after, classify_error, get_percentile, RetryPolicy, RetryBudget, ProviderStats
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+class FakeHttpError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.response = FakeResponse(status_code, headers)
+
+class TestResilience(unittest.TestCase):
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after("7"), 7.0)
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after("soon"))
+        in_a_minute = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=60), usegmt=True)
+        self.assertAlmostEqual(parse_retry_after(in_a_minute), 60, delta=2)
+
+    def test_classify_error(self):
+        self.assertEqual(classify_error(FakeHttpError(429, {"Retry-After": "3"}), ()), (True, 3.0, "HTTP 429"))
+        self.assertFalse(classify_error(FakeHttpError(401), ())[0])
+        self.assertTrue(classify_error(ConnectionError(), (ConnectionError,))[0])
+        self.assertFalse(classify_error(KeyError(), (ConnectionError,))[0])
+
+    @patch('attention_forge.resilience.random.uniform', side_effect=lambda low, high: high)
+    def test_backoff_is_capped_and_honors_retry_after(self, mock_uniform):
+        policy = RetryPolicy(base_delay=1, max_delay=10)
+        self.assertEqual(policy.get_delay(0), 1)
+        self.assertEqual(policy.get_delay(2), 4)
+        self.assertEqual(policy.get_delay(8), 10)
+        self.assertEqual(policy.get_delay(0, retry_after=6), 6)
+        self.assertIsNone(policy.get_delay(0, retry_after=60))
+
+    def test_retry_budget(self):
+        budget = RetryBudget(ratio=0.5, max_tokens=1)
+        self.assertTrue(budget.withdraw())
+        self.assertFalse(budget.withdraw())
+        budget.deposit()
+        budget.deposit()
+        self.assertTrue(budget.withdraw())
+
+    def test_percentile(self):
+        self.assertEqual(get_percentile(list(range(1, 101)), 0.95), 96)
+        self.assertIsNone(get_percentile([], 0.5))
+
+        stats = ProviderStats(RetryBudget())
+        for seconds in range(1, 101):
+            stats.record_latency(seconds)
+        self.assertEqual(stats.get_percentile(0.95), 96)
+        self.assertIsNone(stats.get_percentile(0.95, min_samples=101))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import json
+import time
+import hashlib
+from attention_forge.disk_cache import DiskCache
+
+RESPONSE_CACHE_FILE = ".attention_forge/response_cache.json"
+DEFAULT_RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_RESPONSE_CACHE_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_RESPONSE_CACHE_SAVE_SECONDS = 30
+
+# use: read and write; refresh: skip lookups but store new replies; bypass: do not touch the cache
+CACHE_MODES = ("use", "refresh", "bypass")
+
+
+class ResponseCache:
+    """Exact-match cache of chat replies, keyed by client, model, sampling parameters and messages."""
+
+    def __init__(self, project_config, mode="use"):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown response cache mode '{mode}'.")
+        self.mode = mode
+        self.cache = DiskCache(
+            RESPONSE_CACHE_FILE,
+            max_bytes=project_config.get("response_cache_max_bytes", DEFAULT_RESPONSE_CACHE_MAX_BYTES),
+            ttl_seconds=project_config.get("response_cache_ttl_seconds", DEFAULT_RESPONSE_CACHE_TTL_SECONDS)
+        ) if mode != "bypass" else None
+        self.save_interval = project_config.get("response_cache_save_seconds", DEFAULT_RESPONSE_CACHE_SAVE_SECONDS)
+        self.last_save = time.monotonic()
+
+    @staticmethod
+    def make_key(client_name, model, sampling_params, messages):
+        key_data = {"client": client_name, "model": model, "sampling": sampling_params, "messages": messages}
+        return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return a copy of the cached (request_data, response_data, assistant_reply), or None."""
+        if self.mode != "use":
+            return None
+        value = self.cache.get(key)
+        if value is None:
+            return None
+        request_data, response_data, assistant_reply = json.loads(value)
+        return request_data, response_data, assistant_reply
+
+    def set(self, key, result):
+        if self.cache is None:
+            return
+        self.cache.set(key, json.dumps(result))
+        # Rewriting the whole file for every reply is slow with many requests; close() saves the rest
+        if time.monotonic() - self.last_save >= self.save_interval:
+            self.save()
+
+    def save(self):
+        if self.cache is None:
+            return
+        self.last_save = time.monotonic()
+        self.cache.save()
+
+    def stats(self):
+        return self.cache.stats() if self.cache is not None else None
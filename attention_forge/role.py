@@ -28,7 +28,8 @@ class Role:
 
         # Initialize context text
         context_text = "\n".join(context_files.values()) if context_files else ""
-        role_config = self.role_configs[role_name]
+        # Copy so the context is not appended to the preloaded config on every call
+        role_config = dict(self.role_configs[role_name])
         
         # Add developer message only if context is not empty
         if context_text:
@@ -0,0 +1,21 @@
+import unittest
+from attention_forge.role import Role
+
+class TestRole(unittest.TestCase):
+    def test_initialize_role_does_not_accumulate_context(self):
+        role = Role()
+        developer_message = role.role_configs["developer"]["developer_message"]
+
+        first = role.initialize_role("developer", {"a.py": "first context"})
+        second = role.initialize_role("developer", {"a.py": "second context"})
+
+        self.assertIn("first context", first["developer_message"])
+        self.assertNotIn("first context", second["developer_message"])
+        self.assertEqual(role.role_configs["developer"]["developer_message"], developer_message)
+
+    def test_unknown_role(self):
+        with self.assertRaises(ValueError):
+            Role().initialize_role("missing", {})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -15,7 +15,9 @@ class BaseSetupPlugin:
         'include_paths': ['./src', './scripts'],
         'tree_paths': ['./'],
         'ignore_paths': ['.attention_forge/', './.git/', 'api-key', 'venv/'],
-        'use_gitignore_for_ignore_paths': True
+        'use_gitignore_for_ignore_paths': True,
+        'use_context_cache': True,
+        'load_workers': 1
     }
 
     def create_build_directory(self):
@@ -54,6 +56,14 @@ class BaseSetupPlugin:
                 elif key == 'use_gitignore_for_ignore_paths':
                     file.write("# Use .gitignore for Ignore Paths:\n")
                     file.write("# This option allows the loading mechanism to fetch exclude paths defined in .gitignore.\n")
+                elif key == 'use_context_cache':
+                    file.write("# Use Context Cache:\n")
+                    file.write("# Keeps formatted file contents in .attention_forge/context_cache.json so unchanged\n")
+                    file.write("# files are not re-read on the next run. Cap the size with context_cache_max_bytes.\n")
+                elif key == 'load_workers':
+                    file.write("# Load Workers:\n")
+                    file.write("# Number of threads used to read files in include_paths directories.\n")
+                    file.write("# Values above 1 help on network-mounted or very large checkouts.\n")
 
                 file.write("\n")
                 if isinstance(value, list):
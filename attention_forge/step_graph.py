@@ -0,0 +1,136 @@
+import queue
+import asyncio
+import threading
+
+
+def get_input_keys(step):
+    input_data_key = step.get("input_data_key")
+    if isinstance(input_data_key, list):
+        return [key for key in input_data_key if key]
+    return [input_data_key] if input_data_key else []
+
+
+def describe_step(index, step):
+    return f"step {index + 1} ({step.get('type')})"
+
+
+class StepGraph:
+    """
+    Dataflow graph of chain steps: a step depends on the steps producing its
+    input_data_key values. Built when the chain is loaded, so missing,
+    duplicate or cyclic keys are reported before anything runs.
+    """
+
+    def __init__(self, steps):
+        self.steps = steps
+        self.dependencies = [set() for _ in steps]
+        self.dependents = [set() for _ in steps]
+
+        producers = {}
+        for index, step in enumerate(steps):
+            output_data_key = step.get("output_data_key")
+            if not output_data_key:
+                continue
+            if output_data_key in producers:
+                raise ValueError(f"'{output_data_key}' is the output_data_key of both "
+                                 f"{describe_step(producers[output_data_key], steps[producers[output_data_key]])} "
+                                 f"and {describe_step(index, step)}.")
+            producers[output_data_key] = index
+
+        for index, step in enumerate(steps):
+            for key in get_input_keys(step):
+                if key not in producers:
+                    raise ValueError(f"{describe_step(index, step)} reads '{key}', "
+                                     f"but no step has it as output_data_key.")
+                self.dependencies[index].add(producers[key])
+                self.dependents[producers[key]].add(index)
+
+        self.order = self.topological_order()
+
+    def topological_order(self):
+        """Steps in an order that respects the dependencies, list order among independent steps."""
+        remaining = [len(dependencies) for dependencies in self.dependencies]
+        ready = [index for index, count in enumerate(remaining) if count == 0]
+        order = []
+        while ready:
+            index = ready.pop(0)
+            order.append(index)
+            for dependent in sorted(self.dependents[index]):
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    ready.append(dependent)
+            ready.sort()
+
+        if len(order) < len(self.steps):
+            cyclic = [describe_step(index, self.steps[index]) for index, count in enumerate(remaining) if count]
+            raise ValueError(f"The chain steps form a cycle through their data keys: {', '.join(cyclic)}.")
+        return order
+
+    def get_remaining_dependencies(self, completed):
+        return [len(dependencies - completed) for dependencies in self.dependencies]
+
+    def run(self, run_step, completed=frozenset()):
+        """
+        Call run_step(index) for every step not in completed, each in its own
+        thread as soon as the steps it depends on have finished. The first error
+        stops new steps from starting and is raised once the running ones are
+        done. The threads are daemons, so Ctrl+C is not held up by a step
+        waiting for input.
+        """
+        remaining = self.get_remaining_dependencies(completed)
+        finished = queue.Queue()
+
+        def run_in_thread(index):
+            try:
+                run_step(index)
+            except BaseException as error:  # Includes the SystemExit of steps aborted by the user
+                finished.put((index, error))
+            else:
+                finished.put((index, None))
+
+        def start(index):
+            threading.Thread(target=run_in_thread, args=(index,), name=f"step-{index + 1}", daemon=True).start()
+
+        running = 0
+        for index in self.order:
+            if index not in completed and not remaining[index]:
+                start(index)
+                running += 1
+
+        error = None
+        while running:
+            index, step_error = finished.get()
+            running -= 1
+            if step_error is not None:
+                error = error or step_error
+            if error is not None:
+                continue
+            for dependent in sorted(self.dependents[index]):
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    start(dependent)
+                    running += 1
+        if error is not None:
+            raise error
+
+    async def arun(self, arun_step, completed=frozenset()):
+        """Asyncio version of run: await arun_step(index) for each step as its inputs become ready."""
+        remaining = self.get_remaining_dependencies(completed)
+        running = {asyncio.ensure_future(arun_step(index)): index
+                   for index in self.order if index not in completed and not remaining[index]}
+        error = None
+        while running:
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index = running.pop(task)
+                if task.exception() is not None:
+                    error = error or task.exception()
+                    continue
+                if error is not None:
+                    continue
+                for dependent in sorted(self.dependents[index]):
+                    remaining[dependent] -= 1
+                    if remaining[dependent] == 0:
+                        running[asyncio.ensure_future(arun_step(dependent))] = dependent
+        if error is not None:
+            raise error
@@ -0,0 +1,75 @@
+import asyncio
+import threading
+import unittest
+from attention_forge.step_graph import StepGraph
+
+GENERAL_DEV_STEPS = [
+    {"type": "context_load", "output_data_key": "context_files"},
+    {"type": "user_input", "output_data_key": "user_message"},
+    {"type": "chat", "input_data_key": ["user_message", "context_files"], "output_data_key": "chat_response"},
+    {"type": "file_update", "input_data_key": "chat_response"}
+]
+
+class TestStepGraph(unittest.TestCase):
+    def test_dependencies_follow_the_data_keys(self):
+        graph = StepGraph(GENERAL_DEV_STEPS)
+        self.assertEqual(graph.dependencies[2], {0, 1})
+        self.assertEqual(graph.order, [0, 1, 2, 3])
+
+    def test_missing_key_is_reported(self):
+        with self.assertRaisesRegex(ValueError, "step 1 \\(chat\\) reads 'user_message'"):
+            StepGraph([{"type": "chat", "input_data_key": ["user_message"]}])
+
+    def test_duplicate_output_key_is_reported(self):
+        with self.assertRaisesRegex(ValueError, "output_data_key of both"):
+            StepGraph([{"type": "user_input", "output_data_key": "message"},
+                       {"type": "user_input", "output_data_key": "message"}])
+
+    def test_cycle_is_reported(self):
+        with self.assertRaisesRegex(ValueError, "cycle"):
+            StepGraph([{"type": "chat", "input_data_key": "b", "output_data_key": "a"},
+                       {"type": "dictionary_rewrite", "input_data_key": "a", "output_data_key": "b"}])
+
+    def test_independent_steps_run_concurrently(self):
+        graph = StepGraph(GENERAL_DEV_STEPS)
+        both_started = threading.Barrier(2, timeout=5)
+        finished = []
+
+        def run_step(index):
+            if index in (0, 1):
+                both_started.wait()  # Times out unless context_load and user_input overlap
+            finished.append(index)
+
+        graph.run(run_step)
+        self.assertEqual(sorted(finished[:2]), [0, 1])
+        self.assertEqual(finished[2:], [2, 3])
+
+    def test_error_stops_dependent_steps(self):
+        graph = StepGraph(GENERAL_DEV_STEPS)
+        finished = []
+
+        def run_step(index):
+            if index == 1:
+                raise SystemExit(0)
+            finished.append(index)
+
+        with self.assertRaises(SystemExit):
+            graph.run(run_step)
+        self.assertEqual(finished, [0])
+
+    def test_arun_runs_independent_steps_concurrently(self):
+        graph = StepGraph(GENERAL_DEV_STEPS)
+        in_flight = []
+        max_in_flight = []
+
+        async def arun_step(index):
+            in_flight.append(index)
+            max_in_flight.append(len(in_flight))
+            await asyncio.sleep(0.01)
+            in_flight.remove(index)
+
+        asyncio.run(graph.arun(arun_step))
+        self.assertEqual(max(max_in_flight), 2)
+
+if __name__ == "__main__":
+    unittest.main()
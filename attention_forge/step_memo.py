@@ -0,0 +1,57 @@
+import json
+import hashlib
+import threading
+from attention_forge.disk_cache import DiskCache
+
+STEP_MEMO_FILE = ".attention_forge/step_memo.json"
+DEFAULT_STEP_MEMO_MAX_BYTES = 32 * 1024 * 1024
+DEFAULT_STEP_MEMO_TTL_SECONDS = 7 * 24 * 3600
+
+
+class StepMemo:
+    """
+    Outputs of chain steps configured with `memoize: true`, keyed by a hash of
+    the step config, its input values and the step's memo_fingerprint.
+    Hits and misses are counted per step.
+    """
+
+    def __init__(self, project_config, path=STEP_MEMO_FILE):
+        self.cache = DiskCache(
+            path,
+            max_bytes=project_config.get("step_memo_max_bytes", DEFAULT_STEP_MEMO_MAX_BYTES),
+            ttl_seconds=project_config.get("step_memo_ttl_seconds", DEFAULT_STEP_MEMO_TTL_SECONDS)
+        )
+        self.step_stats = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def make_key(step, input_values, fingerprint):
+        """Raises TypeError if the inputs cannot be represented as JSON."""
+        key_data = {"step": step, "inputs": input_values, "fingerprint": fingerprint}
+        return hashlib.sha256(json.dumps(key_data, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def get(self, label, key):
+        """Return (found, a copy of the stored output) and report the hit or miss of the step."""
+        value = self.cache.get(key)
+        with self.lock:
+            stats = self.step_stats.setdefault(label, {"hits": 0, "misses": 0})
+            stats["hits" if value is not None else "misses"] += 1
+            # Read the counts under the lock, or a concurrent step could change them mid-message
+            message = (f"🧠 Memo {'hit' if value is not None else 'miss'} for {label} "
+                       f"(hits: {stats['hits']}, misses: {stats['misses']})")
+        print(message)
+        if value is None:
+            return False, None
+        return True, json.loads(value)
+
+    def set(self, key, output_data):
+        try:
+            value = json.dumps(output_data)
+        except (TypeError, ValueError) as e:
+            print(f"⚠️ Warning: Step output cannot be memoized: {e}")
+            return
+        self.cache.set(key, value)
+
+    def save(self):
+        """Write the memo to disk; called once at the end of a run, since it rewrites the whole file."""
+        self.cache.save()
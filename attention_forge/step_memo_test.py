@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from attention_forge.step_memo import StepMemo
+
+STEP = {"type": "dictionary_rewrite", "queries": [{"from": "response", "to": "."}], "memoize": True}
+
+class TestStepMemo(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        self.path = os.path.join(self.temp_dir.name, "step_memo.json")
+
+    def test_key_depends_on_config_inputs_and_fingerprint(self):
+        key = StepMemo.make_key(STEP, [{"response": "a"}], None)
+        self.assertEqual(key, StepMemo.make_key(dict(STEP), [{"response": "a"}], None))
+        self.assertNotEqual(key, StepMemo.make_key(STEP, [{"response": "b"}], None))
+        self.assertNotEqual(key, StepMemo.make_key(STEP, [{"response": "a"}], {"model": "other"}))
+        self.assertNotEqual(key, StepMemo.make_key(dict(STEP, queries=[]), [{"response": "a"}], None))
+
+    def test_unhashable_inputs_raise(self):
+        with self.assertRaises(TypeError):
+            StepMemo.make_key(STEP, [object()], None)
+
+    @patch('builtins.print')
+    def test_outputs_persist_and_hits_are_counted_per_step(self, mock_print):
+        key = StepMemo.make_key(STEP, ["input"], None)
+        memo = StepMemo({}, self.path)
+        self.assertEqual(memo.get("4. dictionary_rewrite", key), (False, None))
+        memo.set(key, {"files": ["a.py"]})
+        self.assertFalse(os.path.exists(self.path))  # Written once, when the run ends
+        memo.save()
+
+        memo = StepMemo({}, self.path)
+        found, output_data = memo.get("4. dictionary_rewrite", key)
+        self.assertTrue(found)
+        self.assertEqual(output_data, {"files": ["a.py"]})
+        output_data["files"].append("b.py")  # Callers get a copy
+        self.assertEqual(memo.get("4. dictionary_rewrite", key)[1], {"files": ["a.py"]})
+        self.assertEqual(memo.step_stats["4. dictionary_rewrite"], {"hits": 2, "misses": 0})
+
+    @patch('builtins.print')
+    def test_none_output_is_a_hit(self, mock_print):
+        memo = StepMemo({}, self.path)
+        memo.set("key", None)
+        self.assertEqual(memo.get("step", "key"), (True, None))
+
+if __name__ == "__main__":
+    unittest.main()
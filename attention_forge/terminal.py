@@ -0,0 +1,73 @@
+import sys
+import threading
+from contextlib import contextmanager
+
+# Chain steps may run concurrently; a step prompting the user or streaming a reply holds the terminal
+terminal_lock = threading.RLock()
+
+_thread_output = threading.local()
+
+
+class ThreadBufferedStdout:
+    """sys.stdout stand-in that holds back what threads inside buffered_output() write."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text):
+        buffer = getattr(_thread_output, "buffer", None)
+        if buffer is None:
+            return self.stream.write(text)
+        buffer.append(text)
+        return len(text)
+
+    def flush(self):
+        if getattr(_thread_output, "buffer", None) is None:
+            self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+def flush_thread_output():
+    """Write out what the current thread has buffered, in one piece."""
+    buffer = getattr(_thread_output, "buffer", None)
+    if not buffer:
+        return
+    text = "".join(buffer)
+    buffer.clear()
+    stream = getattr(sys.stdout, "stream", sys.stdout)
+    with terminal_lock:
+        stream.write(text)
+        stream.flush()
+
+
+@contextmanager
+def buffered_output():
+    """
+    Hold back the prints of the current thread until the block ends, so a step
+    running next to a prompt does not write into the line the user is typing.
+    Other threads print as usual.
+    """
+    if not isinstance(sys.stdout, ThreadBufferedStdout):
+        sys.stdout = ThreadBufferedStdout(sys.stdout)
+    previous_buffer = getattr(_thread_output, "buffer", None)
+    _thread_output.buffer = []
+    try:
+        yield
+    finally:
+        flush_thread_output()
+        _thread_output.buffer = previous_buffer
+
+
+def prompt_user(message):
+    """input() that waits for other steps to finish using the terminal first."""
+    with terminal_lock:
+        # The question needs what was printed before it
+        flush_thread_output()
+        buffer = getattr(_thread_output, "buffer", None)
+        _thread_output.buffer = None
+        try:
+            return input(message)
+        finally:
+            _thread_output.buffer = buffer
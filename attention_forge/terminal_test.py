@@ -0,0 +1,45 @@
+import io
+import sys
+import threading
+import unittest
+from unittest.mock import patch
+from attention_forge.terminal import buffered_output, prompt_user
+
+class TestBufferedOutput(unittest.TestCase):
+    def setUp(self):
+        self.stream = io.StringIO()
+        patcher = patch.object(sys, "stdout", self.stream)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_output_is_held_back_until_the_block_ends(self):
+        loader_printed = threading.Event()
+        prompt_done = threading.Event()
+
+        def load():
+            with buffered_output():
+                print("loading a")
+                loader_printed.set()
+                prompt_done.wait()
+                print("loading b")
+
+        loader = threading.Thread(target=load)
+        loader.start()
+        loader_printed.wait()
+        print("Enter your message: hi")
+        prompt_done.set()
+        loader.join()
+
+        self.assertEqual(self.stream.getvalue(), "Enter your message: hi\nloading a\nloading b\n")
+
+    def test_prompt_shows_what_was_printed_before_it(self):
+        with patch("builtins.input", side_effect=lambda message: print(message) or "yes"):
+            with buffered_output():
+                print("⚠️ Warning")
+                self.assertEqual(prompt_user("Proceed?"), "yes")
+                print("after")
+                self.assertEqual(self.stream.getvalue(), "⚠️ Warning\nProceed?\n")
+        self.assertEqual(self.stream.getvalue(), "⚠️ Warning\nProceed?\nafter\n")
+
+if __name__ == "__main__":
+    unittest.main()
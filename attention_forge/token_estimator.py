@@ -0,0 +1,30 @@
+import re
+
+WORD_PATTERN = re.compile(r"\w+")
+SYMBOL_PATTERN = re.compile(r"[^\w\s]")
+
+
+def estimate_tokens(text):
+    """
+    Fast local estimate of the BPE token count of text, without a tokenizer.
+    Prose averages about four characters per token; code and markup carry more
+    punctuation, which tends to tokenize separately, so both are considered.
+    """
+    if not text:
+        return 0
+    by_length = (len(text) + 3) // 4
+    by_pieces = len(WORD_PATTERN.findall(text)) + len(SYMBOL_PATTERN.findall(text)) // 2
+    return max(by_length, by_pieces)
+
+
+# Chat formats wrap each message in a few role and separator tokens and prime the reply
+MESSAGE_OVERHEAD_TOKENS = 4
+REPLY_PRIMING_TOKENS = 3
+
+
+def estimate_message_tokens(messages):
+    """Estimate the prompt tokens of a list of chat messages, before sending them."""
+    if not messages:
+        return 0
+    return sum(MESSAGE_OVERHEAD_TOKENS + estimate_tokens(message.get("content") or "")
+               for message in messages) + REPLY_PRIMING_TOKENS
@@ -0,0 +1,142 @@
+import os
+import json
+import time
+import asyncio
+import itertools
+import threading
+from contextlib import contextmanager
+
+TRACE_DIR = ".attention_forge/traces"
+
+
+class Tracer:
+    """
+    Collects timed spans in memory and writes them as a Chrome trace-event
+    file, which chrome://tracing and https://ui.perfetto.dev can open.
+    """
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self.events = []
+        self.thread_names = {}
+        self.async_ids = itertools.count(1)
+        self.lock = threading.Lock()
+
+    def timestamp(self):
+        """Microseconds since the tracer started, the unit of the trace-event format."""
+        return (time.perf_counter() - self.origin) * 1e6
+
+    def add_event(self, event):
+        thread = threading.current_thread()
+        event["pid"] = self.pid
+        event.setdefault("tid", thread.ident)
+        with self.lock:
+            self.thread_names.setdefault(thread.ident, thread.name)
+            self.events.append(event)
+
+    def get_step_times(self):
+        """
+        (name, wall seconds, CPU seconds of the step's thread or None for async
+        steps) of the chain steps, in start order.
+        """
+        with self.lock:
+            events = [event for event in self.events if event.get("cat") == "step"]
+        steps = []
+        async_starts = {}
+        for event in events:
+            if event["ph"] == "X":
+                steps.append((event["ts"], event["name"], event["dur"], event["args"].get("cpu_ms", 0)))
+            elif event["ph"] == "b":
+                async_starts[event["id"]] = event
+            elif event["id"] in async_starts:
+                start = async_starts.pop(event["id"])
+                steps.append((start["ts"], event["name"], event["ts"] - start["ts"], None))
+        steps.sort(key=lambda step: step[0])
+        return [(name, duration / 1e6, cpu_ms / 1e3 if cpu_ms is not None else None)
+                for _, name, duration, cpu_ms in steps]
+
+    def write(self, path):
+        with self.lock:
+            metadata = [{"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": name}}
+                        for tid, name in self.thread_names.items()]
+            trace = {"traceEvents": metadata + self.events, "displayTimeUnit": "ms"}
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with open(path, "w", encoding="utf-8") as trace_file:
+            json.dump(trace, trace_file)
+        return path
+
+
+tracer = None
+
+
+def start_tracing():
+    """Start recording spans for the rest of the process."""
+    global tracer
+    tracer = Tracer()
+    return tracer
+
+
+def in_event_loop():
+    try:
+        return asyncio.current_task() is not None
+    except RuntimeError:
+        return False
+
+
+@contextmanager
+def span(name, category, **args):
+    """
+    Time the enclosed block as one trace span; does nothing unless tracing was
+    started. Synchronous spans also record the CPU time of their thread.
+    Spans inside a coroutine overlap on one thread, so they are recorded as
+    async events without CPU time.
+    """
+    active_tracer = tracer
+    if active_tracer is None:
+        yield
+        return
+
+    if in_event_loop():
+        async_id = next(active_tracer.async_ids)
+        active_tracer.add_event({"name": name, "cat": category, "ph": "b", "id": async_id,
+                                 "ts": active_tracer.timestamp(), "args": args})
+        try:
+            yield
+        except BaseException as error:
+            args["error"] = type(error).__name__
+            raise
+        finally:
+            active_tracer.add_event({"name": name, "cat": category, "ph": "e", "id": async_id,
+                                     "ts": active_tracer.timestamp(), "args": args})
+        return
+
+    start = active_tracer.timestamp()
+    start_cpu = time.thread_time()
+    try:
+        yield
+    except BaseException as error:
+        args["error"] = type(error).__name__
+        raise
+    finally:
+        args["cpu_ms"] = round((time.thread_time() - start_cpu) * 1e3, 3)
+        active_tracer.add_event({"name": name, "cat": category, "ph": "X", "ts": start,
+                                 "dur": active_tracer.timestamp() - start, "args": args})
+
+
+def finish_tracing(run_id):
+    """Write the trace of this run to .attention_forge/traces/ and print the time spent per step."""
+    if tracer is None:
+        return None
+    step_times = tracer.get_step_times()
+    if step_times:
+        # Only the step's own thread is measured: work it hands to a pool, like file reads, is not included
+        print("⏱️ Step times (wall / step-thread CPU):")
+        for name, wall_seconds, cpu_seconds in step_times:
+            print(f"   {name}: {wall_seconds:.2f}s / "
+                  f"{f'{cpu_seconds:.2f}s' if cpu_seconds is not None else 'n/a'}")
+    path = tracer.write(os.path.join(TRACE_DIR, f"{run_id}.json"))
+    print(f"🧵 Trace saved to {path}. Open it in chrome://tracing or https://ui.perfetto.dev.")
+    return path
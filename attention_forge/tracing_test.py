@@ -0,0 +1,68 @@
+import os
+import json
+import asyncio
+import tempfile
+import unittest
+from unittest.mock import patch
+from attention_forge import tracing
+from attention_forge.tracing import span, start_tracing, finish_tracing
+
+class TestTracing(unittest.TestCase):
+    def setUp(self):
+        self.addCleanup(setattr, tracing, "tracer", None)
+
+    def test_spans_are_ignored_until_tracing_starts(self):
+        with span("step", "step"):
+            pass
+        self.assertIsNone(tracing.tracer)
+
+    def test_sync_span_records_wall_and_cpu_time(self):
+        tracer = start_tracing()
+        with span("1. context_load", "step"):
+            with span("read file", "io", path="a.py"):
+                sum(range(1000))
+
+        read_event, step_event = tracer.events
+        self.assertEqual((read_event["ph"], read_event["args"]["path"]), ("X", "a.py"))
+        self.assertIn("cpu_ms", read_event["args"])
+        self.assertGreaterEqual(step_event["dur"], read_event["dur"])
+        self.assertEqual([name for name, _, _ in tracer.get_step_times()], ["1. context_load"])
+
+    def test_errors_are_recorded_and_raised(self):
+        tracer = start_tracing()
+        with self.assertRaises(KeyError):
+            with span("3. chat", "step"):
+                raise KeyError("boom")
+        self.assertEqual(tracer.events[0]["args"]["error"], "KeyError")
+
+    def test_spans_in_coroutines_are_async_events(self):
+        tracer = start_tracing()
+
+        async def chat(name):
+            with span(name, "step"):
+                await asyncio.sleep(0.01)
+
+        async def main():
+            await asyncio.gather(chat("a"), chat("b"))
+
+        asyncio.run(main())
+        self.assertEqual(sorted(event["ph"] for event in tracer.events), ["b", "b", "e", "e"])
+        step_times = tracer.get_step_times()
+        self.assertEqual(len(step_times), 2)
+        self.assertIsNone(step_times[0][2])
+
+    @patch('builtins.print')
+    def test_finish_tracing_writes_a_chrome_trace(self, mock_print):
+        start_tracing()
+        with span("1. user_input", "step"):
+            pass
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with patch.object(tracing, "TRACE_DIR", temp_dir):
+                path = finish_tracing("run-1")
+            with open(path, "r", encoding="utf-8") as trace_file:
+                trace = json.load(trace_file)
+        self.assertEqual(os.path.basename(path), "run-1.json")
+        self.assertEqual({event["ph"] for event in trace["traceEvents"]}, {"M", "X"})
+
+if __name__ == "__main__":
+    unittest.main()
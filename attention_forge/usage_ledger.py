@@ -0,0 +1,84 @@
+import os
+import json
+import threading
+from datetime import datetime
+
+USAGE_LEDGER_FILE = ".attention_forge/usage_ledger.jsonl"
+DEFAULT_USAGE_LEDGER_MAX_BYTES = 16 * 1024 * 1024
+
+
+class UsageLedger:
+    """
+    Append-only JSON Lines record of every chat request: run, step, client,
+    model, estimated and reported tokens, latency and decoding speed. Once the
+    file passes max_bytes it is moved aside to <path>.1, replacing the previous one.
+    """
+
+    def __init__(self, path=USAGE_LEDGER_FILE, max_bytes=DEFAULT_USAGE_LEDGER_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.recorded = []  # Entries recorded by this process, for the run summary
+        self.lock = threading.Lock()
+
+    def record(self, run_id, step_name, client_name, model, estimated_prompt_tokens, response_data):
+        usage = response_data.get("usage", {})
+        timing = response_data.get("timing", {})
+        entry = {
+            "run_id": run_id,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "step": step_name,
+            "client": client_name,
+            "model": model,
+            "cached_response": bool(response_data.get("cached")),
+            "estimated_prompt_tokens": estimated_prompt_tokens,
+            "prompt_tokens": usage.get("prompt_tokens"),
+            "completion_tokens": usage.get("completion_tokens"),
+            "total_tokens": usage.get("total_tokens"),
+            "cached_tokens": usage.get("cached_tokens"),
+            "time_to_first_token": timing.get("time_to_first_token"),
+            "total_seconds": timing.get("total_seconds"),
+            "tokens_per_second": timing.get("tokens_per_second")
+        }
+
+        with self.lock:
+            self.recorded.append(entry)
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            elif self.max_bytes and os.path.isfile(self.path) and os.path.getsize(self.path) > self.max_bytes:
+                os.replace(self.path, f"{self.path}.1")
+            with open(self.path, "a", encoding="utf-8") as ledger_file:
+                ledger_file.write(json.dumps(entry) + "\n")
+        return entry
+
+    def get_recorded(self, run_id):
+        """The entries of a run recorded by this process, without reading the file back."""
+        with self.lock:
+            return [entry for entry in self.recorded if entry["run_id"] == run_id]
+
+    def load(self, run_id=None):
+        """Return the recorded entries, optionally only those of one run. Malformed lines are skipped."""
+        if not os.path.isfile(self.path):
+            return []
+        entries = []
+        with open(self.path, "r", encoding="utf-8") as ledger_file:
+            for line in ledger_file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if run_id is None or entry.get("run_id") == run_id:
+                    entries.append(entry)
+        return entries
+
+    @staticmethod
+    def summarize(entries):
+        """Totals over entries; replies served from the response cache cost no provider tokens."""
+        billed = [entry for entry in entries if not entry.get("cached_response")]
+        return {
+            "requests": len(entries),
+            "cached_responses": len(entries) - len(billed),
+            "prompt_tokens": sum(entry.get("prompt_tokens") or 0 for entry in billed),
+            "completion_tokens": sum(entry.get("completion_tokens") or 0 for entry in billed),
+            "total_seconds": round(sum(entry.get("total_seconds") or 0 for entry in entries), 3)
+        }